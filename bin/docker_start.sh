@@ -22,6 +22,7 @@ done
 # Apply database migrations
 >&2 echo "Apply database migrations"
 python src/manage.py migrate
+python src/manage.py createcachetable
 
 # check if we need to run collectstatic (volume overwrites image content)
 target=/app/static
@@ -0,0 +1,27 @@
+#!/bin/sh
+
+set -ex
+
+# Wait for the database container
+# See: https://docs.docker.com/compose/startup-order/
+db_host=${DB_HOST:-db}
+db_user=${DB_USER:-postgres}
+db_password=${DB_PASSWORD}
+db_port=${DB_PORT:-5432}
+
+until PGPORT=$db_port PGPASSWORD=$db_password psql -h "$db_host" -U "$db_user" -c '\q'; do
+  >&2 echo "Waiting for database connection..."
+  sleep 1
+done
+
+>&2 echo "Database is up."
+
+# The web container applies the migrations
+until ! python src/manage.py showmigrations --plan | grep -q '\[ \]'; do
+  >&2 echo "Waiting for database migrations..."
+  sleep 1
+done
+
+# Start worker
+>&2 echo "Starting worker"
+exec python src/manage.py process_notifications "$@"
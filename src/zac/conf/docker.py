@@ -30,7 +30,9 @@ CACHES = {
     # https://github.com/jazzband/django-axes/blob/master/docs/configuration.rst#cache-problems
     'axes_cache': {
         'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
-    }
+    },
+    'catalogue': CACHES['catalogue'],
+    'traffic': CACHES['traffic'],
 }
 
 # Deal with being hosted on a subpath
@@ -100,6 +100,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'zac.demo.middleware.ServerTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -280,6 +281,13 @@ LOGGING = {
             'level': 'INFO',
             'propagate': True,
         },
+        # The duration of requests to the APIs (see `zac.demo.metrics`) and
+        # views that exceed their `upstream_call_budget`.
+        'performance': {
+            'handlers': ['performance'],
+            'level': 'INFO',
+            'propagate': False,
+        },
     }
 }
 
@@ -295,6 +303,29 @@ REDIS_HOST = getenv('REDIS_HOST', 'localhost')
 REDIS_PORT = int(getenv('REDIS_PORT', 6379))
 REDIS_DB_CACHE = getenv('REDIS_DB_CACHE', 1)
 
+# Caching
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'catalogue': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'catalogue',
+        'TIMEOUT': int(getenv('CATALOGUE_CACHE_TIMEOUT', 60 * 60)),
+        'OPTIONS': {
+            'MAX_ENTRIES': int(getenv('CATALOGUE_CACHE_MAX_ENTRIES', 1000)),
+        },
+    },
+    # Shared by all processes, create the table with `createcachetable`.
+    'traffic': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'traffic_log_cache',
+        'OPTIONS': {
+            'MAX_ENTRIES': int(getenv('TRAFFIC_LOG_CACHE_MAX_ENTRIES', 1000)),
+        },
+    },
+}
+
 # Channels
 ASGI_APPLICATION = 'zac.routing.application'
 CHANNEL_LAYERS = {
@@ -350,6 +381,80 @@ if SENTRY_DSN:
 #
 DEFAULT_NOTIFICATIONS_HANDLER = 'zac.demo.mijngemeente.api.handlers.default'
 
+# Processing of the queue of received notifications, see
+# `zac.demo.mijngemeente.queue`. Failed notifications are retried after
+# `NOTIFICATIONS_QUEUE_RETRY_BACKOFF` seconds, doubling with every attempt.
+NOTIFICATIONS_QUEUE_WORKERS = int(getenv('NOTIFICATIONS_QUEUE_WORKERS', 4))
+NOTIFICATIONS_QUEUE_BATCH_SIZE = int(getenv('NOTIFICATIONS_QUEUE_BATCH_SIZE', 50))
+NOTIFICATIONS_QUEUE_MAX_ATTEMPTS = int(getenv('NOTIFICATIONS_QUEUE_MAX_ATTEMPTS', 5))
+NOTIFICATIONS_QUEUE_RETRY_BACKOFF = int(getenv('NOTIFICATIONS_QUEUE_RETRY_BACKOFF', 10))
+# The number of seconds a worker gets to process a notification, before another
+# worker may claim it.
+NOTIFICATIONS_QUEUE_LEASE = int(getenv('NOTIFICATIONS_QUEUE_LEASE', 5 * 60))
+# The number of milliseconds to wait for other notifications about the same
+# main object, which are then combined into one user notification.
+NOTIFICATIONS_COALESCE_WINDOW = int(getenv('NOTIFICATIONS_COALESCE_WINDOW', 500))
+# The maximum number of missed notifications that are sent to a reconnecting
+# websocket. If more were missed, the page is reloaded instead.
+NOTIFICATIONS_REPLAY_LIMIT = int(getenv('NOTIFICATIONS_REPLAY_LIMIT', 100))
+
+# Consuming notifications from an AMQP server (`runconsumer`), see
+# `zac.demo.mijngemeente.amqp`.
+NOTIFICATIONS_AMQP_WORKERS = int(getenv('NOTIFICATIONS_AMQP_WORKERS', 4))
+NOTIFICATIONS_AMQP_PREFETCH_COUNT = int(getenv('NOTIFICATIONS_AMQP_PREFETCH_COUNT', 16))
+# The name of the durable queue per exchange, formatted with the exchange.
+NOTIFICATIONS_AMQP_QUEUE = getenv('NOTIFICATIONS_AMQP_QUEUE', 'zac.{exchange}')
+
+# Read user notifications are archived after this number of days, see
+# `zac.demo.mijngemeente.archive`.
+NOTIFICATIONS_ARCHIVE_AFTER_DAYS = int(getenv('NOTIFICATIONS_ARCHIVE_AFTER_DAYS', 30))
+NOTIFICATIONS_ARCHIVE_BATCH_SIZE = int(getenv('NOTIFICATIONS_ARCHIVE_BATCH_SIZE', 1000))
+
+# The cache (alias) used to store catalogue resources from the ZTC.
+CATALOGUE_CACHE = 'catalogue'
+
+# The maximum number of concurrent requests to the APIs, per request.
+UPSTREAM_CONCURRENCY = int(getenv('UPSTREAM_CONCURRENCY', 8))
+# The maximum number of seconds to wait for all requests to the APIs that are
+# needed for a page.
+UPSTREAM_TIMEOUT = int(getenv('UPSTREAM_TIMEOUT', 30))
+
+# Connection pooling and retries for requests to the APIs, see
+# `zac.demo.sessions`. The pool size is per service and should be at least
+# `UPSTREAM_CONCURRENCY`.
+UPSTREAM_POOL_SIZE = int(getenv('UPSTREAM_POOL_SIZE', 10))
+UPSTREAM_KEEP_ALIVE = getenv('UPSTREAM_KEEP_ALIVE', 'true').lower() in ['true', '1', 'yes']
+UPSTREAM_RETRIES = int(getenv('UPSTREAM_RETRIES', 2))
+UPSTREAM_RETRY_BACKOFF = float(getenv('UPSTREAM_RETRY_BACKOFF', 0.1))
+
+# The number of seconds a signed JWT for the APIs is valid, and how many
+# seconds before that it's renewed, see `zac.demo.auth`.
+UPSTREAM_JWT_LIFETIME = int(getenv('UPSTREAM_JWT_LIFETIME', 60 * 60))
+UPSTREAM_JWT_RENEW_MARGIN = int(getenv('UPSTREAM_JWT_RENEW_MARGIN', 5 * 60))
+
+# The traffic log with the APIs that is shown on every page, see
+# `zac.demo.traffic`. Disable capturing request and response bodies in
+# production.
+# The network traffic panel is only shown if enabled (by default with `DEBUG`),
+# as the log of every page is then stored in the cache and the session.
+TRAFFIC_LOG_PANEL = getenv('TRAFFIC_LOG_PANEL', str(DEBUG)).lower() in ['true', '1', 'yes']
+TRAFFIC_LOG_MAX_ENTRIES = int(getenv('TRAFFIC_LOG_MAX_ENTRIES', 100))
+TRAFFIC_LOG_MAX_BODY_LENGTH = int(getenv('TRAFFIC_LOG_MAX_BODY_LENGTH', 2000))
+TRAFFIC_LOG_CAPTURE_BODIES = getenv('TRAFFIC_LOG_CAPTURE_BODIES', 'true').lower() in ['true', '1', 'yes']
+# The number of seconds a traffic log is kept in the `TRAFFIC_LOG_CACHE`, to
+# show it when the network traffic panel is opened or on the next page. The
+# cache needs to be shared by all processes that serve the ZAC.
+TRAFFIC_LOG_TIMEOUT = int(getenv('TRAFFIC_LOG_TIMEOUT', 5 * 60))
+TRAFFIC_LOG_CACHE = 'traffic'
+
+# The status page shows the latest probes of the APIs, made by `probe_services`
+# every `STATUS_PROBE_INTERVAL` seconds. If the latest probes are older than
+# `STATUS_SNAPSHOT_MAX_AGE` seconds, the status page probes the APIs itself.
+# See `zac.status.probes`.
+STATUS_PROBE_INTERVAL = int(getenv('STATUS_PROBE_INTERVAL', 30))
+STATUS_SNAPSHOT_MAX_AGE = int(getenv('STATUS_SNAPSHOT_MAX_AGE', 2 * 60))
+STATUS_PROBE_HISTORY_DAYS = int(getenv('STATUS_PROBE_HISTORY_DAYS', 7))
+
 #
 # SSL or not?
 #
@@ -1,37 +1,36 @@
+import functools
+
 from django.utils.translation import ugettext_lazy as _
 from django.views.generic import TemplateView
 
-import requests
 from vng_api_common.notifications.models import Subscription
 from zds_client import ClientError
 
+from zac.demo.concurrency import run_concurrently
 from zac.demo.models import SiteConfiguration, client
+from zac.demo.sessions import get_session
 
 
-def _can_connect(service, url):
+def _get_root(service, url):
+    """
+    Returns the response of the root URL of the API, or `None` and the reason
+    it's not available.
+    """
     if not url:
-        return False, _('Server niet geconfigureerd')
+        return None, _('Server niet geconfigureerd')
 
     try:
-        response = requests.get(url, timeout=1)
+        response = get_session(service).get(url, timeout=1)
     except Exception:
-        return False, _('Server onbereikbaar')
+        return None, _('Server onbereikbaar')
 
     if response.status_code != 200:
-        return False, _('Server geeft een error')
-
-    return True, None
+        return None, _('Server geeft een error')
 
+    return response, None
 
-def _can_auth(service, url):
-    try:
-        response = requests.get(url, timeout=1)
-    except Exception:
-        return False, _('Server onbereikbaar')
-
-    if response.status_code != 200:
-        return False, _('Server geeft een error')
 
+def _can_auth(service, response):
     data = response.json()
     k, v = list(data.items())[0]
 
@@ -101,8 +100,14 @@ def _get_general_config(config):
 def _get_api_config(config, service, url):
     service_config = config.get_service_config(service)
 
-    conn_success, conn_msg = _can_connect(service, url)
-    auth_success, auth_msg = _can_auth(service, url)
+    # The root URL is fetched once, to check both the connection and the
+    # credentials.
+    response, conn_msg = _get_root(service, url)
+    conn_success = response is not None
+    if conn_success:
+        auth_success, auth_msg = _can_auth(service, response)
+    else:
+        auth_success, auth_msg = False, conn_msg
 
     return [
         (
@@ -214,7 +219,7 @@ def _get_brp_config(config):
 
     if config.brp_base_url:
         try:
-            response = requests.get(config.brp_base_url + 'ingeschrevenpersonen/', timeout=1, headers={'X-API-KEY': config.brp_api_key})
+            response = get_session('brp').get(config.brp_base_url + 'ingeschrevenpersonen/', timeout=1, headers={'X-API-KEY': config.brp_api_key})
         except Exception:
             error_msg = _('Server onbereikbaar')
         else:
@@ -244,22 +249,25 @@ class ConfigView(TemplateView):
         config = SiteConfiguration.get_solo()
         services = config.get_services()
 
-        groups = []
-
-        groups.extend([
-            (_('Algemeen'), _get_general_config(config)),
-            (_('Demo applicatie: Mijn Gemeente'), _get_mijn_gemeente_config(config)),
-            (_('Demo applicatie: Melding Openbare Ruimte'), _get_mor_config(config)),
-        ])
+        probes = [
+            (_('Algemeen'), functools.partial(_get_general_config, config)),
+            (_('Demo applicatie: Melding Openbare Ruimte'), functools.partial(_get_mor_config, config)),
+        ]
+        probes.extend(
+            (service.upper(), functools.partial(_get_api_config, config, service, url))
+            for service, url in services.items()
+        )
+        probes.append(
+            (_('BRP'), functools.partial(_get_brp_config, config))
+        )
 
-        for service, url in services.items():
-            groups.append(
-                (service.upper(), _get_api_config(config, service, url))
-            )
+        # Probe all APIs at once, so an API that is down only costs the time
+        # of its own timeout.
+        results = run_concurrently(lambda probe: probe(), [probe for title, probe in probes], max_workers=len(probes))
+        groups = [(title, result) for (title, probe), result in zip(probes, results)]
 
-        groups.append(
-            (_('BRP'), _get_brp_config(config))
-        )
+        # The subscriptions are in the database, check them in this thread.
+        groups.insert(1, (_('Demo applicatie: Mijn Gemeente'), _get_mijn_gemeente_config(config)))
 
         context.update({
             'groups': groups
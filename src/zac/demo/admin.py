@@ -14,7 +14,7 @@ from zds_client import ClientAuth
 
 from zac.demo.mijngemeente.models import UserNotification
 
-from .models import OtherZTC, SiteConfiguration
+from .models import Exchange, OtherZTC, SiteConfiguration
 
 
 @admin.register(UserNotification)
@@ -27,6 +27,11 @@ class OtherZTCInline(admin.TabularInline):
     extra = 1
 
 
+class ExchangeInline(admin.TabularInline):
+    model = Exchange
+    extra = 0
+
+
 @admin.register(SiteConfiguration)
 class SiteConfigurationAdmin(SingletonModelAdmin):
     fieldsets = (
@@ -86,8 +91,8 @@ class SiteConfigurationAdmin(SingletonModelAdmin):
                 'callback_client_id',
                 'callback_secret',
                 'get_callback_jwt',
-                # 'nc_amqp_host',
-                # 'nc_amqp_port',
+                'nc_amqp_host',
+                'nc_amqp_port',
             ]
         }),
         (_('Basis registratie (ingeschreven) personen (BRP)'), {
@@ -118,7 +123,7 @@ class SiteConfigurationAdmin(SingletonModelAdmin):
         }),
 
     )
-    inlines = [OtherZTCInline, ]
+    inlines = [OtherZTCInline, ExchangeInline, ]
     readonly_fields = ['get_example_callback_url', 'get_callback_jwt']
     raw_id_fields = ('objects_api', 'objecttypes_api')
 
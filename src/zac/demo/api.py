@@ -1,8 +1,62 @@
+import logging
 from itertools import groupby
 
-from zac.demo.models import SiteConfiguration
+from zds_client import ClientError
+
+from zac.demo.catalogue import get_catalogue_cache, url_cache_key
+from zac.demo.concurrency import run_concurrently
+from zac.demo.models import SiteConfiguration, client
 from zac.demo.utils import api_response_list_to_dict
 
+logger = logging.getLogger(__name__)
+
+
+# ZGW APIs
+def retrieve_many(service, resource, urls) -> dict:
+    """
+    Retrieves the objects for all given URLs concurrently. Each URL is only
+    retrieved once and objects that could not be retrieved are left out.
+
+    :param service: The service key of the API.
+    :param resource: The resource name of the objects.
+    :param urls: An iterable of object URLs.
+    :return: A `dict` with the objects addressable by their URL.
+    """
+    urls = list(dict.fromkeys(url for url in urls if url))
+
+    def _retrieve(url):
+        try:
+            return client(service, url=url).retrieve(resource, url=url)
+        except ClientError as e:
+            logger.exception(e)
+            return None
+
+    objects = run_concurrently(_retrieve, urls)
+    return {
+        url: obj for url, obj in zip(urls, objects) if obj is not None
+    }
+
+
+# Catalogi API
+def get_catalogue_objects(resource, urls) -> dict:
+    """
+    Resolves catalogue objects (like statustypen) by URL. Objects are looked up
+    in the catalogue cache in one go and only the missing objects are
+    retrieved from the ZTC.
+
+    :param resource: The resource name of the objects.
+    :param urls: An iterable of object URLs.
+    :return: A `dict` with the objects addressable by their URL.
+    """
+    keys = {url_cache_key(url): url for url in urls if url}
+    cached = get_catalogue_cache().get_many(keys.keys())
+
+    objects = {keys[key]: obj for key, obj in cached.items()}
+    objects.update(retrieve_many(
+        'ztc', resource, [url for url in keys.values() if url not in objects]
+    ))
+    return objects
+
 
 # Object Types API
 def get_objecttypes_by_url() -> dict:
@@ -5,6 +5,7 @@ class DemoConfig(AppConfig):
     name = 'zac.demo'
 
     def ready(self):
-        from . import signals
+        from . import signals, traffic
 
         signals.initialize_settings()
+        traffic.install()
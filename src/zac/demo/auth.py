@@ -0,0 +1,121 @@
+"""
+Caching of the JWTs that authenticate the ZAC with the APIs.
+
+Signing a JWT for every upstream request is measurable CPU on pages that make
+dozens of requests. The `CachedClientAuth` reuses a signed JWT for the same
+client ID, user and scopes until shortly before it expires.
+"""
+import json
+import threading
+import time
+
+from django.conf import settings
+
+from zds_client import ClientAuth
+
+
+class CredentialsCache:
+    """
+    Thread-safe cache of signed credentials, with hit and miss counters.
+    """
+
+    def __init__(self, max_entries=1000):
+        self.max_entries = max_entries
+
+        self._entries = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self.hits += 1
+                return entry[1]
+
+            self.misses += 1
+            return None
+
+    def set(self, key, credentials, expires):
+        with self._lock:
+            if key not in self._entries and len(self._entries) >= self.max_entries:
+                now = time.time()
+                self._entries = {k: v for k, v in self._entries.items() if v[0] > now}
+                if len(self._entries) >= self.max_entries:
+                    # Drop the oldest entry.
+                    del self._entries[next(iter(self._entries))]
+
+            self._entries[key] = (expires, credentials)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+            }
+
+
+credentials_cache = CredentialsCache()
+
+
+class CachedClientAuth(ClientAuth):
+    """
+    A `ClientAuth` that takes its credentials from the shared
+    `credentials_cache`.
+
+    A signed JWT is reused for `UPSTREAM_JWT_LIFETIME` seconds, minus the
+    `UPSTREAM_JWT_RENEW_MARGIN`, so it's never used close to its expiry.
+    """
+
+    @classmethod
+    def from_auth(cls, auth, **kwargs):
+        """
+        Returns a `CachedClientAuth` with the configuration of `auth`.
+
+        :param auth: A `ClientAuth` instance.
+        :param kwargs: Any values to override, like the `user_id`.
+        :return: A `CachedClientAuth` instance.
+        """
+        config = {
+            'client_id': auth.client_id,
+            'secret': auth.secret,
+            'user_id': auth.user_id,
+            'user_representation': auth.user_representation,
+        }
+        config.update(auth.claims)
+        config.update(kwargs)
+        return cls(**config)
+
+    def _cache_key(self):
+        return (
+            self.client_id,
+            self.secret,
+            self.user_id,
+            self.user_representation,
+            json.dumps(self.claims, sort_keys=True),
+        )
+
+    def credentials(self):
+        key = self._cache_key()
+
+        credentials = credentials_cache.get(key)
+        if credentials is None:
+            # Let `ClientAuth` sign a fresh JWT, rather than using its own
+            # (never expiring) cached credentials.
+            if hasattr(self, '_credentials'):
+                del self._credentials
+            credentials = super().credentials()
+
+            expires = time.time() + settings.UPSTREAM_JWT_LIFETIME - settings.UPSTREAM_JWT_RENEW_MARGIN
+            credentials_cache.set(key, credentials, expires)
+
+        return credentials
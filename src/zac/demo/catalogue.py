@@ -0,0 +1,104 @@
+"""
+Caching of catalogue resources from the ZTC.
+
+Catalogue resources (zaaktypen, statustypen, etc.) hardly ever change, while
+almost every view needs them. The `CatalogueClient` stores retrieved and listed
+catalogue resources in a dedicated Django cache, configured by the
+`CATALOGUE_CACHE` setting, so repeated requests don't hit the ZTC at all. The
+TTL and size bound of the cache are configured on the cache itself.
+"""
+import hashlib
+import json
+import logging
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .client import ZACClient
+
+logger = logging.getLogger(__name__)
+
+CATALOGUE_RESOURCES = (
+    'catalogus',
+    'zaaktype',
+    'statustype',
+    'besluittype',
+    'resultaattype',
+    'roltype',
+    'informatieobjecttype',
+    'eigenschap',
+)
+
+
+def get_catalogue_cache():
+    return caches[settings.CATALOGUE_CACHE]
+
+
+def make_cache_key(*bits):
+    """
+    Returns a cache key that is safe to use with any cache backend.
+
+    :param bits: Any JSON serializable values that identify the cached value.
+    :return: A `string` with the cache key.
+    """
+    raw = json.dumps(bits, sort_keys=True, default=str)
+    return 'ztc:{}'.format(hashlib.md5(raw.encode('utf-8')).hexdigest())
+
+
+def url_cache_key(url):
+    return make_cache_key('url', url)
+
+
+def _list_results(response):
+    if isinstance(response, dict) and 'results' in response:
+        return response['results']
+    return response
+
+
+class CatalogueClient(ZACClient):
+    """
+    A `Client` for the ZTC that caches catalogue resources.
+
+    Every resource that passes through this client is stored by its URL, so a
+    zaaktype that was part of a list is also available when it's retrieved by
+    URL later on. Anything that's not a catalogue resource is passed on to the
+    ZTC as is.
+    """
+
+    def _is_cacheable(self, resource, request_kwargs):
+        return resource in CATALOGUE_RESOURCES and not request_kwargs
+
+    def _store(self, key, response, objects):
+        values = {
+            url_cache_key(obj['url']): obj for obj in objects
+            if isinstance(obj, dict) and obj.get('url')
+        }
+        values[key] = response
+        get_catalogue_cache().set_many(values)
+
+    def retrieve(self, resource, url=None, request_kwargs=None, **path_kwargs):
+        if not self._is_cacheable(resource, request_kwargs):
+            return super().retrieve(resource, url=url, request_kwargs=request_kwargs, **path_kwargs)
+
+        if url:
+            key = url_cache_key(url)
+        else:
+            key = make_cache_key('retrieve', self.base_url, resource, path_kwargs)
+
+        obj = get_catalogue_cache().get(key)
+        if obj is None:
+            obj = super().retrieve(resource, url=url, **path_kwargs)
+            self._store(key, obj, [obj])
+        return obj
+
+    def list(self, resource, query_params=None, request_kwargs=None, **path_kwargs):
+        if not self._is_cacheable(resource, request_kwargs):
+            return super().list(resource, query_params=query_params, request_kwargs=request_kwargs, **path_kwargs)
+
+        key = make_cache_key('list', self.base_url, resource, path_kwargs, query_params)
+
+        response = get_catalogue_cache().get(key)
+        if response is None:
+            response = super().list(resource, query_params=query_params, **path_kwargs)
+            self._store(key, response, _list_results(response))
+        return response
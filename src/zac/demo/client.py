@@ -0,0 +1,108 @@
+import copy
+import time
+from urllib.parse import urljoin
+
+import requests
+from requests.structures import CaseInsensitiveDict
+from zds_client import Client, ClientError
+from zds_client.client import get_headers
+
+from .auth import CachedClientAuth
+from .metrics import record_upstream_request
+from .sessions import get_session
+
+
+class ZACClient(Client):
+    """
+    A `Client` that performs all requests through the pooled session of its
+    service, authenticated with cached credentials.
+    """
+
+    def __init__(self, service, base_path='/api/v1/'):
+        super().__init__(service, base_path)
+
+        if self.auth:
+            self.auth = CachedClientAuth.from_auth(self.auth)
+
+    def for_user(self, user_id, user_representation):
+        """
+        Returns a copy of this client that identifies itself as given user.
+
+        The copy shares the configuration, schema and connection pool with this
+        client and its JWTs are cached, so it's cheap to create one for every
+        request. This client itself is left untouched, which makes it safe to
+        share between threads.
+
+        :param user_id: The user ID in the JWT.
+        :param user_representation: The user representation in the JWT.
+        :return: A `ZACClient` instance.
+        """
+        user_client = copy.copy(self)
+        if self.auth:
+            user_client.auth = CachedClientAuth.from_auth(
+                self.auth,
+                user_id=user_id,
+                user_representation=user_representation
+            )
+        return user_client
+
+    def request(self, path, operation, method='GET', expected_status=200, request_kwargs=None, **kwargs):
+        """
+        Make the HTTP request using the pooled session of the service.
+
+        This mirrors `Client.request` of the ZDS client.
+        """
+        url = urljoin(self.base_url, path)
+
+        if request_kwargs:
+            kwargs.update(request_kwargs)
+
+        headers = CaseInsensitiveDict(kwargs.pop('headers', {}))
+        headers.setdefault('Accept', 'application/json')
+        headers.setdefault('Content-Type', 'application/json')
+        schema_headers = get_headers(self.schema, operation)
+        for header, value in schema_headers.items():
+            headers.setdefault(header, value)
+        if self.auth:
+            headers.update(self.auth.credentials())
+
+        kwargs['headers'] = headers
+
+        pre_id = self.pre_request(method, url, **kwargs)
+
+        start = time.monotonic()
+        try:
+            response = get_session(self.service).request(method, url, **kwargs)
+        except Exception:
+            record_upstream_request(self.service, operation, 'error', time.monotonic() - start)
+            raise
+        record_upstream_request(self.service, operation, response.status_code, time.monotonic() - start)
+
+        try:
+            response_json = response.json()
+        except Exception:
+            response_json = None
+
+        self.post_response(pre_id, response_json)
+
+        self._log.add(
+            self.service,
+            url,
+            method,
+            headers,
+            copy.deepcopy(kwargs.get('data', kwargs.get('json', None))),
+            response.status_code,
+            dict(response.headers),
+            response_json,
+            params=kwargs.get('params'),
+        )
+
+        try:
+            response.raise_for_status()
+        except requests.HTTPError as exc:
+            if response.status_code >= 500:
+                raise
+            raise ClientError(response_json) from exc
+
+        assert response.status_code == expected_status, response_json
+        return response_json
@@ -0,0 +1,180 @@
+"""
+Helpers to perform (upstream) requests concurrently.
+"""
+import contextvars
+import time
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from django.conf import settings
+from django.db import connections
+
+
+class FetchTimeout(Exception):
+    pass
+
+
+def _call_in_context(context, func, *args, **kwargs):
+    try:
+        return context.run(func, *args, **kwargs)
+    finally:
+        # Database connections are opened per thread, don't leave them open.
+        connections.close_all()
+
+
+def run_concurrently(func, items, max_workers=None):
+    """
+    Calls `func` for every item in `items` using a pool of threads.
+
+    Each call runs in a copy of the context (see `contextvars`) of the caller.
+    If any of the calls raises an exception, it's raised here as well.
+
+    :param func: The callable that gets each item as only argument.
+    :param items: An iterable of items.
+    :param max_workers: The maximum number of concurrent calls. Defaults to the
+                        `UPSTREAM_CONCURRENCY` setting.
+    :return: A `list` with the results, in the same order as `items`.
+    """
+    items = list(items)
+    if max_workers is None:
+        max_workers = settings.UPSTREAM_CONCURRENCY
+    max_workers = min(max_workers, len(items))
+
+    if max_workers <= 1:
+        return [func(item) for item in items]
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [
+            executor.submit(_call_in_context, contextvars.copy_context(), func, item)
+            for item in items
+        ]
+        return [future.result() for future in futures]
+
+
+class FetchPlan:
+    """
+    A set of named fetches that can depend on the results of other fetches.
+
+    Each fetch is started as soon as the fetches it depends on are done, so
+    independent fetches run concurrently and the total duration is that of the
+    slowest chain of dependent fetches. The results of the dependencies are
+    passed to the fetch as keyword arguments.
+
+    Usage:
+
+    >>> plan = FetchPlan()
+    >>> plan.add('besluiten', list_besluiten)
+    >>> plan.add('besluittypen', list_besluittypen)
+    >>> plan.add('audittrails', list_audittrail, each='besluiten')
+    >>> results = plan.execute()
+    >>> results['audittrails']
+    [[...], [...]]
+
+    A fetch with `each` is called once for every item in the result of that
+    fetch and results in a `list` of the individual results.
+    """
+
+    def __init__(self, max_workers=None, timeout=None):
+        """
+        :param max_workers: The maximum number of concurrent fetches. Defaults
+                            to the `UPSTREAM_CONCURRENCY` setting.
+        :param timeout: The maximum number of seconds all fetches together can
+                        take. Defaults to the `UPSTREAM_TIMEOUT` setting.
+        """
+        self.max_workers = max_workers or settings.UPSTREAM_CONCURRENCY
+        self.timeout = timeout or settings.UPSTREAM_TIMEOUT
+
+        self._fetches = OrderedDict()
+
+    def add(self, name, func, depends_on=(), each=None):
+        """
+        Adds a fetch to the plan. A fetch can only depend on fetches that were
+        added before.
+
+        :param name: The name of the fetch, used to refer to its result.
+        :param func: The callable that does the actual fetching.
+        :param depends_on: The names of the fetches whose results are passed
+                           as keyword arguments.
+        :param each: The name of the fetch for whose result items `func` is
+                     called, with the item as first argument.
+        """
+        depends_on = list(depends_on)
+        if each is not None and each not in depends_on:
+            depends_on.append(each)
+
+        if name in self._fetches:
+            raise ValueError('Fetch "{}" is already part of the plan.'.format(name))
+        unknown = [dep for dep in depends_on if dep not in self._fetches]
+        if unknown:
+            raise ValueError('Fetch "{}" depends on unknown fetches: {}'.format(name, ', '.join(unknown)))
+
+        self._fetches[name] = (func, depends_on, each)
+
+    def execute(self):
+        """
+        Performs all fetches in the plan.
+
+        If any fetch raises an exception, it's raised here as well.
+
+        :raises: `FetchTimeout` if the fetches took longer than the timeout.
+        :return: A `dict` with the results by fetch name.
+        """
+        results = {}
+        waiting = OrderedDict(self._fetches)
+        running = {}
+        collected = {}
+        deadline = time.monotonic() + self.timeout
+
+        executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        try:
+            while waiting or running:
+                # Dependencies are always added to the plan before their
+                # dependents, so a single pass starts all fetches that can be
+                # started.
+                for name, (func, depends_on, each) in list(waiting.items()):
+                    if any(dep not in results for dep in depends_on):
+                        continue
+                    del waiting[name]
+
+                    kwargs = {dep: results[dep] for dep in depends_on if dep != each}
+                    if each is None:
+                        future = executor.submit(_call_in_context, contextvars.copy_context(), func, **kwargs)
+                        running[future] = (name, None)
+                        continue
+
+                    items = list(results[each] or [])
+                    collected[name] = [None] * len(items)
+                    if not items:
+                        results[name] = collected.pop(name)
+                    for index, item in enumerate(items):
+                        future = executor.submit(_call_in_context, contextvars.copy_context(), func, item, **kwargs)
+                        running[future] = (name, index)
+
+                # Fetches over an empty result are resolved right away, so
+                # there may be nothing left to wait for.
+                if not running:
+                    continue
+
+                done, _ = wait(running, timeout=max(deadline - time.monotonic(), 0), return_when=FIRST_COMPLETED)
+                if not done:
+                    raise FetchTimeout('Fetching took longer than {} seconds: {}'.format(
+                        self.timeout, ', '.join(sorted(set(name for name, index in running.values())))))
+
+                for future in done:
+                    name, index = running.pop(future)
+                    if index is None:
+                        results[name] = future.result()
+                        continue
+
+                    collected[name][index] = future.result()
+                    if all(other != name for other, index in running.values()):
+                        results[name] = collected.pop(name)
+        except BaseException:
+            for future in running:
+                future.cancel()
+            raise
+        finally:
+            # Don't wait for fetches that are still running after a timeout.
+            executor.shutdown(wait=False)
+
+        return results
@@ -0,0 +1,86 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client as TestClient, override_settings
+
+from zds_client import Client
+from zds_client.oas import schema_fetcher
+
+from zac.demo.models import SiteConfiguration, client
+from zac.demo.replay import RecordingLog, save_fixture
+from zac.demo.traffic import install, load_traffic_log
+
+
+class Command(BaseCommand):
+    """
+    Example:
+
+        $ ./manage.py record_traffic /apps/zaakbeheer/ /apps/zaakbeheer/<uuid>/ --output traffic.json
+
+    Or, to save the traffic of a page that was opened in the browser, by the
+    identifier of its traffic log:
+
+        $ ./manage.py record_traffic --log <id> --output traffic.json --append
+    """
+    help = 'Record the traffic with the APIs in a fixture, for the replay_server command.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'paths',
+            nargs='*',
+            help='De paden van de ZAC-pagina\'s die worden opgevraagd.'
+        )
+        parser.add_argument(
+            '--log',
+            action='append',
+            dest='logs',
+            default=[],
+            help='Het ID van een opgeslagen verkeerslog om op te nemen. Neem verzoeken en antwoorden volledig op '
+                 'met TRAFFIC_LOG_CAPTURE_BODIES=true en TRAFFIC_LOG_MAX_BODY_LENGTH=0.'
+        )
+        parser.add_argument(
+            '--output',
+            default='traffic.json',
+            help='Het bestand waarin het verkeer wordt opgeslagen.'
+        )
+        parser.add_argument(
+            '--append',
+            action='store_true',
+            help='Voeg het verkeer toe aan het bestaande bestand.'
+        )
+
+    def handle(self, *args, **options):
+        if not options['paths'] and not options['logs']:
+            raise CommandError('Give the paths of the pages to request, or the ID of a traffic log.')
+
+        entries = []
+        for log_id in options['logs']:
+            log = load_traffic_log(log_id)
+            if log is None:
+                raise CommandError(f'The traffic log "{log_id}" is not (or no longer) available.')
+            entries += log
+
+        if options['paths']:
+            entries += self.request_pages(options['paths'])
+
+        # Make sure the schemas of all APIs in the traffic are fetched.
+        config = SiteConfiguration.get_solo()
+        for service in {entry['service'] for entry in entries} & set(config.SERVICES):
+            try:
+                client(service).schema
+            except Exception as exc:
+                self.stderr.write(f'Could not fetch the schema of {service}: {exc}')
+
+        count = save_fixture(options['output'], entries, dict(schema_fetcher.cache), append=options['append'])
+        self.stdout.write(f'Recorded {len(entries)} request(s), {count} in {options["output"]}.')
+
+    def request_pages(self, paths):
+        log = RecordingLog()
+        Client._log = log
+        try:
+            with override_settings(ALLOWED_HOSTS=['*']):
+                test_client = TestClient()
+                for path in paths:
+                    response = test_client.get(path)
+                    self.stdout.write(f'{path}: {response.status_code}')
+        finally:
+            install()
+        return log.recorded
@@ -0,0 +1,95 @@
+import threading
+
+from django.core.management.base import BaseCommand, CommandError
+
+from zac.demo.models import SiteConfiguration
+from zac.demo.replay import create_servers, load_fixture
+
+
+class Command(BaseCommand):
+    """
+    Example:
+
+        $ ./manage.py replay_server traffic.json --latency 50 --jitter 20 --configure
+    """
+    help = 'Start local servers that replay the traffic with the APIs, recorded with record_traffic.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'fixture',
+            help='Het bestand met het opgenomen verkeer.'
+        )
+        parser.add_argument(
+            '--host',
+            default='127.0.0.1',
+            help='Het adres waarop de servers luisteren.'
+        )
+        parser.add_argument(
+            '--port',
+            type=int,
+            default=9000,
+            help='De poort van de eerste server. Iedere opgenomen server krijgt een eigen poort.'
+        )
+        parser.add_argument(
+            '--latency',
+            type=float,
+            default=0,
+            help='Het aantal milliseconden dat op een antwoord wordt gewacht.'
+        )
+        parser.add_argument(
+            '--jitter',
+            type=float,
+            default=0,
+            help='Het maximaal aantal milliseconden dat de wachttijd varieert.'
+        )
+        parser.add_argument(
+            '--configure',
+            action='store_true',
+            help='Verwijs de APIs in de configuratie naar de servers.'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            fixture = load_fixture(options['fixture'])
+        except (OSError, ValueError) as exc:
+            raise CommandError(f'Could not load the fixture: {exc}')
+
+        replay, servers = create_servers(
+            fixture, host=options['host'], port=options['port'], latency=options['latency'],
+            jitter=options['jitter']
+        )
+        if not servers:
+            raise CommandError('The fixture has no recorded traffic.')
+
+        for origin, base_url in replay.base_urls.items():
+            self.stdout.write(f'Replaying {origin} on {base_url} ({len(replay.responses[origin])} responses).')
+
+        if options['configure']:
+            self.configure(replay)
+
+        threads = [threading.Thread(target=server.serve_forever, daemon=True) for server in servers]
+        for thread in threads:
+            thread.start()
+
+        self.stdout.write('Quit with CTRL-BREAK.')
+        try:
+            for thread in threads:
+                thread.join()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            for server in servers:
+                server.shutdown()
+                server.server_close()
+
+    def configure(self, replay):
+        config = SiteConfiguration.get_solo()
+
+        for field in [f'{service}_base_url' for service in config.SERVICES] + ['brp_base_url']:
+            url = getattr(config, field)
+            new_url = replay.rewrite(url)
+            if new_url != url:
+                setattr(config, field, new_url)
+                self.stdout.write(f'Configured {field}: {url} -> {new_url}')
+
+        config.save()
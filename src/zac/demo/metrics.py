@@ -0,0 +1,139 @@
+"""
+In-process metrics of the requests to the APIs.
+
+Every request to an API, made through `client()` or to the BRP, is timed and
+recorded in the `upstream_requests` histogram by service, resource, operation
+and status, and written to the "performance" log. It's also added to the
+`RequestTimings` of the current request, if any. The metrics are exposed in
+the Prometheus text format on `/status/metrics/`.
+
+The metrics are kept per process, so each process that serves the ZAC should
+be scraped on its own.
+"""
+import logging
+import threading
+
+from .timing import get_request_timings
+
+logger = logging.getLogger('performance')
+
+# The Prometheus default buckets, in seconds.
+DEFAULT_BUCKETS = (.005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(labels):
+    return ','.join('{}="{}"'.format(name, _escape(value)) for name, value in labels)
+
+
+def _format_bound(bound):
+    return '+Inf' if bound == float('inf') else repr(float(bound))
+
+
+class Histogram:
+    """
+    A thread-safe histogram of observations, per combination of label values.
+    """
+
+    def __init__(self, name, documentation, labelnames, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'), )
+
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        """
+        Records `value` for the given label values.
+        """
+        key = tuple(str(labels[name]) for name in self.labelnames)
+
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = {'buckets': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series['buckets'][index] += 1
+                    break
+            series['sum'] += value
+            series['count'] += 1
+
+    def collect(self):
+        """
+        Returns a copy of all series.
+
+        :return: A `dict` with a `tuple` of label values as key and a `dict`
+                 with the (non-cumulative) bucket counts, sum and count.
+        """
+        with self._lock:
+            return {
+                key: dict(series, buckets=list(series['buckets']))
+                for key, series in self._series.items()
+            }
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+
+    def render(self):
+        """
+        Returns the histogram in the Prometheus text format.
+        """
+        lines = [
+            '# HELP {} {}'.format(self.name, self.documentation),
+            '# TYPE {} histogram'.format(self.name),
+        ]
+
+        for key, series in sorted(self.collect().items()):
+            labels = list(zip(self.labelnames, key))
+
+            cumulative = 0
+            for bound, count in zip(self.buckets, series['buckets']):
+                cumulative += count
+                lines.append('{}_bucket{{{}}} {}'.format(
+                    self.name, _format_labels(labels + [('le', _format_bound(bound))]), cumulative))
+            lines.append('{}_sum{{{}}} {}'.format(self.name, _format_labels(labels), repr(series['sum'])))
+            lines.append('{}_count{{{}}} {}'.format(self.name, _format_labels(labels), series['count']))
+
+        return '\n'.join(lines) + '\n'
+
+
+upstream_requests = Histogram(
+    'zac_upstream_request_duration_seconds',
+    'Duration of the requests to the APIs.',
+    ['service', 'resource', 'operation', 'status'],
+)
+
+
+def record_upstream_request(service, operation, status, duration):
+    """
+    Records a request to an API.
+
+    :param service: The service, like "zrc".
+    :param operation: The operation ID from the API schema, like "zaak_list",
+                      which is split in the resource and the operation.
+    :param status: The HTTP status code, or "error" if there was no response.
+    :param duration: The duration in seconds.
+    """
+    resource, _, operation = operation.partition('_')
+    upstream_requests.observe(duration, service=service, resource=resource, operation=operation, status=status)
+
+    timings = get_request_timings()
+    if timings is not None:
+        timings.add_upstream(service, duration)
+
+    logger.info('%s %s %s %s %.1fms', service, resource, operation, status, duration * 1000)
+
+
+def render_metrics():
+    """
+    Returns all metrics in the Prometheus text format.
+    """
+    return upstream_requests.render()
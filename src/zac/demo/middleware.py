@@ -0,0 +1,45 @@
+import time
+
+from django.db import connection
+
+from .timing import (
+    get_request_timings, start_request_timings, stop_request_timings
+)
+
+
+class ServerTimingMiddleware:
+    """
+    Reports where the time of a request was spent in the `Server-Timing`
+    header: requests to the APIs (in total and per service), database queries
+    and template rendering.
+
+    Place it at the top of `MIDDLEWARE`, so its `process_template_response` is
+    called right before the template is rendered. Database queries from other
+    threads than the request thread are not included.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        start = time.monotonic()
+        token = start_request_timings()
+        try:
+            timings = get_request_timings()
+            with connection.execute_wrapper(timings.db_wrapper):
+                response = self.get_response(request)
+        finally:
+            stop_request_timings(token)
+
+        response['Server-Timing'] = timings.header(total=time.monotonic() - start)
+        return response
+
+    def process_template_response(self, request, response):
+        timings = get_request_timings()
+        start = time.monotonic()
+
+        def record(response):
+            timings.add_template(time.monotonic() - start)
+
+        response.add_post_render_callback(record)
+        return response
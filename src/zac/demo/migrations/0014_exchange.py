@@ -0,0 +1,26 @@
+from django.db import migrations, models
+import django.db.models.deletion
+import zac.demo.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('demo', '0013_auto_20201002_0741'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Exchange',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(help_text='De naam van het kanaal (exchange) op de AMQP-server, bijvoorbeeld "zaken".', max_length=255, verbose_name='Kanaal')),
+                ('filters', models.TextField(blank=True, help_text='Een lijst van objecten met kenmerken, bijvoorbeeld: [{"bronorganisatie": "*", "zaaktype": "#"}]. Zonder filters worden alle berichten ontvangen.', validators=[zac.demo.models.validate_filters], verbose_name='Filters')),
+                ('config', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='demo.SiteConfiguration')),
+            ],
+            options={
+                'verbose_name': 'Kanaal',
+                'verbose_name_plural': 'Kanalen',
+            },
+        ),
+    ]
@@ -0,0 +1,286 @@
+"""
+Consuming notifications from an AMQP server.
+
+The `NotificationConsumer` receives notifications on a single connection and
+hands them to a pool of worker threads. Each message is acknowledged manually,
+once it's processed, so messages that were received but not processed (for
+example when the connection was lost) are delivered again by the broker. The
+number of unacknowledged messages, and thus the backlog of the worker pool, is
+bounded by the prefetch count.
+
+The consumer reads from a durable queue per exchange (see the
+`NOTIFICATIONS_AMQP_QUEUE` setting), so notifications wait in the queue while
+the consumer is down or reconnecting. An exclusive queue, that the broker
+removes together with its messages when the consumer disconnects, is only used
+when asked for. Durable queues keep their bindings, so the bindings that were
+bound before (see `QueueBinding`) but are no longer used are unbound when the
+consumer starts. This includes all bindings of queues that are no longer used,
+like the queues of a previous division in partitions, so these no longer fill
+up. Messages that are still in those queues are left there.
+
+To scale out, multiple consumer processes can consume from the same durable
+queues, each receiving a share of the messages. Alternatively, the binding keys
+can be divided over multiple consumer processes (see `partition_bindings`),
+each consuming from its own durable queue. Each process declares the queues of
+the other partitions as well, so no notifications are lost while the processes
+are (re)started one by one.
+"""
+import functools
+import json
+import logging
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+import pika
+from pika.exceptions import AMQPError
+
+from .models import QueueBinding
+
+logger = logging.getLogger(__name__)
+
+
+def connection_factory(host, port=None):
+    """
+    Returns a callable that opens a `BlockingConnection` to an AMQP server.
+    """
+    parameters = pika.ConnectionParameters(host=host, port=port or pika.ConnectionParameters.DEFAULT_PORT)
+    return functools.partial(pika.BlockingConnection, parameters)
+
+
+def partition_bindings(bindings, partitions, partition):
+    """
+    Returns the bindings for one partition. Each binding key is assigned to a
+    partition by its CRC32 checksum, so all processes agree on the division.
+    With fewer binding keys than partitions, some partitions are empty.
+
+    :param bindings: A `list` of `tuple`s with an exchange and a `list` of
+                     binding keys.
+    :param partitions: The total number of partitions.
+    :param partition: The partition, from 0 up to `partitions`.
+    :return: The bindings for `partition`, in the same format.
+    """
+    result = []
+    for exchange, binding_keys in bindings:
+        binding_keys = [
+            binding_key for binding_key in binding_keys
+            if zlib.crc32('{}:{}'.format(exchange, binding_key).encode('utf-8')) % partitions == partition
+        ]
+        if binding_keys:
+            result.append((exchange, binding_keys))
+    return result
+
+
+class NotificationConsumer:
+    """
+    Consumes notifications from one or more exchanges, and processes them with
+    `handler`.
+
+    :param connection_factory: A callable that returns a new (pika)
+                               `BlockingConnection`, or anything that behaves
+                               like it.
+    :param bindings: A `list` of `tuple`s with an exchange and a `list` of
+                     binding keys.
+    :param handler: An object with a `handle(message)` method.
+    :param workers: The maximum number of messages to process concurrently.
+                    Defaults to the `NOTIFICATIONS_AMQP_WORKERS` setting.
+    :param prefetch_count: The maximum number of unacknowledged messages.
+                           Defaults to the `NOTIFICATIONS_AMQP_PREFETCH_COUNT`
+                           setting.
+    :param queue_name: The name of the durable queue per exchange, formatted
+                       with `exchange`. Defaults to the
+                       `NOTIFICATIONS_AMQP_QUEUE` setting.
+    :param exclusive: Consume from an exclusive, server-named queue instead,
+                      that's removed when the consumer disconnects. Messages
+                      that weren't processed by then are lost.
+    :param other_queues: A `list` of `tuple`s with the name of a durable queue,
+                         formatted like `queue_name`, and its bindings, for the
+                         other consumers of this deployment (like the other
+                         partitions). These are declared and bound, but not
+                         consumed. All other recorded bindings are unbound.
+    :param backoff: The number of seconds to wait before reconnecting, doubled
+                    with every failed attempt up to `max_backoff`.
+    """
+
+    def __init__(self, connection_factory, bindings, handler, workers=None, prefetch_count=None, queue_name=None,
+                 exclusive=False, other_queues=None, backoff=1, max_backoff=60):
+        self.connection_factory = connection_factory
+        self.bindings = bindings
+        self.handler = handler
+        self.workers = workers or settings.NOTIFICATIONS_AMQP_WORKERS
+        self.prefetch_count = prefetch_count or settings.NOTIFICATIONS_AMQP_PREFETCH_COUNT
+        self.queue_name = queue_name or settings.NOTIFICATIONS_AMQP_QUEUE
+        self.exclusive = exclusive
+        self.other_queues = other_queues or []
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+
+        self._stopped = threading.Event()
+        self._connection = None
+        self._channel = None
+
+    def run(self):
+        """
+        Consumes notifications until `stop` is called (or the process is
+        interrupted). If the connection is lost, or can't be made, it
+        reconnects with an exponential backoff.
+        """
+        self._stopped.clear()
+        executor = ThreadPoolExecutor(max_workers=self.workers)
+        attempt = 0
+
+        try:
+            while not self._stopped.is_set():
+                try:
+                    self._connection = self.connection_factory()
+                except AMQPError as exc:
+                    delay = min(self.max_backoff, self.backoff * 2 ** attempt)
+                    attempt += 1
+                    logger.warning('Could not connect to the AMQP server (%s), retrying in %ss.', exc, delay)
+                    self._stopped.wait(delay)
+                    continue
+
+                attempt = 0
+                try:
+                    self._consume(executor)
+                except AMQPError as exc:
+                    logger.warning('Lost the connection to the AMQP server (%s), reconnecting.', exc)
+                except KeyboardInterrupt:
+                    self._stopped.set()
+                finally:
+                    self._close(executor)
+        finally:
+            executor.shutdown(wait=True)
+
+    def stop(self):
+        """
+        Stops consuming. Messages that are being processed are finished and
+        acknowledged first.
+        """
+        self._stopped.set()
+
+        connection, channel = self._connection, self._channel
+        if connection is not None and channel is not None:
+            try:
+                connection.add_callback_threadsafe(channel.stop_consuming)
+            except AMQPError:
+                pass
+
+    def _consume(self, executor):
+        self._channel = channel = self._connection.channel()
+        channel.basic_qos(prefetch_count=self.prefetch_count)
+
+        bound = set()
+        for exchange, binding_keys in self.bindings:
+            channel.exchange_declare(exchange=exchange, exchange_type='topic')
+
+            if self.exclusive:
+                # Create a (randomly named) queue just for me
+                result = channel.queue_declare(queue='', exclusive=True)
+            else:
+                # Messages wait in the queue while the consumer is down.
+                result = channel.queue_declare(queue=self.queue_name.format(exchange=exchange), durable=True)
+            queue_name = result.method.queue
+
+            for binding_key in binding_keys:
+                channel.queue_bind(exchange=exchange, queue=queue_name, routing_key=binding_key)
+                bound.add((queue_name, exchange, binding_key))
+
+            channel.basic_consume(
+                queue=queue_name,
+                on_message_callback=functools.partial(self._on_message, executor),
+            )
+
+        if not self.exclusive:
+            # Bind the queues of the other consumers, so their notifications
+            # are kept while they're down, for example after changing the
+            # partitions.
+            for queue_name, bindings in self.other_queues:
+                for exchange, binding_keys in bindings:
+                    queue = queue_name.format(exchange=exchange)
+                    channel.exchange_declare(exchange=exchange, exchange_type='topic')
+                    channel.queue_declare(queue=queue, durable=True)
+                    for binding_key in binding_keys:
+                        channel.queue_bind(exchange=exchange, queue=queue, routing_key=binding_key)
+                        bound.add((queue, exchange, binding_key))
+
+            self._unbind_stale(channel, bound)
+
+        if not self._stopped.is_set():
+            channel.start_consuming()
+
+    def _unbind_stale(self, channel, bound):
+        """
+        Unbinds the bindings that were bound before, but are no longer
+        configured or belong to a queue that's no longer used, and records the
+        bindings that are bound now.
+
+        :param channel: The channel to unbind on.
+        :param bound: A `set` of `tuple`s with the queue, exchange and binding
+                      key of every binding that is bound now.
+        """
+        close_old_connections()
+        with transaction.atomic():
+            for binding in QueueBinding.objects.select_for_update():
+                key = (binding.queue, binding.exchange, binding.binding_key)
+                if key in bound:
+                    continue
+
+                logger.info('Unbinding "%s" from queue "%s".', binding.binding_key, binding.queue)
+                # The exchange may no longer be configured, and unbinding from
+                # an exchange that doesn't exist closes the channel.
+                channel.exchange_declare(exchange=binding.exchange, exchange_type='topic')
+                channel.queue_unbind(queue=binding.queue, exchange=binding.exchange, routing_key=binding.binding_key)
+                binding.delete()
+
+            for queue, exchange, binding_key in bound:
+                QueueBinding.objects.get_or_create(queue=queue, exchange=exchange, binding_key=binding_key)
+
+    def _close(self, executor):
+        connection, self._connection, self._channel = self._connection, None, None
+
+        try:
+            if self._stopped.is_set():
+                # Finish the messages that are being processed, and send their
+                # acknowledgements.
+                executor.shutdown(wait=True)
+                connection.process_data_events(time_limit=0)
+            connection.close()
+        except AMQPError:
+            pass
+
+    def _on_message(self, executor, channel, method, properties, body):
+        executor.submit(self._process, self._connection, channel, method, body)
+
+    def _process(self, connection, channel, method, body):
+        try:
+            message = json.loads(body)
+        except ValueError:
+            logger.exception('Received an invalid notification with routing key "%s".', method.routing_key)
+            # Don't redeliver messages that can never be processed.
+            self._reply(connection, channel.basic_nack, method.delivery_tag, requeue=False)
+            return
+
+        close_old_connections()
+        try:
+            self.handler.handle(message)
+        except Exception:
+            logger.exception('Processing notification with routing key "%s" failed.', method.routing_key)
+            # Retry once, by redelivering the message.
+            self._reply(connection, channel.basic_nack, method.delivery_tag, requeue=not method.redelivered)
+        else:
+            self._reply(connection, channel.basic_ack, method.delivery_tag)
+        finally:
+            close_old_connections()
+
+    def _reply(self, connection, method, delivery_tag, **kwargs):
+        # Channels are not thread safe, acknowledgements are sent from the
+        # thread of the connection.
+        try:
+            connection.add_callback_threadsafe(functools.partial(method, delivery_tag=delivery_tag, **kwargs))
+        except AMQPError:
+            # The broker redelivers the message after reconnecting.
+            logger.warning('Could not acknowledge message %s, the connection is closed.', delivery_tag)
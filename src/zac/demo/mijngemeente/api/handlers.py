@@ -7,7 +7,7 @@ import isodate
 from zac.demo.models import SiteConfiguration, client
 from zac.demo.utils import get_uuid
 
-from ..models import UserNotification
+from ..models import QueuedNotification, UserNotification
 
 logger = logging.getLogger(__name__)
 
@@ -19,11 +19,80 @@ class StoreAndPublishHandler:
     websockets.
     """
 
+    # Notifications about the same main object are combined in the order of
+    # their resource.
+    resource_priority = ['zaak', 'status', 'zaakinformatieobject']
+
     def handle(self, message: dict) -> None:
-        # TODO: Add to queue, let a worker process the notifications, etc...
-        # For now, we process the incomming notification immediately and create
-        # a "user" notification synchronously with the incomming call.
-    
+        self.handle_many([message])
+
+    def handle_many(self, messages: list) -> None:
+        """
+        Combines notifications about the same main object (that arrived at
+        about the same time) in a single user notification. The main object is
+        retrieved only once.
+
+        The notifications that could be composed are stored, even if others
+        failed. The error of the first failed notification is raised after.
+        """
+        kwargs, failed = self.compose_many(messages)
+        if kwargs is not None:
+            UserNotification.create_and_notify(**kwargs)
+        if failed:
+            raise failed[min(failed)]
+
+    def compose_many(self, messages: list) -> tuple:
+        """
+        Returns the combined user notification for notifications about the same
+        main object, see `compose`. Each notification is composed on its own,
+        so a notification that fails doesn't affect the others.
+
+        :return: A `tuple` with the combined user notification (or `None`) and
+                 a `dict` with the exception by index in `messages` of the
+                 notifications that failed.
+        """
+        def priority(index):
+            try:
+                return self.resource_priority.index(messages[index]['resource'])
+            except ValueError:
+                return len(self.resource_priority)
+
+        fetched = {}
+        composed = []
+        failed = {}
+        for index in sorted(range(len(messages)), key=priority):
+            try:
+                kwargs = self.compose(messages[index], fetched)
+            except Exception as exc:
+                failed[index] = exc
+                continue
+            if kwargs is not None:
+                composed.append(kwargs)
+
+        if not composed:
+            return None, failed
+
+        kwargs = composed[0]
+        if len(composed) > 1:
+            kwargs['body'] = ' '.join(other['body'] for other in composed if other['body'])
+        return kwargs, failed
+
+    def _retrieve_zaak(self, main_object: str, fetched: dict) -> tuple:
+        if main_object not in fetched:
+            zaak = client('zrc').retrieve('zaak', url=main_object)
+            zaak_type = client('ztc', url=zaak['zaaktype']).retrieve('zaaktype', url=zaak['zaaktype'])
+            fetched[main_object] = (zaak, zaak_type)
+        return fetched[main_object]
+
+    def compose(self, message: dict, fetched: dict) -> dict:
+        """
+        Returns the user notification for a notification as keyword arguments
+        for `UserNotification.create_and_notify`, or `None` if the notification
+        should not be communicated.
+
+        :param message: The notification.
+        :param fetched: A `dict` to keep retrieved main objects in.
+        """
         channel = message['kanaal']
         main_object = message['hoofd_object']
         resource = message['resource']
@@ -39,11 +108,10 @@ class StoreAndPublishHandler:
         if channel == 'zaken' and action == 'create' and resource in ['zaak', 'status', 'zaakinformatieobject']:
             zrc_client = client('zrc')
     
-            zaak = zrc_client.retrieve('zaak', url=main_object)
+            zaak, zaak_type = self._retrieve_zaak(main_object, fetched)
             zaak_uuid = get_uuid(zaak['url'])
     
             ztc_client = client('ztc', url=zaak['zaaktype'])
-            zaak_type = ztc_client.retrieve('zaaktype', url=zaak['zaaktype'])
     
             msg_reference = zaak['identificatie']
             msg_url = reverse('demo:zaakbeheer-detail', kwargs={'uuid': zaak_uuid})
@@ -78,14 +146,14 @@ class StoreAndPublishHandler:
                 # already notified the creation of Zaak.
                 config = SiteConfiguration.get_solo()
                 if status['statustype'].endswith(config.ztc_mor_statustype_new_uuid):
-                    return
+                    return None
 
                 status_type = ztc_client.retrieve('statustype', url=status['statustype'])
 
                 # TODO: Attribute "informeren" is not part of the ZTC API yet...
                 if not status_type.get('informeren', True):
                     logger.info('Statustype should not be communicated to initiator.')
-                    return
+                    return None
 
                 msg_title = 'Zaak <strong>{}</strong> gewijzigd.'.format(zaak_type['onderwerp'])
                 msg_body = 'De status van uw zaak is gewijzigd naar: <strong>{}</strong>. <strong>{}</strong> ' \
@@ -100,11 +168,13 @@ class StoreAndPublishHandler:
             # Funny thing is that we don't need a subscription on the DRC for
             # this. The relation is also created on the ZRC-side.
             elif resource == 'zaakinformatieobject':
-                # TODO: Does this work? I don't see a "read" URL for a relation...
-    
-                drc_client = client('drc', url=resource_url)
-                informatieobject = drc_client.retrieve('enkelvoudiginformatieobject', url=resource_url)
-                informatieobjecttype = ztc_client.retrieve(informatieobject['informatieobjecttype'])
+                zaakinformatieobject = zrc_client.retrieve('zaakinformatieobject', url=resource_url)
+
+                drc_client = client('drc', url=zaakinformatieobject['informatieobject'])
+                informatieobject = drc_client.retrieve(
+                    'enkelvoudiginformatieobject', url=zaakinformatieobject['informatieobject'])
+                informatieobjecttype = ztc_client.retrieve(
+                    'informatieobjecttype', url=informatieobject['informatieobjecttype'])
     
                 msg_title = 'Zaak {} gewijzigd.'.format(zaak_type['onderwerp'])
                 msg_body = 'Er is een {} toegevoegd aan uw zaak met de titel "{}".'.format(
@@ -153,15 +223,25 @@ class StoreAndPublishHandler:
             msg_reference = f'{channel_text.upper()}-{short_uuid}'
             msg_url = resource_url or main_object  # For debugging, the URL to the object in the API.
     
-        # Create message locally.
-        kwargs = {
+        return {
             'title': msg_title,
             'body': msg_body,
             'reference': msg_reference,
             'url': msg_url,
         }
-    
-        UserNotification.create_and_notify(**kwargs)
 
 
-default = StoreAndPublishHandler()
+class QueueHandler:
+    """
+    Stores the notification in the queue and returns immediately. The queue is
+    processed by the `process_notifications` management command, with the
+    `StoreAndPublishHandler`.
+    """
+
+    def handle(self, message: dict) -> None:
+        QueuedNotification.enqueue(message)
+
+
+store_and_publish = StoreAndPublishHandler()
+
+default = QueueHandler()
@@ -0,0 +1,84 @@
+"""
+Archiving of read user notifications.
+
+Read notifications stay in the inbox for `NOTIFICATIONS_ARCHIVE_AFTER_DAYS`
+days. After that, they are moved to the `ArchivedUserNotification` table in
+batches, to keep the inbox queries fast. Run `archive_notifications` regularly
+(for example daily, from cron) to do so.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import ArchivedUserNotification, UserNotification
+
+logger = logging.getLogger(__name__)
+
+
+def archive_batch(before, batch_size):
+    """
+    Moves one batch of read notifications, created before `before`, to the
+    archive.
+
+    :param before: A `datetime`.
+    :param batch_size: The maximum number of notifications to move.
+    :return: The number of archived notifications.
+    """
+    now = timezone.now()
+
+    with transaction.atomic():
+        notifications = list(
+            UserNotification.objects
+            .select_for_update(skip_locked=True)
+            .filter(read=True, created__lt=before)
+            .order_by('created')[:batch_size]
+        )
+        if not notifications:
+            return 0
+
+        ArchivedUserNotification.objects.bulk_create([
+            ArchivedUserNotification(
+                topic=notification.topic,
+                title=notification.title,
+                body=notification.body,
+                reference=notification.reference,
+                url=notification.url,
+                created=notification.created,
+                archived=now,
+            ) for notification in notifications
+        ])
+        UserNotification.objects.filter(pk__in=[notification.pk for notification in notifications]).delete()
+
+    return len(notifications)
+
+
+def archive_notifications(days=None, batch_size=None):
+    """
+    Moves all read notifications that are older than `days` to the archive.
+
+    :param days: The minimum age in days. Defaults to the
+                 `NOTIFICATIONS_ARCHIVE_AFTER_DAYS` setting.
+    :param batch_size: The number of notifications to move per transaction.
+                       Defaults to the `NOTIFICATIONS_ARCHIVE_BATCH_SIZE`
+                       setting.
+    :return: The number of archived notifications.
+    """
+    if days is None:
+        days = settings.NOTIFICATIONS_ARCHIVE_AFTER_DAYS
+    if batch_size is None:
+        batch_size = settings.NOTIFICATIONS_ARCHIVE_BATCH_SIZE
+
+    before = timezone.now() - timedelta(days=days)
+
+    total = 0
+    while True:
+        archived = archive_batch(before, batch_size)
+        if not archived:
+            break
+        total += archived
+
+    logger.info('Archived %s notification(s) older than %s days.', total, days)
+    return total
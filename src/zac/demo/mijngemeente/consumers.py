@@ -1,40 +1,104 @@
 import json
+from urllib.parse import parse_qs
 
-from asgiref.sync import async_to_sync
-from channels.generic.websocket import WebsocketConsumer
+from django.conf import settings
 
+from channels.db import database_sync_to_async
+from channels.generic.websocket import AsyncWebsocketConsumer
 
-class UserNotificationConsumer(WebsocketConsumer):
-    def connect(self):
+from .models import UserNotification
+
+
+@database_sync_to_async
+def get_missed_messages(topic, since):
+    """
+    Returns the notifications for `topic` that were created after the
+    notification with ID `since`, in the order they were created.
+
+    :return: A `tuple` with a `list` of messages, and whether more
+             notifications were missed than the `NOTIFICATIONS_REPLAY_LIMIT`
+             setting allows. In that case, no messages are returned.
+    """
+    limit = settings.NOTIFICATIONS_REPLAY_LIMIT
+    notifications = list(
+        UserNotification.objects
+        .filter(topic=topic, pk__gt=since)
+        .order_by('created', 'pk')[:limit + 1]
+    )
+    if len(notifications) > limit:
+        return [], True
+    return [notification.as_message() for notification in notifications], False
+
+
+class UserNotificationConsumer(AsyncWebsocketConsumer):
+    """
+    Relays user notifications to the WebSocket.
+
+    The consumer is asynchronous, so open WebSockets don't each occupy a
+    thread.
+
+    A client that reconnects passes the ID of the last notification it
+    received as `?since=<id>`, and gets the notifications it missed first. If
+    it missed more than can be replayed, it gets a `reload` message instead,
+    to reload the inbox.
+    """
+
+    async def connect(self):
         username = self.scope['url_route']['kwargs']['username']
 
         # Topic
         self.group_name = 'notifications_%s' % username
 
         # Join group
-        async_to_sync(self.channel_layer.group_add)(
+        await self.channel_layer.group_add(
             self.group_name,
             self.channel_name
         )
 
-        self.accept()
+        await self.accept()
+
+        since = self.get_since()
+        if since is not None:
+            messages, truncated = await get_missed_messages(self.group_name, since)
+            if truncated:
+                await self.send(text_data=json.dumps({
+                    'reload': True
+                }))
+            for message in messages:
+                await self.send(text_data=json.dumps({
+                    'message': message
+                }))
 
-    def disconnect(self, close_code):
+    def get_since(self):
+        query = parse_qs(self.scope.get('query_string', b'').decode())
+        try:
+            return int(query['since'][0])
+        except (KeyError, ValueError):
+            return None
+
+    async def disconnect(self, close_code):
         # Leave group
-        async_to_sync(self.channel_layer.group_discard)(
+        await self.channel_layer.group_discard(
             self.group_name,
             self.channel_name
         )
 
     # Receive message from WebSocket
-    def receive(self, text_data):
-        raise NotImplemented()
+    async def receive(self, text_data=None, bytes_data=None):
+        raise NotImplementedError()
 
     # Send a message to the WebSocket
-    def notification_message(self, event):
+    async def notification_message(self, event):
         message = event['message']
 
         # Send message to WebSocket
-        self.send(text_data=json.dumps({
+        await self.send(text_data=json.dumps({
             'message': message
         }))
+
+    # Send a batch of messages to the WebSocket
+    async def notification_messages(self, event):
+        for message in event['messages']:
+            await self.send(text_data=json.dumps({
+                'message': message
+            }))
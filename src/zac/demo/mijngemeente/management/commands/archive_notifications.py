@@ -0,0 +1,31 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from zac.demo.mijngemeente.archive import archive_notifications
+
+
+class Command(BaseCommand):
+    """
+    Example:
+
+        $ ./manage.py archive_notifications --days 30
+    """
+    help = 'Move read notifications to the archive.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=settings.NOTIFICATIONS_ARCHIVE_AFTER_DAYS,
+            help='Het aantal dagen dat gelezen notificaties bewaard blijven.'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.NOTIFICATIONS_ARCHIVE_BATCH_SIZE,
+            help='Het aantal notificaties dat per transactie gearchiveerd wordt.'
+        )
+
+    def handle(self, *args, **options):
+        archived = archive_notifications(days=options['days'], batch_size=options['batch_size'])
+        self.stdout.write(f'Archived {archived} notification(s).')
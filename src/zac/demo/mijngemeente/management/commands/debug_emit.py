@@ -1,5 +1,9 @@
 import datetime
 import json
+import random
+import time
+import uuid
+from collections import Counter
 
 from django.core.management.base import BaseCommand, CommandError
 
@@ -7,22 +11,79 @@ import pika
 
 from zac.demo.models import SiteConfiguration
 
+# The resources of the ZRC with the (relative) URL of a resource of that type,
+# for the notifications that are generated.
+RESOURCES = {
+    'zaak': 'zaken/{zaak}',
+    'status': 'statussen/{uuid}',
+    'zaakinformatieobject': 'zaakinformatieobjecten/{uuid}',
+    'resultaat': 'resultaten/{uuid}',
+}
+
+
+def parse_weighted(values):
+    """
+    Parses values with an optional weight, like "zaken.create:3".
+
+    :param values: A `list` of `string`s.
+    :return: A `tuple` with a `list` of values and a `list` of their weights.
+    """
+    choices, weights = [], []
+    for value in values:
+        choice, _, weight = value.rpartition(':')
+        if not choice or not weight.isdigit():
+            choice, weight = value, '1'
+        choices.append(choice)
+        weights.append(int(weight))
+    return choices, weights
+
+
+def random_uuid(rng):
+    """
+    Returns a random (version 4) UUID from `rng`, so the UUIDs are the same
+    for the same seed.
+    """
+    return uuid.UUID(int=rng.getrandbits(128), version=4)
+
+
+def build_message(exchange, zrc_base_url, zaak, resource, kenmerken, rng=random):
+    """
+    Returns a notification like the ZRC sends when `resource` of the zaak with
+    UUID `zaak` is created. The UUID of the resource is generated with `rng`.
+    """
+    base_url = zrc_base_url.rstrip('/')
+    return {
+        'kanaal': exchange,
+        'hoofd_object': '{}/zaken/{}'.format(base_url, zaak),
+        'resource': resource,
+        'resource_url': '{}/{}'.format(base_url, RESOURCES[resource].format(zaak=zaak, uuid=random_uuid(rng))),
+        'actie': 'create',
+        'aanmaakdatum': datetime.datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%SZ'),
+        'kenmerken': kenmerken,
+    }
+
 
 class Command(BaseCommand):
     """
     Example:
 
         $ ./manage.py debug_emit --kenmerk=foo.bar.test "test message"
+
+    Or, to generate load, send 10000 notifications about 500 zaken at 200
+    notifications per second:
+
+        $ ./manage.py debug_emit --count 10000 --rate 200 --zaken 500 \\
+            --kenmerk foo.bar:3 --kenmerk foo.baz:1 --resource zaak --resource status:4
     """
-    help = 'Sends a notification to an AMQP server.'
+    help = 'Sends one or more notifications to an AMQP server.'
 
     def add_arguments(self, parser):
         parser.add_argument(
             '--kenmerk',
-            action='store',
-            dest='routing_key',
-            default='foo.bar',
-            help='Filters om het op een bepaalde queue te plaatsen.',
+            action='append',
+            dest='routing_keys',
+            help='Filters om het op een bepaalde queue te plaatsen. Herhaal de optie om berichten te verdelen over '
+                 'meerdere kenmerken, eventueel met een gewicht: "foo.bar:3".',
         )
         parser.add_argument(
             '--kanaal',
@@ -31,23 +92,76 @@ class Command(BaseCommand):
             default='zaken',
             help='Kanaal of exchange om mee te verbinden.',
         )
+        parser.add_argument(
+            '--count',
+            type=int,
+            default=1,
+            help='Het aantal berichten dat verstuurd wordt.'
+        )
+        parser.add_argument(
+            '--rate',
+            type=float,
+            default=0,
+            help='Het aantal berichten per seconde. Standaard worden de berichten zo snel mogelijk verstuurd.'
+        )
+        parser.add_argument(
+            '--resource',
+            action='append',
+            dest='resources',
+            help='Het soort resource ({}) waarover een bericht wordt gegenereerd, eventueel met een gewicht: '
+                 '"status:4".'.format(', '.join(RESOURCES)),
+        )
+        parser.add_argument(
+            '--zaken',
+            type=int,
+            default=0,
+            help='Het aantal verschillende zaken waarover berichten worden gegenereerd. Standaard gaat ieder bericht '
+                 'over een andere zaak.'
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            help='Startwaarde van de willekeurige verdeling, om een reeks berichten te herhalen.'
+        )
+        parser.add_argument(
+            '--confirm',
+            action='store_true',
+            help='Wacht op een bevestiging van de AMQP-server voor ieder bericht.'
+        )
         parser.add_argument(
             'message',
-            nargs=1,
+            nargs='?',
             type=str,
-            help='Het bericht dat moet worden verstuurd.'
+            help='Het bericht dat moet worden verstuurd. Zonder bericht wordt een notificatie van het ZRC '
+                 'gegenereerd.'
         )
 
     def handle(self, *args, **options):
-        nc_routing_key = options.get('routing_key')
+        count = options['count']
+        rate = options['rate']
+        if count < 1:
+            raise CommandError('The count should be at least 1.')
+        if rate < 0:
+            raise CommandError('The rate can not be negative.')
+
+        routing_keys, routing_key_weights = parse_weighted(options['routing_keys'] or ['foo.bar'])
+        resources, resource_weights = parse_weighted(options['resources'] or ['zaak'])
+        unknown = set(resources) - set(RESOURCES)
+        if unknown:
+            raise CommandError('Unknown resource(s): {}.'.format(', '.join(sorted(unknown))))
 
         # Grab configuration
         config = SiteConfiguration.get_solo()
-        nc_host = 'localhost'  # config.nc_host
-        nc_port = 5672  # config.nc_port
+        nc_host = config.nc_amqp_host or 'localhost'
+        nc_port = int(config.nc_amqp_port) if config.nc_amqp_port else 5672
         nc_exchange = options.get('exchange')
 
-        message = options.get('message')[0]
+        rng = random.Random(options['seed'])
+        zaken = [random_uuid(rng) for _ in range(options['zaken'])]
+        kenmerken = {
+            'bronorganisatie': config.zrc_bronorganisatie,
+            'vertrouwelijkheidaanduiding': 'openbaar',
+        }
 
         # Set up connection and channel
         connection = pika.BlockingConnection(pika.ConnectionParameters(host=nc_host, port=nc_port))
@@ -59,11 +173,45 @@ class Command(BaseCommand):
             exchange_type='topic'
         )
 
-        channel.basic_publish(exchange=nc_exchange,
-                              routing_key=nc_routing_key,
-                              body=message)
+        if options['confirm']:
+            channel.confirm_delivery()
+
+        sent = Counter()
+        start = time.monotonic()
+        try:
+            for i in range(count):
+                if rate:
+                    # Send on schedule, so the rate doesn't drift when
+                    # publishing is slow.
+                    delay = start + i / rate - time.monotonic()
+                    if delay > 0:
+                        time.sleep(delay)
+
+                nc_routing_key = rng.choices(routing_keys, routing_key_weights)[0]
+                message = options.get('message')
+                if message is None:
+                    zaak = rng.choice(zaken) if zaken else random_uuid(rng)
+                    resource = rng.choices(resources, resource_weights)[0]
+                    message = json.dumps(
+                        build_message(nc_exchange, config.zrc_base_url, zaak, resource, kenmerken, rng))
+
+                channel.basic_publish(exchange=nc_exchange,
+                                      routing_key=nc_routing_key,
+                                      body=message)
+                sent[nc_routing_key] += 1
 
-        now = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%I')
-        self.stdout.write(f'[{now}] Verstuurd met kenmerk "{nc_routing_key}": {message}')
+                if count == 1 or options['verbosity'] > 1:
+                    now = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%I')
+                    self.stdout.write(f'[{now}] Verstuurd met kenmerk "{nc_routing_key}": {message}')
+        except KeyboardInterrupt:
+            pass
+        finally:
+            elapsed = time.monotonic() - start
+            connection.close()
 
-        connection.close()
+        if count > 1:
+            total = sum(sent.values())
+            throughput = total / elapsed if elapsed else 0
+            self.stdout.write(f'Verstuurd: {total} bericht(en) in {elapsed:.2f}s ({throughput:.1f} berichten/s).')
+            for routing_key, number in sent.most_common():
+                self.stdout.write(f'  {routing_key}: {number}')
@@ -41,9 +41,9 @@ class Command(BaseCommand):
 
         # Grab configuration
         config = SiteConfiguration.get_solo()
-        nc_host = 'localhost'  # config.nc_host
-        nc_port = 5672  # config.nc_port
-        nc_exchange = 'zaken'  # config.nc_exchange
+        nc_host = config.nc_amqp_host or 'localhost'
+        nc_port = int(config.nc_amqp_port) if config.nc_amqp_port else 5672
+        nc_exchange = 'zaken'
 
         # Set up connection and channel
         connection = pika.BlockingConnection(pika.ConnectionParameters(host=nc_host, port=nc_port))
@@ -56,7 +56,7 @@ class Command(BaseCommand):
         )
 
         # Create a (randomly named) queue just for me
-        result = channel.queue_declare(exclusive=True)
+        result = channel.queue_declare(queue='', exclusive=True)
         queue_name = result.method.queue
 
         for binding_key in binding_keys:
@@ -78,9 +78,9 @@ class Command(BaseCommand):
             self.stdout.write(f'[{now}] Ontvangen met kenmerk "{method.routing_key}": {body}')
 
         channel.basic_consume(
-            callback,
             queue=queue_name,
-            no_ack=True
+            on_message_callback=callback,
+            auto_ack=True
         )
 
         try:
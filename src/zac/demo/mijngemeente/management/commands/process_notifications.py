@@ -0,0 +1,61 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from zac.demo.mijngemeente.api.handlers import store_and_publish
+from zac.demo.mijngemeente.queue import process_queue
+
+
+class Command(BaseCommand):
+    """
+    Example:
+
+        $ ./manage.py process_notifications --workers 8
+    """
+    help = 'Start a worker that processes the queue of notifications received via the webhook.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=settings.NOTIFICATIONS_QUEUE_WORKERS,
+            help='Het maximaal aantal notificaties dat tegelijk verwerkt wordt.'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.NOTIFICATIONS_QUEUE_BATCH_SIZE,
+            help='Het maximaal aantal notificaties dat in een keer uit de wachtrij wordt gehaald.'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=1.0,
+            help='Het aantal seconden tussen het controleren van een lege wachtrij.'
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Verwerk de wachtrij tot deze leeg is en stop dan.'
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(f'Processing notifications with {options["workers"]} workers.')
+        self.stdout.write(f'Quit with CTRL-BREAK.')
+
+        try:
+            while True:
+                handled, failed = process_queue(
+                    store_and_publish,
+                    batch_size=options['batch_size'],
+                    max_workers=options['workers']
+                )
+                if handled or failed:
+                    self.stdout.write(f'Processed {handled} notification(s), {failed} failed.')
+                elif options['once']:
+                    return
+                else:
+                    time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            return
@@ -1,19 +1,61 @@
-import datetime
-
+from django.conf import settings
 from django.core.management.base import BaseCommand, CommandError
 
-import pika
-
-from zac.demo.models import NotifyMethod, SiteConfiguration
+from zac.demo.mijngemeente.amqp import (
+    NotificationConsumer, connection_factory, partition_bindings
+)
+from zac.demo.mijngemeente.api.handlers import store_and_publish
+from zac.demo.models import SiteConfiguration
 
 
 class Command(BaseCommand):
     """
     Example:
 
-        $ ./manage.py runconsumer'
+        $ ./manage.py runconsumer --workers 8'
+
+    Multiple processes without partitions consume from the same durable queues,
+    and share the notifications. To divide the configured filters over 3
+    processes instead, start each of them with its own partition:
+
+        $ ./manage.py runconsumer --partitions 3 --partition 0
+
+    Every partition needs at least one filter, otherwise none of the processes
+    start.
     """
-    help = 'Start consumer that connects to an AMQP server to listen for notifications.'
+    help = 'Start consumer that connects to an AMQP server to process notifications.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=settings.NOTIFICATIONS_AMQP_WORKERS,
+            help='Het maximaal aantal notificaties dat tegelijk verwerkt wordt.'
+        )
+        parser.add_argument(
+            '--prefetch',
+            type=int,
+            default=settings.NOTIFICATIONS_AMQP_PREFETCH_COUNT,
+            help='Het maximaal aantal ontvangen notificaties dat nog niet verwerkt is.'
+        )
+        parser.add_argument(
+            '--partitions',
+            type=int,
+            default=1,
+            help='Het aantal processen waarover de filters verdeeld worden.'
+        )
+        parser.add_argument(
+            '--partition',
+            type=int,
+            default=0,
+            help='Het deel van de filters (vanaf 0) dat dit proces ontvangt.'
+        )
+        parser.add_argument(
+            '--exclusive',
+            action='store_true',
+            help='Gebruik een tijdelijke queue die verwijderd wordt als de consumer stopt. Berichten die dan nog niet '
+                 'verwerkt zijn gaan verloren.'
+        )
 
     def handle(self, *args, **options):
         # Reading guide:
@@ -29,55 +71,60 @@ class Command(BaseCommand):
         config = SiteConfiguration.get_solo()
 
         nc_host = config.nc_amqp_host
-        nc_port = int(config.nc_amqp_port) if config.nc_amqp_port else pika.ConnectionParameters._DEFAULT
+        nc_port = int(config.nc_amqp_port) if config.nc_amqp_port else None
 
         exchanges_binding_keys = config.get_nc_channels_and_filters()
 
         if len(exchanges_binding_keys) == 0:
             raise CommandError('No exchange(s) configured.')
 
-        # Set up connection and channel
-        connection = pika.BlockingConnection(pika.ConnectionParameters(host=nc_host, port=nc_port))
-        channel = connection.channel()
-
-        # Start listening...
-        self.stdout.write(f'Starting consumer connected to amqp://{nc_host}:{connection._impl.params.port}')
+        partitions, partition = options['partitions'], options['partition']
+        queue_name = None
+        other_queues = []
+        if partitions > 1:
+            if not 0 <= partition < partitions:
+                raise CommandError(f'The partition should be from 0 up to {partitions}.')
+
+            # Check all partitions, so a division that leaves some partitions
+            # without filters is refused by every process.
+            empty = [
+                str(other) for other in range(partitions)
+                if not partition_bindings(exchanges_binding_keys, partitions, other)
+            ]
+            if empty:
+                raise CommandError(
+                    f'No filters in partition(s) {", ".join(empty)} of {partitions}. Use fewer partitions, or start '
+                    f'multiple consumers without partitions to share the notifications of the same queues.'
+                )
 
-        for nc_exchange, binding_keys in exchanges_binding_keys:
-            # Make sure we attach to the correct exchange.
-            channel.exchange_declare(
-                exchange=nc_exchange,
-                exchange_type='topic'
-            )
-
-            # Create a (randomly named) queue just for me
-            result = channel.queue_declare(exclusive=True)
-            queue_name = result.method.queue
-
-            for binding_key in binding_keys:
-                channel.queue_bind(
-                    exchange=nc_exchange,
-                    queue=queue_name,
-                    routing_key=binding_key
+            # Each partition has its own durable queue. The queues of the other
+            # partitions are bound as well, and all other queues are unbound.
+            queue_name = f'{settings.NOTIFICATIONS_AMQP_QUEUE}.{partition}-{partitions}'
+            other_queues = [
+                (
+                    f'{settings.NOTIFICATIONS_AMQP_QUEUE}.{other}-{partitions}',
+                    partition_bindings(exchanges_binding_keys, partitions, other)
                 )
+                for other in range(partitions) if other != partition
+            ]
+            exchanges_binding_keys = partition_bindings(exchanges_binding_keys, partitions, partition)
+
+        consumer = NotificationConsumer(
+            connection_factory(nc_host, nc_port),
+            exchanges_binding_keys,
+            store_and_publish,
+            workers=options['workers'],
+            prefetch_count=options['prefetch'],
+            queue_name=queue_name,
+            exclusive=options['exclusive'],
+            other_queues=other_queues,
+        )
 
+        # Start listening...
+        self.stdout.write(f'Starting consumer connected to amqp://{nc_host}:{nc_port or 5672}')
+        for nc_exchange, binding_keys in exchanges_binding_keys:
             filters = ', '.join(binding_keys)
             self.stdout.write(f'Listening on exchange "{nc_exchange}" with topic: {filters}')
-
-            # Define callback to be triggered when a notification is received.
-            def callback(ch, method, properties, body):
-                now = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%I')
-                self.stdout.write(f'[{now}] Ontvangen op "{nc_exchange}" met kenmerk "{method.routing_key}": {body}')
-
-            channel.basic_consume(
-                callback,
-                queue=queue_name,
-                no_ack=True
-            )
-
         self.stdout.write(f'Quit with CTRL-BREAK.')
 
-        try:
-            channel.start_consuming()
-        except KeyboardInterrupt:
-            return
+        consumer.run()
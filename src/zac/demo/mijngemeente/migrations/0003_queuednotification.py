@@ -0,0 +1,31 @@
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mijngemeente', '0002_auto_20190312_1819'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QueuedNotification',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('message', models.TextField()),
+                ('status', models.CharField(choices=[('pending', 'In de wachtrij'), ('processing', 'In behandeling'), ('failed', 'Mislukt')], default='pending', max_length=20)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('next_attempt', models.DateTimeField(default=django.utils.timezone.now)),
+                ('error', models.TextField(blank=True)),
+                ('created', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'ordering': ('created',),
+            },
+        ),
+        migrations.AddIndex(
+            model_name='queuednotification',
+            index=models.Index(fields=['status', 'next_attempt'], name='mijngemeent_status_85b658_idx'),
+        ),
+    ]
@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mijngemeente', '0003_queuednotification'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='queuednotification',
+            name='hoofd_object',
+            field=models.URLField(blank=True, db_index=True, max_length=1000),
+        ),
+    ]
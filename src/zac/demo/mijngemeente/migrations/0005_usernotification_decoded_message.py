@@ -0,0 +1,59 @@
+import json
+
+from django.db import migrations, models
+
+
+def decode_messages(apps, schema_editor):
+    UserNotification = apps.get_model('mijngemeente', 'UserNotification')
+
+    for notification in UserNotification.objects.exclude(message='').iterator():
+        try:
+            data = json.loads(notification.message)
+        except ValueError:
+            continue
+
+        UserNotification.objects.filter(pk=notification.pk).update(
+            title=data.get('title') or '',
+            body=data.get('body') or '',
+            reference=data.get('reference') or '',
+            url=data.get('url') or '',
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mijngemeente', '0004_queuednotification_hoofd_object'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='usernotification',
+            name='body',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='usernotification',
+            name='reference',
+            field=models.CharField(blank=True, max_length=200),
+        ),
+        migrations.AddField(
+            model_name='usernotification',
+            name='title',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='usernotification',
+            name='url',
+            field=models.CharField(blank=True, max_length=1000),
+        ),
+        migrations.AddIndex(
+            model_name='usernotification',
+            index=models.Index(fields=['topic', '-created'], name='mijngemeent_topic_ad89e0_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='usernotification',
+            index=models.Index(fields=['read', 'created'], name='mijngemeent_read_aee8ca_idx'),
+        ),
+        migrations.RunPython(decode_messages, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mijngemeente', '0005_usernotification_decoded_message'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedUserNotification',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('topic', models.CharField(max_length=200)),
+                ('title', models.TextField(blank=True)),
+                ('body', models.TextField(blank=True)),
+                ('reference', models.CharField(blank=True, max_length=200)),
+                ('url', models.CharField(blank=True, max_length=1000)),
+                ('created', models.DateTimeField()),
+                ('archived', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'ordering': ('-created',),
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mijngemeente', '0006_archivedusernotification'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QueueBinding',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('queue', models.CharField(max_length=200)),
+                ('exchange', models.CharField(max_length=200)),
+                ('binding_key', models.CharField(max_length=200)),
+            ],
+            options={
+                'unique_together': {('queue', 'exchange', 'binding_key')},
+            },
+        ),
+    ]
@@ -1,12 +1,76 @@
 import datetime
 import json
+import logging
+from collections import OrderedDict
 
-from django.db import models
+from django.conf import settings
+from django.db import models, transaction
 from django.utils import timezone
 from django.utils.safestring import mark_safe
+from django.utils.translation import ugettext_lazy as _
 
 from asgiref.sync import async_to_sync
 from channels.layers import get_channel_layer
+from djchoices import ChoiceItem, DjangoChoices
+
+logger = logging.getLogger(__name__)
+
+
+class QueueStatus(DjangoChoices):
+    pending = ChoiceItem('pending', _('In de wachtrij'))
+    processing = ChoiceItem('processing', _('In behandeling'))
+    failed = ChoiceItem('failed', _('Mislukt'))
+
+
+class QueuedNotification(models.Model):
+    """
+    A notification from the NRC that still needs to be processed, see
+    `zac.demo.mijngemeente.queue`. Processed notifications are removed from
+    the queue.
+    """
+    message = models.TextField()
+    hoofd_object = models.URLField(max_length=1000, blank=True, db_index=True)
+
+    status = models.CharField(max_length=20, choices=QueueStatus.choices, default=QueueStatus.pending)
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt = models.DateTimeField(default=timezone.now)
+    error = models.TextField(blank=True)
+
+    created = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ('created', )
+        indexes = [
+            models.Index(fields=['status', 'next_attempt']),
+        ]
+
+    def json(self):
+        return json.loads(self.message)
+
+    @classmethod
+    def enqueue(cls, message):
+        """
+        Add a notification to the queue.
+
+        The notification is processed after the coalescing window
+        (`NOTIFICATIONS_COALESCE_WINDOW`) has passed, together with all other
+        notifications about the same main object that arrived in the meantime.
+
+        :param message: The notification as `dict`.
+        :return: The `QueuedNotification`.
+        """
+        now = timezone.now()
+        return cls.objects.create(
+            message=json.dumps(message),
+            hoofd_object=message.get('hoofd_object') or '',
+            created=now,
+            next_attempt=now + datetime.timedelta(milliseconds=settings.NOTIFICATIONS_COALESCE_WINDOW),
+        )
+
+
+# Typically, the logged in user in the Mijn Gemeente app, but for now we just
+# show for everyone.
+DEFAULT_TOPIC = 'notifications_everyone'
 
 
 class UserNotification(models.Model):
@@ -14,15 +78,61 @@ class UserNotification(models.Model):
     topic = models.CharField(max_length=200)
     message = models.TextField(blank=True)
 
+    # The decoded message, to show it without decoding the JSON.
+    title = models.TextField(blank=True)
+    body = models.TextField(blank=True)
+    reference = models.CharField(max_length=200, blank=True)
+    url = models.CharField(max_length=1000, blank=True)
+
     read = models.BooleanField(default=False)
     created = models.DateTimeField(default=timezone.now)
 
     class Meta:
         ordering = ('-created', )
+        indexes = [
+            # The inbox.
+            models.Index(fields=['topic', '-created']),
+            # The read notifications to archive.
+            models.Index(fields=['read', 'created']),
+        ]
 
     def json(self):
         return json.loads(self.message)
 
+    def as_message(self):
+        """
+        Returns the notification as it's relayed via websocket.
+        """
+        return {
+            'id': self.pk,
+            'title': self.title,
+            'date': timezone.localtime(self.created).strftime('%Y-%m-%d %H:%M'),
+            'body': self.body,
+            'reference': self.reference,
+            'url': self.url,
+        }
+
+    @classmethod
+    def _from_data(cls, topic, data):
+        return cls(
+            topic=topic,
+            message=json.dumps(data),
+            title=data['title'],
+            body=data['body'] or '',
+            reference=data['reference'] or '',
+            url=data['url'] or '',
+        )
+
+    @staticmethod
+    def _message_data(title, body, reference, url):
+        return {
+            'title': mark_safe(title),
+            'date': datetime.datetime.now().strftime('%Y-%m-%d %H:%M'),
+            'body': mark_safe(body),
+            'reference': reference,
+            'url': url,
+        }
+
     @classmethod
     def create_and_notify(cls, title, body, reference, url, topic=None):
         """
@@ -36,32 +146,104 @@ class UserNotification(models.Model):
         :return:
         """
 
-        # Typically, the logged in user in the Mijn Gemeente app, but for now we
-        # just show for everyone.
         if topic is None:
-            topic = 'notifications_everyone'
+            topic = DEFAULT_TOPIC
 
-        data = {
-            'title': mark_safe(title),
-            'date': datetime.datetime.now().strftime('%Y-%m-%d %H:%M'),
-            'body': mark_safe(body),
-            'reference': reference,
-            'url': url,
-        }
+        data = cls._message_data(title, body, reference, url)
 
         # No daemon needed for this, since it's an event that happens in our own
         # application. Ofcourse, when we want to store notifications from the
         # Notification Component, we need a daemonish thingy.
-        cls.objects.create(
-            topic=topic,
-            message=json.dumps(data)
-        )
+        notification = cls._from_data(topic, data)
+        notification.save()
 
         channel_layer = get_channel_layer()
         async_to_sync(channel_layer.group_send)(
             topic,
             {
                 'type': 'notification_message',
-                'message': data
+                'message': notification.as_message()
             }
         )
+
+    @classmethod
+    def bulk_create_and_notify(cls, notifications):
+        """
+        Create many notification instances at once and relay them via
+        websocket, with one message per topic.
+
+        The websocket messages are sent when the current transaction is
+        committed. Failing to send them is logged, the notifications are
+        stored anyway.
+
+        :param notifications: An iterable of `dict`s with the keyword arguments
+                              of `create_and_notify`.
+        :return: A `list` of the created `UserNotification`s.
+        """
+        instances = []
+        for notification in notifications:
+            notification = dict(notification)
+            topic = notification.pop('topic', None)
+            if topic is None:
+                topic = DEFAULT_TOPIC
+
+            instances.append(cls._from_data(topic, cls._message_data(**notification)))
+
+        if not instances:
+            return []
+
+        instances = cls.objects.bulk_create(instances)
+
+        messages_per_topic = OrderedDict()
+        for instance in instances:
+            messages_per_topic.setdefault(instance.topic, []).append(instance.as_message())
+
+        def notify():
+            channel_layer = get_channel_layer()
+            for topic, messages in messages_per_topic.items():
+                try:
+                    async_to_sync(channel_layer.group_send)(
+                        topic,
+                        {
+                            'type': 'notification_messages',
+                            'messages': messages
+                        }
+                    )
+                except Exception:
+                    logger.exception('Could not relay %s notification(s) to "%s".', len(messages), topic)
+
+        transaction.on_commit(notify)
+
+        return instances
+
+
+class ArchivedUserNotification(models.Model):
+    """
+    A read `UserNotification` that was moved out of the inbox, see
+    `zac.demo.mijngemeente.archive`.
+    """
+    topic = models.CharField(max_length=200)
+    title = models.TextField(blank=True)
+    body = models.TextField(blank=True)
+    reference = models.CharField(max_length=200, blank=True)
+    url = models.CharField(max_length=1000, blank=True)
+
+    created = models.DateTimeField()
+    archived = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ('-created', )
+
+
+class QueueBinding(models.Model):
+    """
+    A binding key that a consumer bound to a durable queue on the AMQP server,
+    see `zac.demo.mijngemeente.amqp`. Durable queues keep their bindings, so
+    these are used to unbind the binding keys that are no longer configured.
+    """
+    queue = models.CharField(max_length=200)
+    exchange = models.CharField(max_length=200)
+    binding_key = models.CharField(max_length=200)
+
+    class Meta:
+        unique_together = ('queue', 'exchange', 'binding_key')
@@ -0,0 +1,169 @@
+"""
+Processing of the queue of notifications from the NRC.
+
+The webhook only stores incoming notifications as `QueuedNotification`. A
+worker (see the `process_notifications` management command) claims batches of
+queued notifications and composes the user notifications concurrently. Failed
+notifications are retried with an exponential backoff, until
+`NOTIFICATIONS_QUEUE_MAX_ATTEMPTS` is reached.
+
+Notifications about the same main object (`hoofd_object`) are coalesced: a
+notification is only due after the coalescing window, and is then processed as
+one job with all other queued notifications about the same main object.
+If one of these notifications fails, only that notification is retried.
+"""
+import logging
+import traceback
+from collections import OrderedDict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from zac.demo.concurrency import run_concurrently
+
+from .models import QueuedNotification, QueueStatus, UserNotification
+
+logger = logging.getLogger(__name__)
+
+
+def claim_notifications(batch_size):
+    """
+    Claims a batch of queued notifications that are due, and all queued
+    notifications about the same main objects.
+
+    Claimed notifications are marked as being processed until the lease
+    (`NOTIFICATIONS_QUEUE_LEASE` seconds) expires. If a worker dies while
+    processing, the notifications are claimed again after that. Notifications
+    that are claimed by another worker are skipped.
+
+    :param batch_size: The maximum number of notifications to claim.
+    :return: A `list` of `QueuedNotification`s.
+    """
+    now = timezone.now()
+
+    with transaction.atomic():
+        batch = list(
+            QueuedNotification.objects
+            .select_for_update(skip_locked=True)
+            .filter(status__in=[QueueStatus.pending, QueueStatus.processing], next_attempt__lte=now)
+            .order_by('next_attempt')[:batch_size]
+        )
+
+        main_objects = {queued.hoofd_object for queued in batch if queued.hoofd_object}
+        if main_objects:
+            batch += list(
+                QueuedNotification.objects
+                .select_for_update(skip_locked=True)
+                .filter(status=QueueStatus.pending, attempts=0, hoofd_object__in=main_objects)
+                .exclude(pk__in=[queued.pk for queued in batch])
+            )
+
+        lease_until = now + timedelta(seconds=settings.NOTIFICATIONS_QUEUE_LEASE)
+        QueuedNotification.objects.filter(pk__in=[queued.pk for queued in batch]).update(
+            status=QueueStatus.processing,
+            attempts=F('attempts') + 1,
+            next_attempt=lease_until,
+        )
+
+    for queued in batch:
+        queued.status = QueueStatus.processing
+        queued.attempts += 1
+        queued.next_attempt = lease_until
+
+    return batch
+
+
+def group_notifications(batch):
+    """
+    Groups notifications by their main object.
+
+    :param batch: A `list` of `QueuedNotification`s.
+    :return: A `list` of `list`s of `QueuedNotification`s.
+    """
+    groups = OrderedDict()
+    for queued in batch:
+        key = queued.hoofd_object or queued.pk
+        groups.setdefault(key, []).append(queued)
+    return list(groups.values())
+
+
+def _retry_later(group, error):
+    for queued in group:
+        queued.error = error
+        if queued.attempts >= settings.NOTIFICATIONS_QUEUE_MAX_ATTEMPTS:
+            queued.status = QueueStatus.failed
+        else:
+            queued.status = QueueStatus.pending
+            backoff = settings.NOTIFICATIONS_QUEUE_RETRY_BACKOFF * 2 ** (queued.attempts - 1)
+            queued.next_attempt = timezone.now() + timedelta(seconds=backoff)
+        queued.save(update_fields=['status', 'next_attempt', 'error'])
+
+
+def compose_notification(group, handler):
+    """
+    Composes the user notification for a group of claimed notifications with
+    `handler`. The notifications that fail are scheduled for another attempt,
+    the others are handled.
+
+    :param group: A `list` of claimed `QueuedNotification`s.
+    :param handler: An object with a `compose_many(messages)` method, see
+                    `StoreAndPublishHandler.compose_many`.
+    :return: A `tuple` with a `list` of the handled `QueuedNotification`s and
+             the user notification as `dict`, or `None` if there's nothing to
+             notify.
+    """
+    try:
+        kwargs, failed = handler.compose_many([queued.json() for queued in group])
+    except Exception:
+        logger.exception(
+            'Processing queued notification(s) %s failed.', ', '.join(str(queued.pk) for queued in group))
+        _retry_later(group, traceback.format_exc())
+        return [], None
+
+    for index, exc in failed.items():
+        logger.error('Processing queued notification %s failed.', group[index].pk, exc_info=exc)
+        _retry_later([group[index]], ''.join(traceback.format_exception(type(exc), exc, exc.__traceback__)))
+
+    return [queued for index, queued in enumerate(group) if index not in failed], kwargs
+
+
+def process_queue(handler, batch_size=None, max_workers=None):
+    """
+    Claims and processes one batch of queued notifications.
+
+    The user notifications are composed concurrently, and are then created and
+    relayed all at once (see `UserNotification.bulk_create_and_notify`).
+
+    :param handler: An object with a `compose_many(messages)` method.
+    :param batch_size: The maximum number of notifications to claim. Defaults
+                       to the `NOTIFICATIONS_QUEUE_BATCH_SIZE` setting.
+    :param max_workers: The maximum number of groups of notifications to
+                        process concurrently. Defaults to the
+                        `NOTIFICATIONS_QUEUE_WORKERS` setting.
+    :return: A `tuple` with the number of handled and failed notifications.
+    """
+    if batch_size is None:
+        batch_size = settings.NOTIFICATIONS_QUEUE_BATCH_SIZE
+    if max_workers is None:
+        max_workers = settings.NOTIFICATIONS_QUEUE_WORKERS
+
+    groups = group_notifications(claim_notifications(batch_size))
+    results = run_concurrently(lambda group: compose_notification(group, handler), groups, max_workers=max_workers)
+
+    handled_notifications = [queued for handled_group, _ in results for queued in handled_group]
+    handled = len(handled_notifications)
+    failed = sum(len(group) for group in groups) - handled
+
+    try:
+        with transaction.atomic():
+            UserNotification.bulk_create_and_notify([kwargs for _, kwargs in results if kwargs is not None])
+            QueuedNotification.objects.filter(pk__in=[queued.pk for queued in handled_notifications]).delete()
+    except Exception:
+        logger.exception('Storing the user notification(s) of %s notification(s) failed.', handled)
+        _retry_later(handled_notifications, traceback.format_exc())
+        return 0, handled + failed
+
+    return handled, failed
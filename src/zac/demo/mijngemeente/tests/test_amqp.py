@@ -0,0 +1,296 @@
+import json
+import threading
+import time
+from collections import namedtuple
+from io import StringIO
+from types import SimpleNamespace
+from unittest.mock import Mock, patch
+
+from django.core.management import CommandError, call_command
+from django.test import SimpleTestCase, TestCase
+
+from pika.exceptions import AMQPConnectionError
+
+from ..amqp import NotificationConsumer, partition_bindings
+from ..models import QueueBinding
+
+Method = namedtuple('Method', ['delivery_tag', 'routing_key', 'redelivered'])
+
+
+class FakeChannel:
+    """
+    An in-memory stand-in for a `BlockingChannel`, that delivers the messages
+    of the broker once consuming is started.
+    """
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.bindings = []
+        self.unbound = []
+        self.queues = []
+        self.callbacks = []
+        self.prefetch_count = None
+        self.consuming = False
+
+    def basic_qos(self, prefetch_count):
+        self.prefetch_count = prefetch_count
+
+    def exchange_declare(self, exchange, exchange_type):
+        pass
+
+    def queue_declare(self, queue, exclusive=False, durable=False):
+        self.queues.append((queue, exclusive, durable))
+        return SimpleNamespace(method=SimpleNamespace(queue=queue or 'amq.gen-{}'.format(len(self.bindings))))
+
+    def queue_bind(self, exchange, queue, routing_key):
+        self.bindings.append((exchange, routing_key))
+
+    def queue_unbind(self, queue, exchange, routing_key):
+        self.unbound.append((queue, exchange, routing_key))
+
+    def basic_consume(self, queue, on_message_callback):
+        self.callbacks.append(on_message_callback)
+
+    def start_consuming(self):
+        self.consuming = True
+        for tag, (routing_key, body) in enumerate(self.connection.broker.messages, start=1):
+            self.callbacks[0](self, Method(tag, routing_key, False), None, body)
+
+        while self.consuming:
+            self.connection.process_data_events(time_limit=0.01)
+
+    def stop_consuming(self):
+        self.consuming = False
+
+    def basic_ack(self, delivery_tag):
+        self.connection.broker.acked.append(delivery_tag)
+
+    def basic_nack(self, delivery_tag, requeue):
+        self.connection.broker.nacked.append((delivery_tag, requeue))
+
+
+class FakeConnection:
+
+    def __init__(self, broker):
+        self.broker = broker
+        self.pending = []
+        self.lock = threading.Lock()
+        self.channels = []
+
+    def channel(self):
+        channel = FakeChannel(self)
+        self.channels.append(channel)
+        return channel
+
+    def add_callback_threadsafe(self, callback):
+        with self.lock:
+            self.pending.append(callback)
+
+    def process_data_events(self, time_limit=0):
+        with self.lock:
+            pending, self.pending = self.pending, []
+        for callback in pending:
+            callback()
+        if not pending:
+            time.sleep(time_limit)
+
+    def close(self):
+        pass
+
+
+class FakeBroker:
+
+    def __init__(self, messages, failures=0):
+        self.messages = messages
+        self.failures = failures
+        self.acked = []
+        self.nacked = []
+        self.connections = []
+
+    def connect(self):
+        if self.failures:
+            self.failures -= 1
+            raise AMQPConnectionError('Connection refused')
+
+        connection = FakeConnection(self)
+        self.connections.append(connection)
+        return connection
+
+
+class NotificationConsumerTests(TestCase):
+
+    def _consume(self, broker, handle, expected, **kwargs):
+        """
+        Runs a consumer until `handle` was called `expected` times.
+        """
+        consumer = NotificationConsumer(
+            broker.connect, [('zaken', ['zaken.#'])], Mock(), workers=2, prefetch_count=4, backoff=0, **kwargs)
+        calls = []
+        lock = threading.Lock()
+
+        def side_effect(message):
+            with lock:
+                calls.append(message)
+                if len(calls) == expected:
+                    consumer.stop()
+            handle(message)
+
+        consumer.handler.handle.side_effect = side_effect
+        consumer.run()
+        return calls
+
+    def test_process_and_acknowledge(self):
+        broker = FakeBroker([
+            ('zaken.create', json.dumps({'resource': 'zaak'})),
+            ('zaken.create', json.dumps({'resource': 'status'})),
+            ('zaken.create', 'no json'),
+        ])
+
+        calls = self._consume(broker, lambda message: None, expected=2)
+
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(sorted(broker.acked), [1, 2])
+        self.assertEqual(broker.nacked, [(3, False)])
+
+        channel = broker.connections[0].channels[0]
+        self.assertEqual(channel.prefetch_count, 4)
+        self.assertEqual(channel.bindings, [('zaken', 'zaken.#')])
+        self.assertEqual(channel.queues, [('zac.zaken', False, True)])
+
+    def test_durable_queue(self):
+        broker = FakeBroker([('zaken.create', json.dumps({'resource': 'zaak'}))])
+
+        self._consume(broker, lambda message: None, expected=1, queue_name='zac.{exchange}.0-2')
+
+        channel = broker.connections[0].channels[0]
+        self.assertEqual(channel.queues, [('zac.zaken.0-2', False, True)])
+
+    def test_exclusive_queue(self):
+        broker = FakeBroker([('zaken.create', json.dumps({'resource': 'zaak'}))])
+
+        self._consume(broker, lambda message: None, expected=1, exclusive=True)
+
+        channel = broker.connections[0].channels[0]
+        self.assertEqual(channel.queues, [('', True, False)])
+        self.assertFalse(QueueBinding.objects.exists())
+
+    def test_unbind_stale_binding_keys(self):
+        QueueBinding.objects.create(queue='zac.zaken', exchange='zaken', binding_key='zaken.#')
+        QueueBinding.objects.create(queue='zac.zaken', exchange='zaken', binding_key='zaken.update.#')
+        QueueBinding.objects.create(queue='zac.documenten', exchange='documenten', binding_key='documenten.#')
+        # The queue of a previous division in partitions.
+        QueueBinding.objects.create(queue='zac.zaken.1-2', exchange='zaken', binding_key='zaken.update.#')
+        broker = FakeBroker([('zaken.create', json.dumps({'resource': 'zaak'}))])
+
+        self._consume(broker, lambda message: None, expected=1)
+
+        channel = broker.connections[0].channels[0]
+        self.assertEqual(sorted(channel.unbound), [
+            ('zac.documenten', 'documenten', 'documenten.#'),
+            ('zac.zaken', 'zaken', 'zaken.update.#'),
+            ('zac.zaken.1-2', 'zaken', 'zaken.update.#'),
+        ])
+        self.assertEqual(sorted(QueueBinding.objects.values_list('queue', 'exchange', 'binding_key')), [
+            ('zac.zaken', 'zaken', 'zaken.#'),
+        ])
+
+    def test_bind_other_queues(self):
+        # The queue of the unpartitioned consumer, before dividing in
+        # partitions, and the queue of the other partition.
+        QueueBinding.objects.create(queue='zac.zaken', exchange='zaken', binding_key='zaken.#')
+        QueueBinding.objects.create(queue='zac.zaken.1-2', exchange='zaken', binding_key='zaken.update.#')
+        broker = FakeBroker([('zaken.create', json.dumps({'resource': 'zaak'}))])
+
+        self._consume(
+            broker, lambda message: None, expected=1, queue_name='zac.{exchange}.0-2',
+            other_queues=[('zac.{exchange}.1-2', [('zaken', ['zaken.update.#'])])]
+        )
+
+        channel = broker.connections[0].channels[0]
+        self.assertEqual(channel.queues, [('zac.zaken.0-2', False, True), ('zac.zaken.1-2', False, True)])
+        self.assertEqual(channel.bindings, [('zaken', 'zaken.#'), ('zaken', 'zaken.update.#')])
+        self.assertEqual(channel.unbound, [('zac.zaken', 'zaken', 'zaken.#')])
+        self.assertEqual(sorted(QueueBinding.objects.values_list('queue', 'exchange', 'binding_key')), [
+            ('zac.zaken.0-2', 'zaken', 'zaken.#'),
+            ('zac.zaken.1-2', 'zaken', 'zaken.update.#'),
+        ])
+
+    def test_requeue_failed_message(self):
+        def handle(message):
+            if message['resource'] == 'status':
+                raise ValueError('boom')
+
+        broker = FakeBroker([
+            ('zaken.create', json.dumps({'resource': 'zaak'})),
+            ('zaken.create', json.dumps({'resource': 'status'})),
+        ], failures=2)
+
+        self._consume(broker, handle, expected=2)
+
+        self.assertEqual(len(broker.connections), 1)
+        self.assertEqual(broker.acked, [1])
+        self.assertEqual(broker.nacked, [(2, True)])
+
+
+class PartitionBindingsTests(SimpleTestCase):
+
+    def test_partitions_divide_binding_keys(self):
+        bindings = [
+            ('zaken', ['zaken.create.*', 'zaken.update.*', 'zaken.destroy.*']),
+            ('documenten', ['documenten.#']),
+        ]
+
+        partitions = [partition_bindings(bindings, 3, partition) for partition in range(3)]
+
+        self.assertEqual(partitions[0], partition_bindings(bindings, 3, 0))
+        keys = sorted(
+            (exchange, binding_key)
+            for partition in partitions
+            for exchange, binding_keys in partition
+            for binding_key in binding_keys
+        )
+        self.assertEqual(keys, sorted(
+            (exchange, binding_key) for exchange, binding_keys in bindings for binding_key in binding_keys
+        ))
+
+    def test_skip_exchanges_without_binding_keys(self):
+        bindings = [('zaken', ['zaken.#'])]
+
+        partitions = [partition_bindings(bindings, 2, partition) for partition in range(2)]
+
+        self.assertIn([], partitions)
+        self.assertIn(bindings, partitions)
+
+
+class RunConsumerCommandTests(SimpleTestCase):
+
+    @patch('zac.demo.mijngemeente.management.commands.runconsumer.NotificationConsumer')
+    @patch('zac.demo.mijngemeente.management.commands.runconsumer.SiteConfiguration.get_solo')
+    def test_refuse_empty_partitions(self, get_solo, consumer_class):
+        get_solo.return_value.nc_amqp_port = None
+        get_solo.return_value.get_nc_channels_and_filters.return_value = [('zaken', ['zaken.#'])]
+
+        for partition in range(2):
+            with self.subTest(partition=partition):
+                with self.assertRaisesMessage(CommandError, 'of 2'):
+                    call_command('runconsumer', partitions=2, partition=partition)
+
+        consumer_class.assert_not_called()
+
+    @patch('zac.demo.mijngemeente.management.commands.runconsumer.NotificationConsumer')
+    @patch('zac.demo.mijngemeente.management.commands.runconsumer.SiteConfiguration.get_solo')
+    def test_partition_binds_other_partitions(self, get_solo, consumer_class):
+        get_solo.return_value.nc_amqp_host = 'localhost'
+        get_solo.return_value.nc_amqp_port = None
+        get_solo.return_value.get_nc_channels_and_filters.return_value = [
+            ('zaken', ['zaken.create.*', 'zaken.update.*', 'zaken.destroy.*']),
+        ]
+
+        call_command('runconsumer', partitions=2, partition=0, stdout=StringIO())
+
+        args, kwargs = consumer_class.call_args
+        self.assertEqual(args[1], [('zaken', ['zaken.destroy.*'])])
+        self.assertEqual(kwargs['queue_name'], 'zac.{exchange}.0-2')
+        self.assertEqual(kwargs['other_queues'], [
+            ('zac.{exchange}.1-2', [('zaken', ['zaken.create.*', 'zaken.update.*'])]),
+        ])
@@ -0,0 +1,28 @@
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+
+from ..archive import archive_notifications
+from ..models import ArchivedUserNotification, UserNotification
+
+
+class ArchiveNotificationsTests(TestCase):
+
+    def test_archive_old_read_notifications(self):
+        old = timezone.now() - timedelta(days=31)
+        for index, (read, created) in enumerate([(True, old), (True, old), (False, old), (True, timezone.now())]):
+            UserNotification.objects.create(
+                topic='notifications_everyone', title=f'Notificatie {index}', read=read, created=created)
+
+        archived = archive_notifications(days=30, batch_size=1)
+
+        self.assertEqual(archived, 2)
+        self.assertEqual(
+            sorted(ArchivedUserNotification.objects.values_list('title', flat=True)),
+            ['Notificatie 0', 'Notificatie 1']
+        )
+        self.assertEqual(
+            sorted(UserNotification.objects.values_list('title', flat=True)),
+            ['Notificatie 2', 'Notificatie 3']
+        )
@@ -0,0 +1,70 @@
+from django.test import SimpleTestCase, TransactionTestCase, override_settings
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from channels.testing import WebsocketCommunicator
+
+from zac.routing import application
+
+from ..models import UserNotification
+
+
+@override_settings(CHANNEL_LAYERS={'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}})
+class UserNotificationConsumerTests(SimpleTestCase):
+
+    @async_to_sync
+    async def test_relay_notifications(self):
+        communicator = WebsocketCommunicator(application, '/ws/notifications/everyone/')
+        connected, _ = await communicator.connect()
+        self.assertTrue(connected)
+
+        await get_channel_layer().group_send('notifications_everyone', {
+            'type': 'notification_messages',
+            'messages': [{'title': 'Eerste'}, {'title': 'Tweede'}],
+        })
+
+        self.assertEqual(await communicator.receive_json_from(), {'message': {'title': 'Eerste'}})
+        self.assertEqual(await communicator.receive_json_from(), {'message': {'title': 'Tweede'}})
+
+        await communicator.disconnect()
+
+
+@override_settings(CHANNEL_LAYERS={'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}})
+class UserNotificationReplayTests(TransactionTestCase):
+
+    def setUp(self):
+        super().setUp()
+
+        self.notifications = [
+            UserNotification.objects.create(topic='notifications_everyone', title=title)
+            for title in ['Eerste', 'Tweede', 'Derde']
+        ]
+
+    @async_to_sync
+    async def test_replay_missed_notifications(self):
+        since = self.notifications[0].pk
+        communicator = WebsocketCommunicator(application, f'/ws/notifications/everyone/?since={since}')
+        connected, _ = await communicator.connect()
+        self.assertTrue(connected)
+
+        for notification in self.notifications[1:]:
+            response = await communicator.receive_json_from()
+            self.assertEqual(response['message']['id'], notification.pk)
+            self.assertEqual(response['message']['title'], notification.title)
+        self.assertTrue(await communicator.receive_nothing())
+
+        await communicator.disconnect()
+
+    @override_settings(NOTIFICATIONS_REPLAY_LIMIT=1)
+    @async_to_sync
+    async def test_reload_when_too_many_missed(self):
+        since = self.notifications[0].pk
+        communicator = WebsocketCommunicator(application, f'/ws/notifications/everyone/?since={since}')
+        connected, _ = await communicator.connect()
+        self.assertTrue(connected)
+
+        # Replaying only part of them would lose the others.
+        self.assertEqual(await communicator.receive_json_from(), {'reload': True})
+        self.assertTrue(await communicator.receive_nothing())
+
+        await communicator.disconnect()
@@ -0,0 +1,31 @@
+import random
+
+from django.test import SimpleTestCase
+
+from ..management.commands.debug_emit import build_message, parse_weighted
+
+
+class DebugEmitTests(SimpleTestCase):
+
+    def test_parse_weighted(self):
+        choices, weights = parse_weighted(['zaken.create:3', 'zaken.update', 'zaken.*:x'])
+
+        self.assertEqual(choices, ['zaken.create', 'zaken.update', 'zaken.*:x'])
+        self.assertEqual(weights, [3, 1, 1])
+
+    def test_build_message(self):
+        message = build_message('zaken', 'http://zrc.nl/api/v1/', '1', 'status', {'bronorganisatie': '517439943'})
+
+        self.assertEqual(message['kanaal'], 'zaken')
+        self.assertEqual(message['hoofd_object'], 'http://zrc.nl/api/v1/zaken/1')
+        self.assertEqual(message['resource'], 'status')
+        self.assertTrue(message['resource_url'].startswith('http://zrc.nl/api/v1/statussen/'))
+        self.assertEqual(message['actie'], 'create')
+        self.assertEqual(message['kenmerken'], {'bronorganisatie': '517439943'})
+
+    def test_build_message_with_seed(self):
+        messages = [
+            build_message('zaken', 'http://zrc.nl/api/v1/', '1', 'status', {}, random.Random(42)) for _ in range(2)
+        ]
+
+        self.assertEqual(messages[0]['resource_url'], messages[1]['resource_url'])
@@ -0,0 +1,149 @@
+from unittest.mock import Mock, patch
+
+from django.db import transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+
+from ..api.handlers import StoreAndPublishHandler, default
+from ..models import QueuedNotification, QueueStatus, UserNotification
+from ..queue import process_queue
+
+MESSAGE = {
+    'kanaal': 'zaken',
+    'hoofd_object': 'http://zrc.nl/api/v1/zaken/1',
+    'resource': 'zaak',
+    'resource_url': 'http://zrc.nl/api/v1/zaken/1',
+    'actie': 'create',
+    'aanmaakdatum': '2019-03-27T10:59:13Z',
+    'kenmerken': {},
+}
+
+
+@override_settings(NOTIFICATIONS_QUEUE_MAX_ATTEMPTS=2, NOTIFICATIONS_COALESCE_WINDOW=0)
+class NotificationQueueTests(TestCase):
+
+    def test_webhook_handler_queues(self):
+        default.handle(MESSAGE)
+
+        queued = QueuedNotification.objects.get()
+        self.assertEqual(queued.json(), MESSAGE)
+        self.assertEqual(queued.status, QueueStatus.pending)
+
+    def test_process(self):
+        QueuedNotification.enqueue(MESSAGE)
+        handler = Mock()
+        handler.compose_many.return_value = ({
+            'title': 'Zaak aangemaakt',
+            'body': '',
+            'reference': 'ZAAK-1',
+            'url': MESSAGE['hoofd_object'],
+        }, {})
+
+        result = process_queue(handler, max_workers=1)
+
+        self.assertEqual(result, (1, 0))
+        handler.compose_many.assert_called_once_with([MESSAGE])
+        self.assertFalse(QueuedNotification.objects.exists())
+        self.assertEqual(UserNotification.objects.get().json()['reference'], 'ZAAK-1')
+
+    def test_coalesce(self):
+        other = dict(MESSAGE, resource='status', resource_url='http://zrc.nl/api/v1/statussen/1')
+        unrelated = dict(MESSAGE, hoofd_object='http://zrc.nl/api/v1/zaken/2')
+        for message in [MESSAGE, other, unrelated]:
+            QueuedNotification.enqueue(message)
+
+        # Arrived later, but within the coalescing window of the first one.
+        QueuedNotification.objects.filter(hoofd_object=unrelated['hoofd_object']).update(
+            next_attempt='2100-01-01T00:00:00Z')
+        QueuedNotification.objects.filter(message__contains='statussen').update(next_attempt='2100-01-01T00:00:00Z')
+        handler = Mock()
+        handler.compose_many.return_value = (None, {})
+
+        self.assertEqual(process_queue(handler, max_workers=1), (2, 0))
+
+        handler.compose_many.assert_called_once_with([MESSAGE, other])
+        self.assertEqual(QueuedNotification.objects.get().hoofd_object, unrelated['hoofd_object'])
+
+    def test_coalesce_with_failure(self):
+        status = dict(MESSAGE, resource='status', resource_url='http://zrc.nl/api/v1/statussen/1')
+        QueuedNotification.enqueue(MESSAGE)
+        failing = QueuedNotification.enqueue(status)
+
+        class Handler(StoreAndPublishHandler):
+            def compose(self, message, fetched):
+                if message['resource'] == 'status':
+                    raise ValueError('boom')
+                return {'title': 'Zaak aangemaakt', 'body': '', 'reference': 'ZAAK-1', 'url': message['hoofd_object']}
+
+        self.assertEqual(process_queue(Handler(), max_workers=1), (1, 1))
+
+        # The notification about the zaak is stored, only the status is retried.
+        self.assertEqual(UserNotification.objects.get().title, 'Zaak aangemaakt')
+        queued = QueuedNotification.objects.get()
+        self.assertEqual(queued.pk, failing.pk)
+        self.assertEqual(queued.status, QueueStatus.pending)
+        self.assertIn('boom', queued.error)
+
+    def test_retry(self):
+        queued = QueuedNotification.enqueue(MESSAGE)
+        handler = Mock()
+        handler.compose_many.side_effect = ValueError('boom')
+
+        self.assertEqual(process_queue(handler, max_workers=1), (0, 1))
+
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, QueueStatus.pending)
+        self.assertEqual(queued.attempts, 1)
+        self.assertIn('boom', queued.error)
+
+        # Not due yet.
+        self.assertEqual(process_queue(handler, max_workers=1), (0, 0))
+
+        QueuedNotification.objects.update(next_attempt=queued.created)
+        self.assertEqual(process_queue(handler, max_workers=1), (0, 1))
+
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, QueueStatus.failed)
+        self.assertEqual(queued.attempts, 2)
+
+
+@override_settings(CHANNEL_LAYERS={'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}})
+class UserNotificationTests(TransactionTestCase):
+
+    def test_bulk_create_and_notify(self):
+        channel_layer = get_channel_layer()
+        channels = {}
+        for topic in ['notifications_everyone', 'notifications_jdoe']:
+            channels[topic] = async_to_sync(channel_layer.new_channel)()
+            async_to_sync(channel_layer.group_add)(topic, channels[topic])
+
+        with patch.object(channel_layer, 'group_send', wraps=channel_layer.group_send) as group_send:
+            with transaction.atomic():
+                notifications = UserNotification.bulk_create_and_notify([
+                    {'title': 'Eerste', 'body': '', 'reference': 'ZAAK-1', 'url': 'http://zrc.nl/api/v1/zaken/1'},
+                    {'title': 'Tweede', 'body': '', 'reference': 'ZAAK-2', 'url': 'http://zrc.nl/api/v1/zaken/2',
+                     'topic': 'notifications_jdoe'},
+                    {'title': 'Derde', 'body': '', 'reference': 'ZAAK-3', 'url': 'http://zrc.nl/api/v1/zaken/3'},
+                ])
+
+                # The notifications are relayed once they're committed.
+                group_send.assert_not_called()
+
+        self.assertEqual(len(notifications), 3)
+        self.assertEqual(notifications[0].title, 'Eerste')
+        self.assertEqual(notifications[0].json()['title'], 'Eerste')
+        self.assertEqual(
+            list(UserNotification.objects.order_by('pk').values_list('topic', flat=True)),
+            ['notifications_everyone', 'notifications_jdoe', 'notifications_everyone']
+        )
+
+        # One message per topic.
+        self.assertEqual(group_send.call_count, 2)
+        message = async_to_sync(channel_layer.receive)(channels['notifications_everyone'])
+        self.assertEqual(message['type'], 'notification_messages')
+        self.assertEqual(message['messages'], [notifications[0].as_message(), notifications[2].as_message()])
+        message = async_to_sync(channel_layer.receive)(channels['notifications_jdoe'])
+        self.assertEqual(message['type'], 'notification_messages')
+        self.assertEqual(message['messages'], [notifications[1].as_message()])
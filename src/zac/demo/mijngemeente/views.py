@@ -1,3 +1,5 @@
+from django.core.paginator import Paginator
+from django.db.models import Max
 from django.urls import reverse
 from django.utils.safestring import mark_safe
 from django.views.generic import TemplateView
@@ -7,7 +9,7 @@ from ..models import SiteConfiguration, client
 from ..utils import (
     api_response_list_to_dict, extract_pagination_info, get_uuid, isodate
 )
-from .models import UserNotification
+from .models import DEFAULT_TOPIC, UserNotification
 
 
 class ZaakListView(ZACViewMixin, TemplateView):
@@ -15,22 +17,33 @@ class ZaakListView(ZACViewMixin, TemplateView):
     subtitle = 'Uw zaken bij de gemeente'
     template_name = 'demo/mijngemeente/index.html'
 
+    # The number of notifications per page of the inbox.
+    paginate_notifications_by = 10
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
 
-        # FAKE: Filter relevant notifications for user
-        notifications = UserNotification.objects.all()
+        # FAKE: Filter relevant notifications for user. The notifications are
+        # paginated on a key that doesn't change when they're read, so the
+        # later pages don't shift when the shown notifications are marked as
+        # read below.
+        notifications = UserNotification.objects.filter(topic=DEFAULT_TOPIC).order_by('-created', '-pk')
+        inbox = Paginator(notifications, self.paginate_notifications_by).get_page(self.request.GET.get('inbox'))
 
-        # Querysets are lazy, so we cast to list to force the database request
-        # here, to prevent all notifications from being marked as read before
-        # we actually show them in the template.
+        # Force the database request here, to prevent the notifications from
+        # being marked as read before we actually show them in the template.
+        messages = list(inbox)
         context.update({
-            'unread_messages': [n.json() for n in notifications.filter(read=False)],
-            'read_messages': [n.json() for n in notifications.filter(read=True)],
+            'inbox': inbox,
+            'messages': messages,
+            'has_unread_messages': any(not message.read for message in messages),
+            # The websocket relays the notifications after this one.
+            'last_notification_id': notifications.aggregate(last_id=Max('pk'))['last_id'] or 0,
         })
 
         # We consider "shown" as "read" :)
-        notifications.update(read=True)
+        UserNotification.objects.filter(pk__in=[message.pk for message in messages if not message.read]).update(
+            read=True)
 
         config = SiteConfiguration.get_solo()
 
@@ -1,17 +1,40 @@
+import logging
+
+from django.conf import settings
+
 from requests import HTTPError
 from zds_client import ClientError
-from zds_client.log import Log
 
+from .concurrency import FetchTimeout
+from .timing import (
+    get_request_timings, start_request_timings, stop_request_timings
+)
+from .traffic import (
+    get_traffic_log, restore_traffic_log, save_traffic_log, start_traffic_log,
+    stop_traffic_log, store_traffic_log
+)
 from .utils import render_exception_to_response
 
+performance_logger = logging.getLogger('performance')
+
 
 class ZACViewMixin:
     """
     Wraps the entire dispatch method to catch `ClientError`s. If caught, it
     renders a nice error page. If you want to do stuff in the `dispatch`
     method, use the `_pre_dispatch` or `_post_dispatch` methods.
+
+    Every request gets its own traffic log. If the network traffic panel is
+    enabled (see the `TRAFFIC_LOG_PANEL` setting), the log is stored when the
+    request is done. After a redirect, the log is included again on the next
+    page if it sets `keep_logs` or is requested with `?keep-logs=true`.
+
+    Views can set `upstream_call_budget` to the number of requests to the APIs
+    they're expected to make at most. A warning is logged to the "performance"
+    log when a request exceeds it.
     """
     keep_logs = False
+    upstream_call_budget = None
 
     def _pre_dispatch(self, request, *args, **kwargs):
         """
@@ -25,25 +48,62 @@ class ZACViewMixin:
         """
         pass
 
+    def check_upstream_call_budget(self, request, calls):
+        """
+        Logs a warning if the view made more requests to the APIs than its
+        budget.
+
+        :param request: The `HttpRequest`.
+        :param calls: The number of requests to the APIs.
+        """
+        if self.upstream_call_budget is not None and calls > self.upstream_call_budget:
+            performance_logger.warning(
+                '%s made %s calls to the APIs for %s %s, the budget is %s.',
+                type(self).__name__, calls, request.method, request.get_full_path(), self.upstream_call_budget
+            )
+
     def dispatch(self, request, *args, **kwargs):
-        clear_logs = not self.keep_logs and not request.GET.get('keep-logs', False)
-        if clear_logs:
-            Log.clear()
+        token = start_traffic_log()
+
+        # The calls are counted by the `ServerTimingMiddleware`, or here if
+        # it's not installed.
+        timings_token = None
+        if get_request_timings() is None:
+            timings_token = start_request_timings()
+        timings = get_request_timings()
+        calls = timings.upstream_calls
 
         try:
-            self._pre_dispatch(request, *args, **kwargs)
+            if settings.TRAFFIC_LOG_PANEL and (self.keep_logs or request.GET.get('keep-logs', False)):
+                restore_traffic_log(request)
+
+            try:
+                self._pre_dispatch(request, *args, **kwargs)
+
+                result = super().dispatch(request, *args, **kwargs)
+
+                self._post_dispatch(request, *args, **kwargs)
+            except (ClientError, HTTPError, FetchTimeout) as e:
+                result = render_exception_to_response(request, e)
 
-            result = super().dispatch(request, *args, **kwargs)
+            if settings.TRAFFIC_LOG_PANEL:
+                if 300 <= result.status_code < 400:
+                    save_traffic_log(request)
+                else:
+                    store_traffic_log(request)
 
-            self._post_dispatch(request, *args, **kwargs)
-        except (ClientError, HTTPError) as e:
-            return render_exception_to_response(request, e)
+            self.check_upstream_call_budget(request, timings.upstream_calls - calls)
 
-        return result
+            return result
+        finally:
+            stop_traffic_log(token)
+            if timings_token is not None:
+                stop_request_timings(timings_token)
 
     def get_context_data(self, **kwargs):
         """
-        Include log entries in the response.
+        Include the identifier of the traffic log in the response. The entries
+        are fetched when the network traffic panel is opened.
 
         :param kwargs:
         :return:
@@ -51,7 +111,7 @@ class ZACViewMixin:
         context = super().get_context_data(**kwargs)
 
         context.update({
-            'log_entries': Log.entries(),
+            'traffic_log_id': get_traffic_log().id if settings.TRAFFIC_LOG_PANEL else None,
         })
 
         return context
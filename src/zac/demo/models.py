@@ -14,6 +14,11 @@ from vng_api_common.notifications.models import (
 )
 from zds_client import Client
 
+from .auth import credentials_cache
+from .catalogue import CatalogueClient
+from .client import ZACClient
+from .sessions import close_sessions
+
 ServiceConfig = namedtuple('ServiceConfig', ['base_url', 'client_id', 'secret'])
 
 
@@ -212,13 +217,20 @@ class SiteConfiguration(SingletonModel):
 
     def reload_config(self):
         self.__class__.CLIENTS.clear()
+        close_sessions()
+        credentials_cache.clear()
 
         config = self.get_zdsclient_config()
         Client.load_config(**config)
 
     def get_nc_channels_and_filters(self):
-        # return [(ex.name, ex.get_filters()) for ex in self.exchange_set.all()]
-        return ['zaken', [{'foo.bar'}, {'bar.foo'}, ]]
+        """
+        Returns the configured exchanges and their binding keys.
+
+        :return: A `list` of `tuple`s with the exchange name and a `list` of
+                 binding keys.
+        """
+        return [(ex.name, ex.get_filters()) for ex in self.exchange_set.all()]
 
     def get_service_config(self, service):
         """
@@ -292,7 +304,9 @@ class SiteConfiguration(SingletonModel):
             o = urlparse(base_url)
             base_path = o.path
 
-        return Client(service, base_path)
+        if service == 'ztc':
+            return CatalogueClient(service, base_path)
+        return ZACClient(service, base_path)
 
 
 class OtherZTC(models.Model):
@@ -321,7 +335,7 @@ class OtherZTC(models.Model):
             o = urlparse(self.base_url)
             base_path = o.path
 
-        return Client('ztc', base_path)
+        return CatalogueClient('ztc', base_path)
 
 
 def validate_filters(value):
@@ -347,18 +361,57 @@ def validate_filters(value):
             )
 
 
+class Exchange(models.Model):
+    config = models.ForeignKey('demo.SiteConfiguration', on_delete=models.CASCADE)
+
+    name = models.CharField(
+        _('Kanaal'), max_length=255,
+        help_text=_('De naam van het kanaal (exchange) op de AMQP-server, bijvoorbeeld "zaken".'))
+    filters = models.TextField(
+        _('Filters'), blank=True, validators=[validate_filters],
+        help_text=_('Een lijst van objecten met kenmerken, bijvoorbeeld: [{"bronorganisatie": "*", "zaaktype": "#"}]. '
+                    'Zonder filters worden alle berichten ontvangen.'))
+
+    class Meta:
+        verbose_name = 'Kanaal'
+        verbose_name_plural = 'Kanalen'
+
+    def __str__(self):
+        return self.name
+
+    def get_filters(self):
+        """
+        Returns the binding keys for the filters. The values of the kenmerken
+        of a filter, in order, make up the binding key.
+
+        :return: A `list` of binding keys.
+        """
+        if not self.filters:
+            return ['#']
+
+        return [
+            '.'.join(str(value) for value in kenmerken.values()) or '#'
+            for kenmerken in json.loads(self.filters)
+        ]
+
+
 def client(service, url=None, request=None):
     """
     Helper function to grab the properly configured `Client` instance.
 
+    The `Client` instances are shared between requests and threads. If a
+    `request` is given, a copy of the `Client` is returned that identifies
+    itself as the user of the request.
+
     :param service: The service key for this client.
     :param url: The url to request, to get a matching client.
+    :param request: The request to take the user from.
     :return: A `Client` instance.
     """
 
     if service not in SiteConfiguration.CLIENTS:
         config = SiteConfiguration.get_solo()
-        SiteConfiguration.CLIENTS[service] = {
+        clients = {
             'DEFAULT': config.get_client(service)
         }
 
@@ -366,8 +419,11 @@ def client(service, url=None, request=None):
         if hasattr(config, attr):
             other_config_set = getattr(config, attr).all()
             for other_config in other_config_set:
-                SiteConfiguration.CLIENTS[service][other_config.base_url] = \
-                    other_config.get_client()
+                clients[other_config.base_url] = other_config.get_client()
+
+        # Only register the clients when they are complete, other threads may
+        # be using them right away.
+        SiteConfiguration.CLIENTS[service] = clients
 
     client_res = None
     if url:
@@ -382,9 +438,5 @@ def client(service, url=None, request=None):
 
     # add user_id and user_representation from request
     if request.user.is_authenticated:
-        client_res.auth.user_id = request.user.username
-        client_res.auth.user_representation = request.user.get_full_name()
-    else:
-        client_res.auth.user_id = 'anonymous'
-        client_res.auth.user_representation = 'anonymous'
-    return client_res
+        return client_res.for_user(request.user.username, request.user.get_full_name())
+    return client_res.for_user('anonymous', 'anonymous')
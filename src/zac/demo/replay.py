@@ -0,0 +1,249 @@
+"""
+Recording and replaying the traffic with the APIs, to benchmark the ZAC
+without the APIs.
+
+The `record_traffic` management command captures the requests to the APIs, in
+the format of the ZDS client log (see `zac.demo.traffic`), and the API schemas
+in a fixture file. The `replay_server` management command starts a local HTTP
+server per recorded origin, that responds to the same requests with the
+recorded responses, after an (optional) injected latency. URLs in the responses
+are rewritten to the replay servers, so links between resources keep working.
+"""
+import json
+import logging
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+from .traffic import CurrentTrafficLog
+
+logger = logging.getLogger(__name__)
+
+
+def _origin(url):
+    parts = urlsplit(url)
+    return '{}://{}'.format(parts.scheme, parts.netloc)
+
+
+def _request_key(method, url):
+    """
+    Returns the key to match a request with a recorded request: the method,
+    path and the (sorted) query parameters.
+    """
+    parts = urlsplit(url)
+    return '{} {}?{}'.format(method.upper(), parts.path, urlencode(sorted(parse_qsl(parts.query))))
+
+
+def _body(data):
+    if isinstance(data, bytes):
+        data = data.decode('utf-8', 'replace')
+        try:
+            return json.loads(data)
+        except ValueError:
+            return data
+    return data
+
+
+class RecordingLog(CurrentTrafficLog):
+    """
+    Drop-in replacement of the ZDS client `Log` that keeps every request and
+    response in full, and writes to the `TrafficLog` of the current context
+    as well.
+    """
+
+    def __init__(self):
+        self.recorded = []
+        self._lock = threading.Lock()
+
+    def add(self, service, url, method, request_headers, request_data, response_status, response_headers,
+            response_data, params=None):
+        super().add(service, url, method, request_headers, request_data, response_status, response_headers,
+                    response_data, params=params)
+
+        with self._lock:
+            self.recorded.append({
+                'service': service,
+                'request': {'url': url, 'method': method, 'params': params},
+                'response': {'status': response_status, 'headers': response_headers, 'data': _body(response_data)},
+            })
+
+
+def to_fixture_entry(entry):
+    """
+    Converts an entry of the traffic log to an entry of a fixture.
+    """
+    url = entry['request']['url']
+    params = entry['request'].get('params')
+    if params:
+        url = '{}{}{}'.format(url, '&' if '?' in url else '?', urlencode(params, doseq=True))
+
+    headers = {key.lower(): value for key, value in (entry['response'].get('headers') or {}).items()}
+    return {
+        'service': entry['service'],
+        'method': entry['request']['method'].upper(),
+        'url': url,
+        'status': entry['response']['status'],
+        'content_type': headers.get('content-type', 'application/json'),
+        'body': _body(entry['response']['data']),
+    }
+
+
+def save_fixture(path, entries, schemas, append=False):
+    """
+    Writes the recorded traffic and schemas to a fixture file.
+
+    :param path: The path of the fixture file.
+    :param entries: A `list` of traffic log entries.
+    :param schemas: A `dict` with the API schemas by their URL.
+    :param append: Add to the traffic in the fixture file, if it exists.
+    :return: The number of entries in the fixture.
+    """
+    fixture = {'entries': [], 'schemas': {}}
+    if append:
+        try:
+            fixture = load_fixture(path)
+        except FileNotFoundError:
+            pass
+
+    fixture['entries'] += [to_fixture_entry(entry) for entry in entries]
+    fixture['schemas'].update(schemas)
+
+    with open(path, 'w') as f:
+        json.dump(fixture, f, indent=2, default=str)
+    return len(fixture['entries'])
+
+
+def load_fixture(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+class Replay:
+    """
+    The recorded responses of a fixture, per origin.
+
+    :param fixture: The fixture, see `save_fixture`.
+    :param base_urls: A `dict` with the URL of the replay server per recorded
+                      origin.
+    """
+
+    def __init__(self, fixture, base_urls):
+        self.base_urls = base_urls
+        self.responses = {origin: {} for origin in base_urls}
+
+        for entry in fixture['entries']:
+            origin = _origin(entry['url'])
+            if origin not in self.responses:
+                continue
+            body = entry['body']
+            if body is not None and not isinstance(body, str):
+                body = json.dumps(body)
+            # The last recorded response wins.
+            self.responses[origin][_request_key(entry['method'], entry['url'])] = (
+                entry['status'], entry['content_type'], self.rewrite(body or '')
+            )
+
+        for url, schema in fixture['schemas'].items():
+            origin = _origin(url)
+            if origin in self.responses:
+                self.responses[origin][_request_key('GET', url)] = (
+                    200, 'application/json', self.rewrite(json.dumps(schema))
+                )
+
+    @staticmethod
+    def get_origins(fixture):
+        """
+        Returns the recorded origins, in order.
+        """
+        urls = [entry['url'] for entry in fixture['entries']] + list(fixture['schemas'])
+        return sorted({_origin(url) for url in urls})
+
+    def rewrite(self, text):
+        """
+        Replaces the recorded origins in `text` by those of the replay servers.
+        """
+        for origin, base_url in self.base_urls.items():
+            text = text.replace(origin, base_url)
+        return text
+
+    def match(self, origin, method, path):
+        """
+        Returns the recorded response for a request, or `None`.
+
+        The schema is requested with a version parameter, which isn't part of
+        the recording. Requests for the schema match regardless of their
+        parameters.
+
+        :return: A `tuple` with the status, content type and body.
+        """
+        responses = self.responses[origin]
+        response = responses.get(_request_key(method, path))
+        if response is None and urlsplit(path).path.endswith('/schema/openapi.yaml'):
+            response = responses.get(_request_key(method, urlsplit(path).path))
+        return response
+
+
+class ReplayRequestHandler(BaseHTTPRequestHandler):
+    # Keep connections alive, like the APIs, for the pooled sessions.
+    protocol_version = 'HTTP/1.1'
+
+    def replay(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        if length:
+            self.rfile.read(length)
+
+        server = self.server
+        if server.latency or server.jitter:
+            time.sleep(max(server.latency + random.uniform(-server.jitter, server.jitter), 0) / 1000)
+
+        response = server.replay.match(server.origin, self.command, self.path)
+        if response is None:
+            status, content_type, body = 404, 'application/json', json.dumps({
+                'detail': 'Niet opgenomen: {} {}'.format(self.command, self.path),
+            })
+        else:
+            status, content_type, body = response
+
+        body = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(body)
+
+    do_GET = do_HEAD = do_POST = do_PUT = do_PATCH = do_DELETE = replay
+
+    def log_message(self, format, *args):
+        logger.debug('%s %s', self.server.origin, format % args)
+
+
+def create_servers(fixture, host='127.0.0.1', port=9000, latency=0, jitter=0):
+    """
+    Creates a replay server for every origin in the fixture, on consecutive
+    ports.
+
+    :param fixture: The fixture, see `save_fixture`.
+    :param host: The host to listen on.
+    :param port: The port of the first server, or 0 for any free ports.
+    :param latency: The number of milliseconds to wait before responding.
+    :param jitter: The maximum number of milliseconds the latency varies.
+    :return: A `tuple` with the `Replay` and a `list` of servers.
+    """
+    servers = []
+    for index, origin in enumerate(Replay.get_origins(fixture)):
+        server = ThreadingHTTPServer((host, port + index if port else 0), ReplayRequestHandler)
+        server.daemon_threads = True
+        server.origin = origin
+        server.latency = latency
+        server.jitter = jitter
+        servers.append(server)
+
+    replay = Replay(fixture, {
+        server.origin: 'http://{}:{}'.format(host, server.server_address[1]) for server in servers
+    })
+    for server in servers:
+        server.replay = replay
+    return replay, servers
@@ -0,0 +1,98 @@
+"""
+Pooled HTTP sessions for all upstream APIs.
+
+Every service gets its own `requests.Session`, so connections to the API are
+kept alive and reused between requests (and threads). The pool size, keep-alive
+and retry policy are configured through the `UPSTREAM_*` settings.
+"""
+import threading
+
+from django.conf import settings
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+_sessions = {}
+_lock = threading.Lock()
+
+
+def _create_session():
+    retries = settings.UPSTREAM_RETRIES
+    max_retries = Retry(
+        total=retries,
+        connect=retries,
+        read=0,
+        status=retries,
+        backoff_factor=settings.UPSTREAM_RETRY_BACKOFF,
+        status_forcelist=(502, 503, 504),
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=settings.UPSTREAM_POOL_SIZE,
+        pool_maxsize=settings.UPSTREAM_POOL_SIZE,
+        max_retries=max_retries,
+    )
+
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    if not settings.UPSTREAM_KEEP_ALIVE:
+        session.headers['Connection'] = 'close'
+    return session
+
+
+def get_session(service):
+    """
+    Returns the pooled session for given `service`.
+
+    :param service: The service name, like "zrc" or "brp".
+    :return: A `requests.Session`.
+    """
+    try:
+        return _sessions[service]
+    except KeyError:
+        pass
+
+    with _lock:
+        if service not in _sessions:
+            _sessions[service] = _create_session()
+        return _sessions[service]
+
+
+def close_sessions():
+    """
+    Closes all sessions and their pooled connections.
+    """
+    with _lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
+
+
+def get_pool_stats():
+    """
+    Returns the utilisation of the connection pools of all sessions.
+
+    :return: A `list` of `dict`s, one for each connection pool.
+    """
+    stats = []
+    for service, session in sorted(_sessions.copy().items()):
+        for adapter in set(session.adapters.values()):
+            pools = adapter.poolmanager.pools
+            for key in pools.keys():
+                pool = pools.get(key)
+                if pool is None:
+                    continue
+
+                size = pool.pool.maxsize if pool.pool else 0
+                available = pool.pool.qsize() if pool.pool else 0
+                stats.append({
+                    'service': service,
+                    'host': '{}://{}:{}'.format(pool.scheme, pool.host, pool.port),
+                    'size': size,
+                    'in_use': size - available,
+                    'connections': pool.num_connections,
+                    'requests': pool.num_requests,
+                })
+    return stats
@@ -0,0 +1,426 @@
+"""
+An in-memory ZGW backend for the benchmarks.
+
+`MockZGWBackend` generates a data set of configurable size for the ZRC, ZTC,
+DRC, BRC, BRP and the Objects and Objecttypes APIs, and answers the requests
+of the ZAC to these APIs without any network traffic. It serves minimal API
+schemas, with just the operations the ZAC uses, so the (real) ZDS clients can
+be used unchanged.
+"""
+import json
+import random
+import threading
+import uuid
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+from http import HTTPStatus
+from unittest import mock
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+BASE_URLS = OrderedDict([
+    ('zrc', 'http://zrc.mock/api/v1/'),
+    ('ztc', 'http://ztc.mock/api/v1/'),
+    ('drc', 'http://drc.mock/api/v1/'),
+    ('brc', 'http://brc.mock/api/v1/'),
+    ('objects', 'http://objects.mock/api/v1/'),
+    ('objecttypes', 'http://objecttypes.mock/api/v1/'),
+    ('brp', 'http://brp.mock/api/'),
+])
+
+# The operations of each API, by path. The paths of the ZTC are flat, the
+# (nested) path parameters the ZAC passes are ignored.
+OPERATIONS = {
+    'zrc': {
+        '/zaken': {'get': 'zaak_list', 'post': 'zaak_create'},
+        '/zaken/{uuid}': {'get': 'zaak_read', 'patch': 'zaak_partial_update'},
+        '/zaken/{zaak_uuid}/audittrail': {'get': 'audittrail_list'},
+        '/statussen': {'get': 'status_list', 'post': 'status_create'},
+        '/statussen/{uuid}': {'get': 'status_read'},
+        '/resultaten/{uuid}': {'get': 'resultaat_read'},
+        '/rollen': {'get': 'rol_list'},
+        '/zaakobjecten': {'get': 'zaakobject_list'},
+        '/zaakinformatieobjecten': {'post': 'zaakinformatieobject_create'},
+    },
+    'ztc': {
+        '/zaaktypen': {'get': 'zaaktype_list'},
+        '/zaaktypen/{uuid}': {'get': 'zaaktype_read'},
+        '/statustypen': {'get': 'statustype_list'},
+        '/statustypen/{uuid}': {'get': 'statustype_read'},
+        '/besluittypen': {'get': 'besluittype_list'},
+        '/resultaattypen/{uuid}': {'get': 'resultaattype_read'},
+        '/informatieobjecttypen/{uuid}': {'get': 'informatieobjecttype_read'},
+    },
+    'drc': {
+        '/enkelvoudiginformatieobjecten': {'post': 'enkelvoudiginformatieobject_create'},
+        '/enkelvoudiginformatieobjecten/{uuid}': {'get': 'enkelvoudiginformatieobject_read'},
+        '/enkelvoudiginformatieobjecten/{enkelvoudiginformatieobject_uuid}/audittrail': {'get': 'audittrail_list'},
+        '/objectinformatieobjecten': {'get': 'objectinformatieobject_list'},
+    },
+    'brc': {
+        '/besluiten': {'get': 'besluit_list'},
+        '/besluiten/{uuid}': {'get': 'besluit_read'},
+        '/besluiten/{besluit_uuid}/audittrail': {'get': 'audittrail_list'},
+    },
+    'objects': {
+        '/objects': {'get': 'object_list', 'post': 'object_create'},
+        '/objects/{uuid}': {'get': 'object_read'},
+    },
+    'objecttypes': {
+        '/objecttypes': {'get': 'objecttype_list'},
+        '/objecttypes/{uuid}': {'get': 'objecttype_read'},
+    },
+}
+
+# The attributes the APIs set on the objects that are created.
+DEFAULTS = {
+    'zaken': {
+        'einddatum': None,
+        'zaakgeometrie': None,
+        'status': None,
+        'resultaat': None,
+        'archiefnominatie': None,
+        'archiefstatus': 'nog_te_archiveren',
+        'archiefactiedatum': None,
+    },
+}
+
+# The collections that are paginated, the others respond with a plain list.
+PAGINATED = {'zaken', 'statussen', 'rollen', 'zaakobjecten', 'zaaktypen', 'statustypen', 'besluittypen', 'besluiten'}
+
+
+def get_schema(service):
+    """
+    Returns a minimal OAS 3.0 schema of given API.
+    """
+    return {
+        'openapi': '3.0.0',
+        'servers': [{'url': BASE_URLS[service]}],
+        'paths': {
+            path: {method: {'operationId': operation_id} for method, operation_id in methods.items()}
+            for path, methods in OPERATIONS[service].items()
+        },
+    }
+
+
+def _normalize(url):
+    """
+    Returns the URL without query and default port, as the ZDS client adds the
+    port to the base URL.
+    """
+    parts = urlsplit(url)
+    return '{}://{}{}'.format(parts.scheme, parts.hostname, parts.path)
+
+
+class MockZGWBackend:
+    """
+    The data and request handling of the mocked APIs.
+
+    :param zaken: The number of zaken.
+    :param statussen: The number of statussen per zaak.
+    :param documenten: The number of documents per zaak.
+    :param audittrails: The number of audit trail entries per zaak, document
+                        and besluit.
+    :param besluiten: The number of besluiten per zaak.
+    :param rollen: The number of rollen per zaak, each with a person in the
+                   BRP.
+    :param objecten: The number of objects in the Objects API per zaak.
+    :param page_size: The number of results per page of paginated lists.
+    :param seed: The seed to generate the UUIDs, so the data set is the same
+                 for every run.
+    """
+
+    def __init__(self, zaken=25, statussen=3, documenten=3, audittrails=5, besluiten=1, rollen=1, objecten=1,
+                 page_size=100, seed=0):
+        self.page_size = page_size
+        self.resources = {}
+        self.collections = {}
+        self.calls = Counter()
+
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+        self._generate(zaken, statussen, documenten, audittrails, besluiten, rollen, objecten)
+
+    def _uuid(self):
+        return str(uuid.UUID(int=self._rng.getrandbits(128), version=4))
+
+    def _collection(self, service, name):
+        url = '{}{}'.format(BASE_URLS[service], name)
+        return self.collections.setdefault(url, [])
+
+    def _add(self, service, collection, data, audittrails=0):
+        """
+        Adds an object to a collection, with a new URL.
+
+        :param audittrails: The number of audit trail entries of the object.
+        """
+        url = '{}{}/{}'.format(BASE_URLS[service], collection, self._uuid())
+        obj = dict(data, url=url)
+        self.resources[url] = obj
+        self._collection(service, collection).append(obj)
+
+        if audittrails:
+            self.collections['{}/audittrail'.format(url)] = [
+                self._audit(service, collection, url, index) for index in range(audittrails)
+            ]
+        return obj
+
+    def _audit(self, service, collection, url, index):
+        oud = {'toelichting': 'Versie {}'.format(index)} if index else None
+        return {
+            'uuid': self._uuid(),
+            'bron': service.upper(),
+            'applicatieId': 'zac',
+            'applicatieWeergave': 'ZAC',
+            'gebruikersId': 'benchmark',
+            'gebruikersWeergave': 'Benchmark',
+            'actie': 'partial_update' if index else 'create',
+            'actieWeergave': '',
+            'resultaat': 200 if index else 201,
+            'hoofdObject': url,
+            'resource': collection,
+            'resourceUrl': url,
+            'toelichting': '',
+            'resourceWeergave': url,
+            'aanmaakdatum': '2020-01-01T10:{:02d}:{:02d}.000000Z'.format(index // 60 % 60, index % 60),
+            'wijzigingen': {
+                'oud': oud,
+                'nieuw': {'toelichting': 'Versie {}'.format(index + 1)},
+            },
+        }
+
+    def _generate(self, zaken, statussen, documenten, audittrails, besluiten, rollen, objecten):
+        self.catalogus_uuid = self._uuid()
+        self.objecttype = self._add('objecttypes', 'objecttypes', {'name': 'Melding', 'namePlural': 'Meldingen'})
+
+        self.zaaktypen = []
+        for index in range(3):
+            zaaktype = self._add('ztc', 'zaaktypen', {
+                'identificatie': 'ZT-{}'.format(index),
+                'omschrijving': 'Zaaktype {}'.format(index),
+                'doorlooptijd': 'P30D',
+                'statustypen': [],
+            })
+            zaaktype['statustypen'] = [
+                self._add('ztc', 'statustypen', {
+                    'zaaktype': zaaktype['url'],
+                    'omschrijving': 'Status {}'.format(volgnummer),
+                    'volgnummer': volgnummer,
+                })['url']
+                for volgnummer in range(1, max(statussen, 1) + 1)
+            ]
+            zaaktype['resultaattype'] = self._add('ztc', 'resultaattypen', {
+                'zaaktype': zaaktype['url'],
+                'omschrijving': 'Afgehandeld',
+            })['url']
+            self.zaaktypen.append(zaaktype)
+
+        self.besluittype = self._add('ztc', 'besluittypen', {'omschrijving': 'Besluit'})
+        self.informatieobjecttype = self._add('ztc', 'informatieobjecttypen', {'omschrijving': 'Afbeelding'})
+        self._collection('zrc', 'zaakinformatieobjecten')
+        self._collection('drc', 'enkelvoudiginformatieobjecten')
+        self._collection('objects', 'objects')
+
+        self.zaken = []
+        for _ in range(zaken):
+            self.add_zaak(statussen, documenten, audittrails, besluiten, rollen, objecten)
+
+    def add_zaak(self, statussen=0, documenten=0, audittrails=0, besluiten=0, rollen=0, objecten=0):
+        """
+        Adds a zaak, with a resultaat and the given number of sub-resources
+        (see `MockZGWBackend`).
+
+        :return: The zaak.
+        """
+        index = len(self.zaken)
+        zaaktype = self.zaaktypen[index % len(self.zaaktypen)]
+        zaak = self._add('zrc', 'zaken', {
+            'identificatie': 'ZAAK-{:06d}'.format(index),
+            'bronorganisatie': '517439943',
+            'zaaktype': zaaktype['url'],
+            'registratiedatum': '2020-01-01',
+            'startdatum': '2020-01-01',
+            'einddatum': None,
+            'toelichting': 'Zaak {}'.format(index),
+            'zaakgeometrie': {'type': 'Point', 'coordinates': [4.9, 52.37]},
+            'status': None,
+            'resultaat': None,
+            'archiefnominatie': 'vernietigen' if index % 2 else 'blijvend_bewaren',
+            'archiefstatus': 'nog_te_archiveren',
+            'archiefactiedatum': '2020-12-31',
+        }, audittrails=audittrails)
+        self.zaken.append(zaak)
+
+        for statustype in zaaktype['statustypen'][:statussen]:
+            zaak['status'] = self._add('zrc', 'statussen', {
+                'zaak': zaak['url'],
+                'statustype': statustype,
+                'datumStatusGezet': '2020-01-01T10:00:00Z',
+                'statustoelichting': 'Toelichting',
+            })['url']
+
+        zaak['resultaat'] = self._add('zrc', 'resultaten', {
+            'zaak': zaak['url'],
+            'resultaattype': zaaktype['resultaattype'],
+            'toelichting': '',
+        })['url']
+
+        for _ in range(documenten):
+            document = self._add('drc', 'enkelvoudiginformatieobjecten', {
+                'identificatie': self._uuid(),
+                'bronorganisatie': '517439943',
+                'creatiedatum': '2020-01-01',
+                'titel': 'document.png',
+                'auteur': 'benchmark',
+                'formaat': 'image/png',
+                'taal': 'dut',
+                'bestandsomvang': 1024,
+                'informatieobjecttype': self.informatieobjecttype['url'],
+            }, audittrails=audittrails)
+            self._add('drc', 'objectinformatieobjecten', {
+                'informatieobject': document['url'],
+                'object': zaak['url'],
+                'objectType': 'zaak',
+            })
+
+        for _ in range(besluiten):
+            self._add('brc', 'besluiten', {
+                'zaak': zaak['url'],
+                'besluittype': self.besluittype['url'],
+                'datum': '2020-01-01',
+                'toelichting': '',
+            }, audittrails=audittrails)
+
+        for _ in range(rollen):
+            bsn = '{:09d}'.format(self._rng.randrange(10 ** 9))
+            persoon = self._add('brp', 'ingeschrevenpersonen', {
+                'burgerservicenummer': bsn,
+                'naam': {'aanschrijfwijze': 'J. Jansen'},
+            })
+            self._add('zrc', 'rollen', {
+                'zaak': zaak['url'],
+                'betrokkene': persoon['url'],
+                'betrokkeneType': 'natuurlijk_persoon',
+                'roltoelichting': 'Initiator',
+            })
+
+        for _ in range(objecten):
+            obj = self._add('objects', 'objects', {
+                'type': self.objecttype['url'],
+                'record': {'index': 1, 'data': {'omschrijving': 'Melding'}},
+            })
+            self._add('zrc', 'zaakobjecten', {
+                'zaak': zaak['url'],
+                'object': obj['url'],
+                'objectType': 'overige',
+            })
+
+        return zaak
+
+    def handle(self, method, url, data=None):
+        """
+        Returns the response to a request.
+
+        :return: A `tuple` with the status code and the response data.
+        """
+        parts = urlsplit(url)
+        if parts.path.endswith('/schema/openapi.yaml'):
+            for service, base_url in BASE_URLS.items():
+                if service in OPERATIONS and url.startswith(base_url):
+                    return 200, get_schema(service)
+            return 404, {'detail': 'Niet gevonden.'}
+
+        with self._lock:
+            self.calls[parts.hostname.split('.')[0]] += 1
+
+        url = _normalize(url)
+        query = OrderedDict(parse_qsl(parts.query))
+
+        if method == 'GET' and url in self.resources:
+            return 200, self.resources[url]
+        if method == 'GET' and url in self.collections:
+            return 200, self._list(url, query)
+        if method == 'PATCH' and url in self.resources:
+            with self._lock:
+                self.resources[url].update(data or {})
+            return 200, self.resources[url]
+        if method == 'POST' and url in self.collections:
+            return 201, self._create(url, data or {})
+        return 404, {'detail': 'Niet gevonden.'}
+
+    def _list(self, url, query):
+        page = int(query.pop('page', 1))
+        results = [
+            obj for obj in self.collections[url]
+            # Filters on unknown attributes (like archiefactiedatum__lt) are
+            # ignored.
+            if all(obj.get(key, value) == value for key, value in query.items())
+        ]
+        if url.rsplit('/', 1)[-1] not in PAGINATED:
+            return results
+
+        def page_url(number):
+            return '{}?{}'.format(url, urlencode(list(query.items()) + [('page', number)]))
+
+        start = (page - 1) * self.page_size
+        return {
+            'count': len(results),
+            'next': page_url(page + 1) if start + self.page_size < len(results) else None,
+            'previous': page_url(page - 1) if page > 1 else None,
+            'results': results[start:start + self.page_size],
+        }
+
+    def _create(self, url, data):
+        with self._lock:
+            obj = dict(DEFAULTS.get(url.rsplit('/', 1)[-1], {}), url='{}/{}'.format(url, uuid.uuid4()))
+            obj.update(data)
+            self.resources[obj['url']] = obj
+            self.collections[url].append(obj)
+
+            # The ZRC sets the current status of the zaak.
+            if url.endswith('/statussen') and obj.get('zaak') in self.resources:
+                self.resources[obj['zaak']]['status'] = obj['url']
+        return obj
+
+    def send(self, request):
+        """
+        Returns the `requests.Response` to a `requests.PreparedRequest`.
+        """
+        data = request.body
+        if isinstance(data, bytes):
+            data = data.decode('utf-8')
+        status, data = self.handle(request.method, request.url, json.loads(data) if data else None)
+
+        response = requests.Response()
+        response.status_code = status
+        response.reason = HTTPStatus(status).phrase
+        response.headers = CaseInsensitiveDict({'Content-Type': 'application/json'})
+        response.encoding = 'utf-8'
+        response._content = json.dumps(data).encode('utf-8')
+        response.url = request.url
+        response.request = request
+        return response
+
+    @contextmanager
+    def patch(self):
+        """
+        Sends all requests made through `requests` to this backend, for the
+        pooled sessions of the ZAC as well as the ZDS clients.
+        """
+        def send(adapter, request, **kwargs):
+            return self.send(request)
+
+        with mock.patch.object(HTTPAdapter, 'send', send):
+            yield self
+
+    def reset_calls(self):
+        with self._lock:
+            self.calls.clear()
+
+    def total_calls(self):
+        with self._lock:
+            return sum(self.calls.values())
@@ -0,0 +1,214 @@
+"""
+Benchmarks of the main views of the ZAC against a mocked ZGW backend (see
+`mock_zgw`), reporting the wall time, the number of requests to the APIs and
+the peak memory usage per view.
+
+Run only the benchmarks with::
+
+    $ python src/manage.py test zac --tag benchmark
+
+The size of the backend is configured with the environment variables
+`BENCHMARK_ZAKEN`, `BENCHMARK_STATUSSEN`, `BENCHMARK_DOCUMENTEN` and
+`BENCHMARK_AUDITTRAILS`, the number of measured requests per view with
+`BENCHMARK_ROUNDS`. Set `BENCHMARK_REPORT` to a file name to write the results
+as JSON as well, to compare them between runs.
+"""
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, tag
+from django.urls import reverse
+
+from zgw_consumers.constants import APITypes, AuthTypes
+from zgw_consumers.models import Service
+
+from ..archiveren.views import ArchiverenListView
+from ..catalogue import get_catalogue_cache
+from ..models import SiteConfiguration
+from ..mor.views import MORCreateView
+from ..utils import get_uuid
+from ..zaakbeheer.views import StatusCreateView, ZaakDetailView, ZaakListView
+from .mock_zgw import BASE_URLS, MockZGWBackend
+
+SIZES = {
+    'zaken': int(os.getenv('BENCHMARK_ZAKEN', 25)),
+    'statussen': int(os.getenv('BENCHMARK_STATUSSEN', 3)),
+    'documenten': int(os.getenv('BENCHMARK_DOCUMENTEN', 3)),
+    'audittrails': int(os.getenv('BENCHMARK_AUDITTRAILS', 5)),
+}
+ROUNDS = int(os.getenv('BENCHMARK_ROUNDS', 5))
+if ROUNDS < 1:
+    raise ImproperlyConfigured('BENCHMARK_ROUNDS should be at least 1.')
+
+
+@tag('benchmark')
+class ViewBenchmarks(TestCase):
+    """
+    Every view is requested once to warm up (the API schemas and the catalogue
+    cache), and then measured for `ROUNDS` requests. The peak memory is
+    measured in a separate request, as tracing slows down the requests.
+    """
+    results = []
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.results = []
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.report(cls.results)
+        super().tearDownClass()
+
+    @classmethod
+    def setUpTestData(cls):
+        # The data set is the same for every backend, only the identifiers are
+        # needed for the configuration.
+        backend = MockZGWBackend(**SIZES)
+        zaaktype = backend.zaaktypen[0]
+
+        config = SiteConfiguration.get_solo()
+        for service in ['zrc', 'ztc', 'drc', 'brc', 'brp']:
+            setattr(config, '{}_base_url'.format(service), BASE_URLS[service])
+        config.ztc_catalogus_uuid = backend.catalogus_uuid
+        config.ztc_mor_zaaktype_uuid = get_uuid(zaaktype['url'])
+        config.ztc_mor_statustype_new_uuid = get_uuid(zaaktype['statustypen'][0])
+        config.ztc_mor_informatieobjecttype_image_uuid = get_uuid(backend.informatieobjecttype['url'])
+        config.objects_api = Service.objects.create(
+            label='Objects API', api_type=APITypes.orc, api_root=BASE_URLS['objects'], auth_type=AuthTypes.no_auth)
+        config.objecttypes_api = Service.objects.create(
+            label='Objecttypes API', api_type=APITypes.orc, api_root=BASE_URLS['objecttypes'],
+            auth_type=AuthTypes.no_auth)
+        config.save()
+
+    def setUp(self):
+        super().setUp()
+
+        # A new backend for every test, as the views create objects.
+        self.backend = MockZGWBackend(**SIZES)
+        get_catalogue_cache().clear()
+        patcher = self.backend.patch()
+        patcher.__enter__()
+        self.addCleanup(patcher.__exit__, None, None, None)
+
+    @classmethod
+    def report(cls, results):
+        lines = [
+            '',
+            'Benchmarks ({}, {} rounds)'.format(', '.join('{}={}'.format(*size) for size in SIZES.items()), ROUNDS),
+            '{:<22} {:>10} {:>10} {:>8} {:>12}'.format('View', 'Median ms', 'Min ms', 'Calls', 'Peak KiB'),
+        ]
+        for result in results:
+            lines.append('{view:<22} {median_ms:>10.1f} {min_ms:>10.1f} {upstream_calls:>8} {peak_kib:>12.0f}'.format(
+                **result))
+        sys.stderr.write('\n'.join(lines) + '\n')
+
+        path = os.getenv('BENCHMARK_REPORT')
+        if path:
+            with open(path, 'w') as f:
+                json.dump({'sizes': SIZES, 'rounds': ROUNDS, 'results': results}, f, indent=2)
+
+    def assertSuccess(self, response, status_code):
+        """
+        Asserts the status code of the response. Errors of the APIs are
+        rendered as a page with status code 200.
+        """
+        if response.context is not None and 'exception' in response.context:
+            self.fail('The view failed: {!r}'.format(response.context['exception']))
+        self.assertEqual(response.status_code, status_code)
+
+    def benchmark(self, view_class, request, status_code=200, variant=None):
+        """
+        Measures the requests made by `request`.
+
+        :param view_class: The class of the measured view.
+        :param request: A callable that makes the request with the test client.
+        :param status_code: The expected status code of the response.
+        :param variant: A description of the case, if a view is measured more
+                        than once.
+        :return: A `dict` with the results.
+        """
+        self.assertSuccess(request(), status_code)
+
+        durations = []
+        calls = []
+        for _ in range(ROUNDS):
+            self.backend.reset_calls()
+            start = time.perf_counter()
+            response = request()
+            durations.append(time.perf_counter() - start)
+            calls.append(self.backend.total_calls())
+            self.assertSuccess(response, status_code)
+
+        tracemalloc.start()
+        try:
+            request()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+        result = {
+            'view': '{} ({})'.format(view_class.__name__, variant) if variant else view_class.__name__,
+            'median_ms': statistics.median(durations) * 1000,
+            'min_ms': min(durations) * 1000,
+            'upstream_calls': max(calls),
+            'calls_by_service': dict(self.backend.calls),
+            'peak_kib': peak / 1024,
+        }
+        self.results.append(result)
+        return result
+
+    def test_zaak_list(self):
+        result = self.benchmark(ZaakListView, lambda: self.client.get(reverse('demo:zaakbeheer-index')))
+
+        # The list and a status per zaak on the page (the types are cached).
+        self.assertEqual(result['upstream_calls'], min(SIZES['zaken'], self.backend.page_size) + 1)
+
+    def test_zaak_detail(self):
+        url = reverse('demo:zaakbeheer-detail', kwargs={'uuid': get_uuid(self.backend.zaken[0]['url'])})
+
+        result = self.benchmark(ZaakDetailView, lambda: self.client.get(url))
+
+        # The zaak and its sub-resources, with one besluit, rol and object, and
+        # the document and its audit trail per document (the types are
+        # cached).
+        self.assertEqual(result['upstream_calls'], 12 + 2 * SIZES['documenten'])
+
+    def test_zaak_detail_empty(self):
+        zaak = self.backend.add_zaak(statussen=SIZES['statussen'], audittrails=SIZES['audittrails'])
+        url = reverse('demo:zaakbeheer-detail', kwargs={'uuid': get_uuid(zaak['url'])})
+
+        result = self.benchmark(ZaakDetailView, lambda: self.client.get(url), variant='empty')
+
+        # The zaak and its (empty) sub-resources, without any requests per
+        # document, besluit, rol or object.
+        self.assertEqual(result['upstream_calls'], 9)
+
+    def test_status_create(self):
+        url = reverse('demo:zaakbeheer-statuscreate', kwargs={'uuid': get_uuid(self.backend.zaken[0]['url'])})
+
+        self.benchmark(StatusCreateView, lambda: self.client.get(url))
+
+    def test_mor_create(self):
+        def request():
+            return self.client.post(reverse('demo:mor-index'), {
+                'toelichting': 'Losliggende stoeptegel',
+                'latitude': 52.37,
+                'longitude': 4.9,
+                'bijlage': SimpleUploadedFile('stoeptegel.png', b'\x89PNG' + b'\0' * 4096, content_type='image/png'),
+            })
+
+        result = self.benchmark(MORCreateView, request, status_code=302)
+
+        # The zaak, status, document and the relation between the zaak and the
+        # document are created (the types are cached).
+        self.assertEqual(result['upstream_calls'], 4)
+
+    def test_archiveren_list(self):
+        self.benchmark(ArchiverenListView, lambda: self.client.get(reverse('demo:archiveren-index')))
@@ -0,0 +1,53 @@
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from zds_client import Client
+
+from ..catalogue import CatalogueClient, get_catalogue_cache
+
+ZAAKTYPE_URL = 'http://ztc.nl/api/v1/catalogussen/1/zaaktypen/2'
+
+
+class CatalogueClientTests(SimpleTestCase):
+
+    def setUp(self):
+        super().setUp()
+
+        Client.load_config(**{'ztc-test': {'scheme': 'http', 'host': 'ztc.nl'}})
+        self.client = CatalogueClient('ztc-test', '/api/v1/')
+
+        get_catalogue_cache().clear()
+        self.addCleanup(get_catalogue_cache().clear)
+
+    @mock.patch.object(Client, 'retrieve')
+    def test_retrieve_is_cached(self, m_retrieve):
+        m_retrieve.return_value = {'url': ZAAKTYPE_URL, 'omschrijving': 'MOR'}
+
+        first = self.client.retrieve('zaaktype', url=ZAAKTYPE_URL)
+        second = self.client.retrieve('zaaktype', url=ZAAKTYPE_URL)
+
+        self.assertEqual(first, second)
+        self.assertEqual(m_retrieve.call_count, 1)
+
+    @mock.patch.object(Client, 'retrieve')
+    @mock.patch.object(Client, 'list')
+    def test_listed_resources_are_cached_by_url(self, m_list, m_retrieve):
+        m_list.return_value = {'results': [{'url': ZAAKTYPE_URL, 'omschrijving': 'MOR'}]}
+
+        self.client.list('zaaktype', catalogus_uuid='1')
+        self.client.list('zaaktype', catalogus_uuid='1')
+        zaaktype = self.client.retrieve('zaaktype', url=ZAAKTYPE_URL)
+
+        self.assertEqual(zaaktype['omschrijving'], 'MOR')
+        self.assertEqual(m_list.call_count, 1)
+        m_retrieve.assert_not_called()
+
+    @mock.patch.object(Client, 'list')
+    def test_other_resources_are_not_cached(self, m_list):
+        m_list.return_value = []
+
+        self.client.list('zaak')
+        self.client.list('zaak')
+
+        self.assertEqual(m_list.call_count, 2)
@@ -0,0 +1,44 @@
+from django.test import SimpleTestCase
+
+from zds_client import Client
+
+from ..auth import credentials_cache
+from ..client import ZACClient
+
+
+class ZACClientTests(SimpleTestCase):
+
+    def setUp(self):
+        super().setUp()
+
+        Client.load_config(**{'zrc-test': {
+            'scheme': 'http',
+            'host': 'zrc.nl',
+            'auth': {
+                'client_id': 'zac',
+                'secret': 'secret',
+                'user_id': 'anonymous',
+                'user_representation': 'Anonymous',
+            },
+        }})
+        self.client = ZACClient('zrc-test', '/api/v1/')
+
+    def test_for_user_leaves_shared_client_untouched(self):
+        user_client = self.client.for_user('jdoe', 'John Doe')
+
+        self.assertEqual(user_client.auth.user_id, 'jdoe')
+        self.assertEqual(user_client.auth.user_representation, 'John Doe')
+        self.assertEqual(user_client.auth.client_id, 'zac')
+        self.assertEqual(user_client.base_url, self.client.base_url)
+        self.assertEqual(self.client.auth.user_id, 'anonymous')
+
+    def test_credentials_are_cached(self):
+        credentials_cache.clear()
+
+        first = self.client.for_user('jdoe', 'John Doe').auth.credentials()
+        second = self.client.for_user('jdoe', 'John Doe').auth.credentials()
+        other = self.client.for_user('janedoe', 'Jane Doe').auth.credentials()
+
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, other)
+        self.assertEqual(credentials_cache.stats(), {'entries': 2, 'hits': 1, 'misses': 2})
@@ -0,0 +1,82 @@
+import time
+
+from django.test import SimpleTestCase
+
+from ..concurrency import FetchPlan, FetchTimeout, run_concurrently
+
+
+class RunConcurrentlyTests(SimpleTestCase):
+
+    def test_results_keep_order(self):
+        results = run_concurrently(lambda x: x * 2, [3, 2, 1], max_workers=3)
+
+        self.assertEqual(results, [6, 4, 2])
+
+
+class FetchPlanTests(SimpleTestCase):
+
+    def test_dependencies_are_passed(self):
+        plan = FetchPlan(max_workers=4, timeout=5)
+        plan.add('zaak', lambda: {'url': 'zaak-1', 'besluiten': [1, 2]})
+        plan.add('besluiten', lambda zaak: zaak['besluiten'], depends_on=['zaak'])
+        plan.add('audittrails', lambda besluit, zaak: (zaak['url'], besluit), depends_on=['zaak'], each='besluiten')
+
+        results = plan.execute()
+
+        self.assertEqual(results['besluiten'], [1, 2])
+        self.assertEqual(results['audittrails'], [('zaak-1', 1), ('zaak-1', 2)])
+
+    def test_each_with_empty_result(self):
+        plan = FetchPlan(max_workers=2, timeout=5)
+        plan.add('besluiten', lambda: [])
+        plan.add('audittrails', lambda besluit: besluit, each='besluiten')
+        plan.add('count', lambda audittrails: len(audittrails), depends_on=['audittrails'])
+
+        results = plan.execute()
+
+        self.assertEqual(results['audittrails'], [])
+        self.assertEqual(results['count'], 0)
+
+    def test_each_with_empty_result_last(self):
+        plan = FetchPlan(max_workers=2, timeout=5)
+        plan.add('zaak', lambda: 'zaak-1')
+        plan.add('besluiten', lambda zaak: [], depends_on=['zaak'])
+        plan.add('audittrails', lambda besluit: besluit, each='besluiten')
+
+        results = plan.execute()
+
+        self.assertEqual(results['besluiten'], [])
+        self.assertEqual(results['audittrails'], [])
+
+    def test_independent_fetches_run_concurrently(self):
+        plan = FetchPlan(max_workers=4, timeout=5)
+        for name in ['a', 'b', 'c', 'd']:
+            plan.add(name, lambda: time.sleep(0.2))
+
+        start = time.monotonic()
+        plan.execute()
+
+        self.assertLess(time.monotonic() - start, 0.6)
+
+    def test_unknown_dependency(self):
+        plan = FetchPlan()
+
+        with self.assertRaises(ValueError):
+            plan.add('besluittypen', lambda besluiten: besluiten, depends_on=['besluiten'])
+
+    def test_exception_is_raised(self):
+        def fail():
+            raise KeyError('zaak')
+
+        plan = FetchPlan(max_workers=2, timeout=5)
+        plan.add('zaak', fail)
+
+        with self.assertRaises(KeyError):
+            plan.execute()
+
+    def test_timeout(self):
+        plan = FetchPlan(max_workers=2, timeout=0.1)
+        plan.add('zaak', lambda: time.sleep(1))
+
+        with self.assertRaises(FetchTimeout):
+            plan.execute()
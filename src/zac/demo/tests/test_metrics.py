@@ -0,0 +1,45 @@
+from django.test import SimpleTestCase
+
+from ..metrics import Histogram, record_upstream_request, upstream_requests
+
+
+class HistogramTests(SimpleTestCase):
+
+    def test_observe(self):
+        histogram = Histogram('duration_seconds', 'Duration.', ['service'], buckets=[0.1, 1])
+
+        histogram.observe(0.05, service='zrc')
+        histogram.observe(0.5, service='zrc')
+        histogram.observe(5, service='zrc')
+
+        series = histogram.collect()[('zrc', )]
+        self.assertEqual(series['buckets'], [1, 1, 1])
+        self.assertEqual(series['count'], 3)
+        self.assertAlmostEqual(series['sum'], 5.55)
+
+    def test_render(self):
+        histogram = Histogram('duration_seconds', 'Duration.', ['service'], buckets=[0.1, 1])
+        histogram.observe(0.05, service='z"rc')
+        histogram.observe(0.5, service='z"rc')
+
+        self.assertEqual(histogram.render(), (
+            '# HELP duration_seconds Duration.\n'
+            '# TYPE duration_seconds histogram\n'
+            'duration_seconds_bucket{service="z\\"rc",le="0.1"} 1\n'
+            'duration_seconds_bucket{service="z\\"rc",le="1.0"} 2\n'
+            'duration_seconds_bucket{service="z\\"rc",le="+Inf"} 2\n'
+            'duration_seconds_sum{service="z\\"rc"} 0.55\n'
+            'duration_seconds_count{service="z\\"rc"} 2\n'
+        ))
+
+    def test_record_upstream_request(self):
+        upstream_requests.clear()
+
+        with self.assertLogs('performance', level='INFO'):
+            record_upstream_request('zrc', 'zaak_list', 200, 0.2)
+            record_upstream_request('zrc', 'status_partial_update', 'error', 1.5)
+
+        self.assertEqual(
+            sorted(upstream_requests.collect()),
+            [('zrc', 'status', 'partial_update', 'error'), ('zrc', 'zaak', 'list', '200')]
+        )
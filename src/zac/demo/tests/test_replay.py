@@ -0,0 +1,64 @@
+import json
+import threading
+
+from django.test import SimpleTestCase
+
+import requests
+
+from ..replay import RecordingLog, create_servers, to_fixture_entry
+
+ZAAK = {'url': 'http://zrc.nl/api/v1/zaken/1', 'zaaktype': 'http://ztc.nl/api/v1/zaaktypen/1'}
+
+
+class ReplayTests(SimpleTestCase):
+
+    def setUp(self):
+        super().setUp()
+
+        log = RecordingLog()
+        log.add('zrc', 'http://zrc.nl/api/v1/zaken', 'GET', {}, None, 200, {'Content-Type': 'application/json'},
+                {'results': [ZAAK]}, params={'identificatie': 'ZAAK-1'})
+        log.add('brp', 'http://brp.nl/ingeschrevenpersonen/1', 'GET', {}, None, 200, {}, b'{"naam": "Jan"}')
+
+        self.fixture = {
+            'entries': [to_fixture_entry(entry) for entry in log.recorded],
+            'schemas': {'http://zrc.nl/api/v1/schema/openapi.yaml': {'openapi': '3.0.0'}},
+        }
+
+        self.replay, self.servers = create_servers(self.fixture, port=0)
+        for server in self.servers:
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    def tearDown(self):
+        for server in self.servers:
+            server.shutdown()
+            server.server_close()
+        super().tearDown()
+
+    def test_fixture_entry(self):
+        self.assertEqual(self.fixture['entries'][0]['url'], 'http://zrc.nl/api/v1/zaken?identificatie=ZAAK-1')
+        self.assertEqual(self.fixture['entries'][1]['body'], {'naam': 'Jan'})
+
+    def test_replay_with_rewritten_urls(self):
+        zrc = self.replay.base_urls['http://zrc.nl']
+
+        response = requests.get(zrc + '/api/v1/zaken', params={'identificatie': 'ZAAK-1'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['results'][0], {
+            'url': zrc + '/api/v1/zaken/1',
+            # Nothing was recorded for the ZTC.
+            'zaaktype': 'http://ztc.nl/api/v1/zaaktypen/1',
+        })
+
+    def test_replay_schema(self):
+        zrc = self.replay.base_urls['http://zrc.nl']
+
+        response = requests.get(zrc + '/api/v1/schema/openapi.yaml', params={'v': '3'})
+
+        self.assertEqual(json.loads(response.content), {'openapi': '3.0.0'})
+
+    def test_not_recorded(self):
+        response = requests.get(self.replay.base_urls['http://brp.nl'] + '/ingeschrevenpersonen/2')
+
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,76 @@
+from django.http import HttpResponse
+from django.template import engines
+from django.template.response import TemplateResponse
+from django.test import RequestFactory, SimpleTestCase
+from django.views.generic import View
+
+from ..metrics import record_upstream_request
+from ..middleware import ServerTimingMiddleware
+from ..mixins import ZACViewMixin
+from ..timing import RequestTimings
+
+
+class UpstreamView(ZACViewMixin, View):
+    upstream_call_budget = 1
+
+    def get(self, request, *args, **kwargs):
+        for i in range(int(request.GET['calls'])):
+            record_upstream_request('zrc', 'zaak_read', 200, 0.01)
+        return HttpResponse()
+
+
+class RequestTimingsTests(SimpleTestCase):
+
+    def test_header(self):
+        timings = RequestTimings()
+        timings.add_upstream('zrc', 0.1)
+        timings.add_upstream('ztc', 0.02)
+        timings.add_upstream('zrc', 0.05)
+        timings.add_template(0.003)
+
+        self.assertEqual(timings.header(total=0.5), (
+            'upstream;dur=170.0;desc="3 calls", upstream-zrc;dur=150.0, upstream-ztc;dur=20.0, '
+            'db;dur=0.0;desc="0 queries", template;dur=3.0, total;dur=500.0'
+        ))
+
+
+class ServerTimingMiddlewareTests(SimpleTestCase):
+
+    def test_server_timing_header(self):
+        template = engines['django'].from_string('{{ value }}')
+
+        def view(request):
+            record_upstream_request('zrc', 'zaak_list', 200, 0.02)
+            return TemplateResponse(request, template, {'value': 'ok'})
+
+        def get_response(request):
+            response = middleware.process_template_response(request, view(request))
+            return response.render()
+
+        middleware = ServerTimingMiddleware(get_response)
+        response = middleware(RequestFactory().get('/'))
+
+        header = response['Server-Timing']
+        self.assertIn('upstream;dur=20.0;desc="1 calls"', header)
+        self.assertIn('upstream-zrc;dur=20.0', header)
+        self.assertIn('template;dur=', header)
+        self.assertIn('total;dur=', header)
+
+
+class UpstreamCallBudgetTests(SimpleTestCase):
+
+    def _get(self, calls):
+        request = RequestFactory().get('/', {'calls': calls})
+        request.session = {}
+        return UpstreamView.as_view()(request)
+
+    def test_within_budget(self):
+        with self.assertRaises(AssertionError):
+            with self.assertLogs('performance', level='WARNING'):
+                self._get(1)
+
+    def test_budget_exceeded(self):
+        with self.assertLogs('performance', level='WARNING') as logs:
+            self._get(2)
+
+        self.assertIn('UpstreamView made 2 calls to the APIs', logs.output[0])
@@ -0,0 +1,138 @@
+from django.contrib.sessions.backends.db import SessionStore
+from django.http import HttpResponse
+from django.test import (
+    RequestFactory, SimpleTestCase, TestCase, override_settings
+)
+from django.urls import reverse
+from django.views.generic import View
+
+from ..concurrency import run_concurrently
+from ..mixins import ZACViewMixin
+from ..traffic import (
+    SESSION_IDS_KEY, TrafficLog, start_traffic_log, stop_traffic_log,
+    store_traffic_log, traffic_log
+)
+
+
+def _add(log, url, data=None):
+    log.add('zrc', url, 'GET', {}, None, 200, {}, data)
+
+
+class TrafficView(ZACViewMixin, View):
+
+    def get(self, request, *args, **kwargs):
+        _add(traffic_log, 'http://zrc.nl/api/v1/zaken')
+        return HttpResponse()
+
+
+class TrafficLogTests(SimpleTestCase):
+
+    def test_ring_buffer(self):
+        log = TrafficLog(max_entries=2)
+        for i in range(3):
+            _add(log, 'http://zrc.nl/{}'.format(i))
+
+        urls = [entry['request']['url'] for entry in log.entries()]
+        self.assertEqual(urls, ['http://zrc.nl/1', 'http://zrc.nl/2'])
+
+    def test_truncates_bodies(self):
+        log = TrafficLog(max_body_length=10)
+        _add(log, 'http://zrc.nl/', data={'foo': 'x' * 100})
+        _add(log, 'http://zrc.nl/', data=['x'])
+
+        truncated, small = log.entries()
+        self.assertTrue(truncated['response']['data'].startswith('{"foo": "x'))
+        self.assertEqual(small['response']['data'], ['x'])
+
+    def test_redacts_credentials(self):
+        log = TrafficLog()
+        log.add('zrc', 'http://zrc.nl/', 'GET', {'Authorization': 'Bearer abc', 'Accept': 'application/json'},
+                None, 200, {}, None)
+
+        self.assertEqual(log.entries()[0]['request']['headers'], {'Authorization': '***', 'Accept': 'application/json'})
+
+    def test_no_bodies(self):
+        log = TrafficLog(capture_bodies=False)
+        _add(log, 'http://zrc.nl/', data={'foo': 'bar'})
+
+        self.assertIsNone(log.entries()[0]['response']['data'])
+
+    @override_settings(TRAFFIC_LOG_MAX_ENTRIES=10)
+    def test_request_scoped(self):
+        self.assertEqual(traffic_log.entries(), [])
+
+        token = start_traffic_log()
+        try:
+            run_concurrently(lambda url: _add(traffic_log, url), ['http://zrc.nl/1', 'http://zrc.nl/2'])
+            self.assertEqual(len(traffic_log.entries()), 2)
+
+            inner = start_traffic_log()
+            self.assertEqual(traffic_log.entries(), [])
+            stop_traffic_log(inner)
+
+            self.assertEqual(len(traffic_log.entries()), 2)
+        finally:
+            stop_traffic_log(token)
+
+        self.assertEqual(traffic_log.entries(), [])
+
+
+class TrafficLogViewTests(TestCase):
+
+    def _store(self, session):
+        request = RequestFactory().get('/')
+        request.session = session
+
+        token = start_traffic_log()
+        try:
+            _add(traffic_log, 'http://zrc.nl/api/v1/zaken', data={'foo': 'bar'})
+            log_id = store_traffic_log(request)
+        finally:
+            stop_traffic_log(token)
+
+        session.save()
+        return log_id
+
+    def test_stored_log(self):
+        log_id = self._store(self.client.session)
+
+        response = self.client.get(reverse('demo:traffic-log', kwargs={'log_id': log_id}))
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['count'], 1)
+        self.assertIn('zaken', data['html'])
+
+    def test_log_of_other_session(self):
+        log_id = self._store(self.client_class().session)
+
+        response = self.client.get(reverse('demo:traffic-log', kwargs={'log_id': log_id}))
+
+        self.assertEqual(response.status_code, 404)
+
+    def test_unknown_log(self):
+        response = self.client.get(reverse('demo:traffic-log', kwargs={'log_id': 'unknown'}))
+
+        self.assertEqual(response.status_code, 404)
+
+
+class TrafficLogPanelTests(TestCase):
+
+    def _get(self):
+        request = RequestFactory().get('/')
+        request.session = SessionStore()
+        TrafficView.as_view()(request)
+        return request
+
+    @override_settings(TRAFFIC_LOG_PANEL=True)
+    def test_stored_with_panel(self):
+        request = self._get()
+
+        self.assertEqual(len(request.session[SESSION_IDS_KEY]), 1)
+
+    @override_settings(TRAFFIC_LOG_PANEL=False)
+    def test_not_stored_without_panel(self):
+        with self.assertNumQueries(0):
+            request = self._get()
+
+        self.assertFalse(request.session.modified)
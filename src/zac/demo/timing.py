@@ -0,0 +1,98 @@
+"""
+Request-scoped timing of the work done for a response.
+
+`ServerTimingMiddleware` (see `zac.demo.middleware`) starts `RequestTimings`
+for every request, available through a context variable. The time spent in
+requests to the APIs (per service), database queries and template rendering is
+added to it and reported in the `Server-Timing` header of the response.
+"""
+import contextvars
+import threading
+import time
+from collections import OrderedDict
+
+_current_timings = contextvars.ContextVar('request_timings', default=None)
+
+
+class RequestTimings:
+    """
+    The time spent per kind of work, in seconds. Requests to the APIs can be
+    made from multiple threads (see `zac.demo.concurrency`), so their times
+    add up to more than the duration of the request.
+    """
+
+    def __init__(self):
+        self.upstream = OrderedDict()
+        self.upstream_calls = 0
+        self.db = 0.0
+        self.db_queries = 0
+        self.template = 0.0
+
+        self._lock = threading.Lock()
+
+    def add_upstream(self, service, duration):
+        with self._lock:
+            self.upstream[service] = self.upstream.get(service, 0.0) + duration
+            self.upstream_calls += 1
+
+    def add_template(self, duration):
+        with self._lock:
+            self.template += duration
+
+    def db_wrapper(self, execute, sql, params, many, context):
+        """
+        Times a database query, see `connection.execute_wrapper`.
+        """
+        start = time.monotonic()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            with self._lock:
+                self.db += time.monotonic() - start
+                self.db_queries += 1
+
+    def header(self, total=None):
+        """
+        Returns the value for the `Server-Timing` header.
+
+        :param total: The duration of the entire request, in seconds.
+        """
+        def metric(name, duration, description=None):
+            value = '{};dur={:.1f}'.format(name, duration * 1000)
+            if description:
+                value += ';desc="{}"'.format(description)
+            return value
+
+        with self._lock:
+            metrics = [metric('upstream', sum(self.upstream.values()), '{} calls'.format(self.upstream_calls))]
+            metrics += [
+                metric('upstream-{}'.format(service), duration) for service, duration in self.upstream.items()
+            ]
+            metrics += [
+                metric('db', self.db, '{} queries'.format(self.db_queries)),
+                metric('template', self.template),
+            ]
+
+        if total is not None:
+            metrics.append(metric('total', total))
+        return ', '.join(metrics)
+
+
+def start_request_timings():
+    """
+    Starts new `RequestTimings` for the current context.
+
+    :return: A `Token` to pass to `stop_request_timings`.
+    """
+    return _current_timings.set(RequestTimings())
+
+
+def stop_request_timings(token):
+    _current_timings.reset(token)
+
+
+def get_request_timings():
+    """
+    Returns the `RequestTimings` of the current context, or `None`.
+    """
+    return _current_timings.get()
@@ -0,0 +1,248 @@
+"""
+Request-scoped log of the network traffic with the APIs.
+
+The ZDS client logs every request in a process-wide `Log`, where entries of
+concurrent requests get mixed up. Instead, every request of the ZAC gets its
+own bounded `TrafficLog`, available through a context variable, and the ZDS
+client `Log` is replaced by `traffic_log` that writes to it.
+
+If the network traffic panel is enabled (see the `TRAFFIC_LOG_PANEL`
+setting), logs are stored by their identifier in the cache configured by the
+`TRAFFIC_LOG_CACHE` setting, which is shared by all processes, and are only
+fetched by the browser when the panel is opened. The identifiers are kept in
+the session, so a log can only be fetched by the session it was made for. The
+credentials in the request headers are not stored.
+"""
+import contextvars
+import json
+import threading
+import uuid
+from collections import deque
+from datetime import datetime
+
+from django.conf import settings
+from django.core.cache import caches
+
+from zds_client import Client
+
+_current_log = contextvars.ContextVar('traffic_log', default=None)
+
+# Request headers with credentials, that are left out of the log.
+REDACTED_HEADERS = ('authorization', 'x-api-key')
+
+
+def _truncate(data, max_length):
+    """
+    Returns `data` or, if its JSON representation is longer than `max_length`,
+    a truncated `string` of that representation.
+    """
+    if data is None or not max_length:
+        return data
+
+    try:
+        serialized = json.dumps(data, default=str)
+    except (TypeError, ValueError):
+        serialized = str(data)
+
+    if len(serialized) <= max_length:
+        return data
+    return '{}... ({} tekens weggelaten)'.format(serialized[:max_length], len(serialized) - max_length)
+
+
+def _redact(headers):
+    if not headers:
+        return headers
+    return {
+        header: '***' if header.lower() in REDACTED_HEADERS else value
+        for header, value in headers.items()
+    }
+
+
+class TrafficLog:
+    """
+    A ring buffer of request and response entries, in the format of the ZDS
+    client `Log`.
+    """
+
+    def __init__(self, max_entries=None, max_body_length=None, capture_bodies=None):
+        if max_entries is None:
+            max_entries = settings.TRAFFIC_LOG_MAX_ENTRIES
+        if max_body_length is None:
+            max_body_length = settings.TRAFFIC_LOG_MAX_BODY_LENGTH
+        if capture_bodies is None:
+            capture_bodies = settings.TRAFFIC_LOG_CAPTURE_BODIES
+
+        self.id = uuid.uuid4().hex
+        self.max_body_length = max_body_length
+        self.capture_bodies = capture_bodies
+
+        self._entries = deque(maxlen=max_entries)
+        self._lock = threading.Lock()
+
+    def _body(self, data):
+        if not self.capture_bodies:
+            return None
+        return _truncate(data, self.max_body_length)
+
+    def add(self, service, url, method, request_headers, request_data, response_status, response_headers,
+            response_data, params=None):
+        entry = {
+            'timestamp': datetime.now(),
+            'service': service,
+            'request': {
+                'url': url,
+                'method': method,
+                'headers': _redact(request_headers),
+                'data': self._body(request_data),
+                'params': params,
+            },
+            'response': {
+                'status': response_status,
+                'headers': response_headers,
+                'data': self._body(response_data),
+            },
+        }
+
+        with self._lock:
+            self._entries.append(entry)
+
+    def extend(self, entries):
+        with self._lock:
+            self._entries.extend(entries)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def entries(self):
+        with self._lock:
+            return list(self._entries)
+
+
+def start_traffic_log():
+    """
+    Starts a new `TrafficLog` for the current context.
+
+    :return: A `Token` to pass to `stop_traffic_log`.
+    """
+    return _current_log.set(TrafficLog())
+
+
+def stop_traffic_log(token):
+    _current_log.reset(token)
+
+
+def get_traffic_log():
+    """
+    Returns the `TrafficLog` of the current context, or `None`.
+    """
+    return _current_log.get()
+
+
+class CurrentTrafficLog:
+    """
+    Drop-in replacement of the ZDS client `Log` that writes to the
+    `TrafficLog` of the current context. Outside of a context with a
+    `TrafficLog`, like in management commands, nothing is logged.
+    """
+
+    def add(self, *args, **kwargs):
+        log = get_traffic_log()
+        if log is not None:
+            log.add(*args, **kwargs)
+
+    def clear(self):
+        log = get_traffic_log()
+        if log is not None:
+            log.clear()
+
+    def entries(self):
+        log = get_traffic_log()
+        if log is None:
+            return []
+        return log.entries()
+
+
+traffic_log = CurrentTrafficLog()
+
+SESSION_KEY = 'traffic_log_id'
+SESSION_IDS_KEY = 'traffic_log_ids'
+
+# The number of most recent logs of a session that can be fetched.
+MAX_SESSION_LOGS = 10
+
+
+def _cache_key(log_id):
+    return 'traffic-log:{}'.format(log_id)
+
+
+def get_traffic_log_cache():
+    return caches[settings.TRAFFIC_LOG_CACHE]
+
+
+def store_traffic_log(request):
+    """
+    Stores the entries of the current `TrafficLog` in the cache, by the
+    identifier of the log, and adds the identifier to the session.
+
+    :param request: The `HttpRequest`.
+    :return: The identifier of the stored log, or `None`.
+    """
+    log = get_traffic_log()
+    if log is None:
+        return None
+
+    get_traffic_log_cache().set(_cache_key(log.id), log.entries(), settings.TRAFFIC_LOG_TIMEOUT)
+
+    log_ids = request.session.get(SESSION_IDS_KEY, [])
+    request.session[SESSION_IDS_KEY] = (log_ids + [log.id])[-MAX_SESSION_LOGS:]
+    return log.id
+
+
+def load_traffic_log(log_id, request=None):
+    """
+    Returns the entries of a stored log, or `None` if it's not (or no longer)
+    available.
+
+    :param log_id: The identifier of the log.
+    :param request: The `HttpRequest`. If given, only the logs that were
+                    stored for its session are returned.
+    """
+    if request is not None and log_id not in request.session.get(SESSION_IDS_KEY, []):
+        return None
+    return get_traffic_log_cache().get(_cache_key(log_id))
+
+
+def save_traffic_log(request):
+    """
+    Stores the current `TrafficLog` and remembers it in the session, so it can
+    be shown on the next page (after a redirect).
+
+    :param request: The `HttpRequest`.
+    :return: The identifier of the stored log.
+    """
+    log_id = store_traffic_log(request)
+    request.session[SESSION_KEY] = log_id
+    return log_id
+
+
+def restore_traffic_log(request):
+    """
+    Adds the entries of the log, that was last saved for this session, to the
+    current `TrafficLog`.
+
+    :param request: The `HttpRequest`.
+    """
+    log = get_traffic_log()
+    log_id = request.session.get(SESSION_KEY)
+    if log is None or not log_id:
+        return
+
+    log.extend(load_traffic_log(log_id, request) or [])
+
+
+def install():
+    """
+    Let all ZDS clients log to the `TrafficLog` of the current context.
+    """
+    Client._log = traffic_log
@@ -1,6 +1,8 @@
 from django.urls import include, path
 from django.views.generic import RedirectView
 
+from .views import TrafficLogView
+
 app_name = 'demo'
 urlpatterns = [
     path('', RedirectView.as_view(pattern_name='index')),
@@ -12,4 +14,5 @@ urlpatterns = [
     path('mijngemeente/', include('zac.demo.mijngemeente.urls')),
     path('objectsdata/', include('zac.demo.objectdata.urls')),
     path('objectsmor/', include('zac.demo.objects_mor.urls')),
+    path('traffic/<str:log_id>/', TrafficLogView.as_view(), name='traffic-log'),
 ]
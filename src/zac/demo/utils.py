@@ -6,7 +6,8 @@ from django.shortcuts import render
 from django.utils.translation import ugettext_lazy as _
 
 from zds_client import ClientError
-from zds_client.log import Log
+
+from .traffic import get_traffic_log
 
 
 def exception_to_validation_errors(exc):
@@ -43,6 +44,8 @@ def render_exception_to_response(request, exc, context=None):
     if context is None:
         context = {}
 
+    log = get_traffic_log()
+
     error = None
     if type(exc) is ClientError:
         try:
@@ -58,7 +61,7 @@ def render_exception_to_response(request, exc, context=None):
         },
         'error': error,
         'exception': exc,
-        'log_entries': Log.entries()
+        'traffic_log_id': log.id if log else None,
     })
 
     return render(request, 'demo/error.html', context)
@@ -124,18 +127,6 @@ def extract_pagination_info(response: dict, page_param='page') -> dict:
     return pagination
 
 
-def fetch_paginated_list(client, resource: str) -> list:
-    response = client.list(resource)
-    results = response["results"]
-
-    while(response.get("next")):
-        next_page = extract_page_from_url(response["next"])
-        response = client.list(resource, query_params={"page": next_page})
-        results += response["results"]
-
-    return results
-
-
 def get_uuid(url, index=-1):
     return url.split('/')[index]
 
@@ -0,0 +1,25 @@
+from django.http import Http404, JsonResponse
+from django.template.loader import render_to_string
+from django.views import View
+
+from .traffic import load_traffic_log
+
+
+class TrafficLogView(View):
+    """
+    Returns the network traffic panel of a stored traffic log, rendered as
+    HTML in a JSON response. Only the logs of the current session are
+    available.
+    """
+
+    def get(self, request, log_id):
+        entries = load_traffic_log(log_id, request)
+        if entries is None:
+            raise Http404('Traffic log not found')
+
+        return JsonResponse({
+            'count': len(entries),
+            'html': render_to_string('includes/networktraffic_entries.html', {
+                'log_entries': entries,
+            }, request=request),
+        })
@@ -2,6 +2,7 @@ import copy
 import datetime
 import json
 import logging
+import time
 
 from django import forms
 from django.contrib import messages
@@ -9,17 +10,19 @@ from django.urls import reverse
 from django.utils.safestring import mark_safe
 from django.views.generic import FormView, TemplateView
 
-import requests
 from dictdiffer import diff
 from djchoices import ChoiceItem, DjangoChoices
 from zds_client.client import ClientError
 
-from ..api import get_objecttypes_by_url, retrieve_object
+from ..api import get_catalogue_objects, retrieve_many
+from ..concurrency import FetchPlan
+from ..metrics import record_upstream_request
 from ..mixins import ZACViewMixin
 from ..models import SiteConfiguration, client
+from ..sessions import get_session
 from ..utils import (
-    api_response_list_to_dict, extract_pagination_info, fetch_paginated_list,
-    format_dict_diff, get_uuid, isodate
+    api_response_list_to_dict, extract_pagination_info, format_dict_diff,
+    get_uuid, isodate
 )
 
 logger = logging.getLogger(__name__)
@@ -43,30 +46,21 @@ class ZaakListView(ZACViewMixin, TemplateView):
 
         zaken_response = client('zrc').list('zaak', query_params=query_params)
 
+        # Retrieve the current Status of the Zaken on this page only.
         # TODO: Workaround: The status should be done with embedding when
         # requesting a list of Zaken.
-        statusses_by_url = api_response_list_to_dict(fetch_paginated_list(client('zrc'), 'status'))
+        statusses_by_url = retrieve_many('zrc', 'status', [
+            zaak['status'] for zaak in zaken_response['results']
+        ])
 
         # Retrieve a list of all ZaakTypen from the "main" ZTC
         zaaktypen = client('ztc').list('zaaktype', catalogus_uuid=config.ztc_catalogus_uuid)['results']
         zaaktypes_by_url = api_response_list_to_dict(zaaktypen)
 
-        # Retrieve a list of StatusTypen from the "main" ZTC.
-        # TODO: Workaround: We cannot get a full list of all StatusTypes, so we
-        # make a call for each Zaaktype, to get the available Statustypes.
-        statustypen = []
-        for zaaktype in zaaktypen:
-            # Workaround: UUID is not part of the serialiser yet, otherwise it was simply: zaaktype['uuid']
-            statustypen += (
-                client('ztc')
-                .list(
-                    'statustype',
-                    catalogus_uuid=config.ztc_catalogus_uuid,
-                    zaaktype_uuid=get_uuid(zaaktype['url'])
-                )['results']
-            )
-        statustypen_by_url = dict([
-            (statustype['url'], statustype) for statustype in statustypen
+        # Resolve the StatusTypen of the Zaken on this page only, in one go.
+        statustypen_by_url = get_catalogue_objects('statustype', [
+            statusses_by_url[zaak['status']]['statustype']
+            for zaak in zaken_response['results'] if zaak['status'] in statusses_by_url
         ])
 
         # Construct template vars.
@@ -102,14 +96,6 @@ class ZaakListView(ZACViewMixin, TemplateView):
             if status:
                 statustype = statustypen_by_url.get(status['statustype'])
 
-                # If the StatusType is not in the "main" ZTC, retrieve it
-                # manually.
-                if statustype is None:
-                    statustype = (
-                        client('ztc', url=status['statustype'])
-                        .retrieve('statustype', url=status['statustype'])
-                    )
-
             detail_url = reverse('demo:zaakbeheer-detail', kwargs={'uuid': get_uuid(zaak['url'])})
 
             rows.append([
@@ -147,6 +133,8 @@ class ZaakDetailView(ZACViewMixin, FormView):
     subtitle = 'Details van een Zaak uit het ZRC'
     template_name = 'demo/zaakbeheer/zaak_detail.html'
     form_class = ZaakForm
+    # About 12 calls, plus 2 per document, 1 per besluit and 1 per rol.
+    upstream_call_budget = 30
 
     def _pre_dispatch(self, request, *args, **kwargs):
         self.config = SiteConfiguration.get_solo()
@@ -210,68 +198,94 @@ class ZaakDetailView(ZACViewMixin, FormView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
 
+        zaak_url = self.zaak['url']
+
+        # All sub-resources of the Zaak are fetched concurrently. Each fetch
+        # starts as soon as the fetches it depends on are done. The clients are
+        # created up front, to keep database queries out of the threads.
+        drc_client = client('drc')
+        brc_client = client('brc')
+        objects_client = self.config.objects_api.build_client()
+        objecttypes_client = self.config.objecttypes_api.build_client()
+
+        plan = FetchPlan()
+
         # Retrieve a list of Status (this is possible because we need the types
         # for just this Zaak of a certain ZaakType).
         # TODO: grab other pages
-        status_list = self.zrc_client.list('status', query_params={'zaak': self.zaak['url']})["results"]
-        statustypes_by_url = api_response_list_to_dict(
+        plan.add('status_list', lambda: self.zrc_client.list('status', query_params={'zaak': zaak_url})['results'])
+        plan.add('statustypes_by_url', lambda: api_response_list_to_dict(
             self.ztc_client.list('statustype', catalogus_uuid=self.catalogus_uuid, zaaktype_uuid=get_uuid(self.zaak['zaaktype']))
-        )
-        # Amend the resulting besluiten with their respective type.
-        for status in status_list:
-            status['statustype_embedded'] = statustypes_by_url.get(status['statustype'], None)
+        ))
 
         # Retrieve a list of EnkelvoudigInformatieObject
         #
         # Look at the relation from the DRC-perspective to include documents
         # linked to Besluiten as well. Skip InformatieObjectType for now as I
         # don't see any use for it.
-        document_relation_list = client('drc').list('objectinformatieobject', query_params={'object': self.zaak['url']})
-        document_list = []
-        for dr in document_relation_list:
-            try:
-                document = client('drc').retrieve('enkelvoudiginformatieobject', uuid=get_uuid(dr['informatieobject']))
-            except ClientError as e:
-                logger.exception(e)
-                continue
-            document_list.append(document)
+        plan.add('document_relation_list', lambda: drc_client.list('objectinformatieobject', query_params={'object': zaak_url}))
+        plan.add('document_list', lambda dr: _retrieve_or_none(
+            drc_client, 'enkelvoudiginformatieobject', uuid=get_uuid(dr['informatieobject'])
+        ), each='document_relation_list')
 
         # Retrieve a list of Besluiten
-        besluit_list = client('brc').list('besluit', query_params={'zaak': self.zaak['url']})['results']
-        besluittypes_by_url = api_response_list_to_dict(
+        plan.add('besluit_list', lambda: brc_client.list('besluit', query_params={'zaak': zaak_url})['results'])
+        plan.add('besluittypes_by_url', lambda: api_response_list_to_dict(
             self.ztc_client.list('besluittype', catalogus_uuid=self.catalogus_uuid)
-        )
-        # Amend the resulting besluiten with their respective type.
-        for besluit in besluit_list:
-            besluit['besluittype_embedded'] = besluittypes_by_url.get(besluit['besluittype'], None)
+        ))
 
         # Retrieve the Resultaat and ResultaatType
-        resultaat = None
-        resultaat_type = None
-
-        if self.zaak['resultaat']:
-            resultaat = self.zrc_client.retrieve('resultaat', url=self.zaak['resultaat'])
-            try:
-                resultaat_type = self.ztc_client.retrieve('resultaattype', url=resultaat['resultaattype'])
-            except ClientError as e:
-                logger.exception(e)
-            resultaat['resultaattype_embedded'] = resultaat_type
+        plan.add('resultaat', lambda: (
+            self.zrc_client.retrieve('resultaat', url=self.zaak['resultaat']) if self.zaak['resultaat'] else None
+        ))
+        plan.add('resultaat_type', lambda resultaat: (
+            _retrieve_or_none(self.ztc_client, 'resultaattype', url=resultaat['resultaattype']) if resultaat else None
+        ), depends_on=['resultaat'])
 
         # Retrieve list of AuditTrails associated with this Zaak
-        zrc_audittrail_list = client('zrc').list('audittrail', zaak_uuid=get_uuid(self.zaak['url']))
+        plan.add('zrc_audittrail_list', lambda: self.zrc_client.list('audittrail', zaak_uuid=get_uuid(zaak_url)))
+        plan.add('drc_audittrail_lists', lambda oio: drc_client.list(
+            'audittrail', enkelvoudiginformatieobject_uuid=get_uuid(oio['informatieobject'])
+        ), each='document_relation_list')
+        plan.add('brc_audittrail_lists', lambda besluit: brc_client.list(
+            'audittrail', besluit_uuid=get_uuid(besluit['url'])
+        ), each='besluit_list')
 
-        drc_audittrail_list = []
-        for oio in document_relation_list:
-            drc_audittrail_list += client('drc').list(
-                'audittrail',
-                enkelvoudiginformatieobject_uuid=get_uuid(oio['informatieobject'])
-            )
+        # Betrokkenen/Rollen
+        # TODO: fetch extra pages
+        plan.add('rollen_list', lambda: self.zrc_client.list('rol', query_params={'zaak': zaak_url})['results'])
+        plan.add('rollen_personen', lambda rol: (
+            get_personen(self.config, self.zrc_client, url=rol['betrokkene']) if rol['betrokkene'] else []
+        ), each='rollen_list')
 
-        brc_audittrail_list = []
+        # Objects
+        plan.add('objecttypes_by_url', lambda: api_response_list_to_dict(objecttypes_client.list('objecttype')))
+        plan.add('zaak_objects', lambda: self.zrc_client.list('zaakobject', query_params={'zaak': zaak_url})['results'])
+        plan.add('object_list', lambda zo: _retrieve_or_none(
+            objects_client, 'object', url=zo['object']
+        ), each='zaak_objects')
+
+        results = plan.execute()
+
+        # Amend the resulting statusses with their respective type.
+        status_list = results['status_list']
+        for status in status_list:
+            status['statustype_embedded'] = results['statustypes_by_url'].get(status['statustype'], None)
+
+        document_list = [document for document in results['document_list'] if document is not None]
+
+        # Amend the resulting besluiten with their respective type.
+        besluit_list = results['besluit_list']
         for besluit in besluit_list:
-            brc_audittrail_list += client('brc').list('audittrail', besluit_uuid=get_uuid(besluit['url']))
+            besluit['besluittype_embedded'] = results['besluittypes_by_url'].get(besluit['besluittype'], None)
+
+        resultaat = results['resultaat']
+        if resultaat:
+            resultaat['resultaattype_embedded'] = results['resultaat_type']
 
-        audittrail_list = zrc_audittrail_list + drc_audittrail_list + brc_audittrail_list
+        audittrail_list = results['zrc_audittrail_list']
+        for audittrails in results['drc_audittrail_lists'] + results['brc_audittrail_lists']:
+            audittrail_list += audittrails
 
         for audit in audittrail_list:
             oud = audit['wijzigingen']['oud'] or {}
@@ -281,35 +295,19 @@ class ZaakDetailView(ZACViewMixin, FormView):
             audit['wijzigingen'] = format_dict_diff(changes)
             audit['aanmaakdatum'] = datetime.datetime.strptime(audit['aanmaakdatum'], "%Y-%m-%dT%H:%M:%S.%fZ")
 
-        # Betrokkenen/Rollen
-        # TODO: fetch extra pages
-        rollen_list = self.zrc_client.list('rol', query_params={
-            'zaak': self.zaak['url'],
-        })['results']
-
-        for rol in rollen_list:
-            if rol['betrokkene']:
-                personen = get_personen(self.config, self.zrc_client, url=rol['betrokkene'])
-                if personen:
-                    rol['betrokkeneNaam'] = personen[0][1]['naam']['aanschrijfwijze']
+        rollen_list = results['rollen_list']
+        for rol, personen in zip(rollen_list, results['rollen_personen']):
+            if personen:
+                rol['betrokkeneNaam'] = personen[0][1]['naam']['aanschrijfwijze']
 
-        # Objects
-        objecttypes_by_url = get_objecttypes_by_url()
         object_list = []
-        zaak_objects = self.zrc_client.list('zaakobject', query_params={
-            'zaak': self.zaak['url'],
-        })['results']
-        for zo in zaak_objects:
-            try:
-                object = retrieve_object(url=zo["object"])
-            except ClientError as e:
-                logger.exception(e)
+        for obj in results['object_list']:
+            if obj is None:
                 continue
-            else:
-                object["object_type_embedded"] = objecttypes_by_url.get(object["type"])
-                if isinstance(object["record"]["data"], str):
-                    object["record"]["data"] = json.loads(object["record"]["data"])
-                object_list.append(object)
+            obj['object_type_embedded'] = results['objecttypes_by_url'].get(obj['type'])
+            if isinstance(obj['record']['data'], str):
+                obj['record']['data'] = json.loads(obj['record']['data'])
+            object_list.append(obj)
 
         context.update({
             'zaak_uuid': self.zaak_uuid,
@@ -324,6 +322,18 @@ class ZaakDetailView(ZACViewMixin, FormView):
         return context
 
 
+def _retrieve_or_none(client, resource, **kwargs):
+    """
+    Retrieves a single object but logs the error instead of raising it if the
+    object could not be retrieved.
+    """
+    try:
+        return client.retrieve(resource, **kwargs)
+    except ClientError as e:
+        logger.exception(e)
+        return None
+
+
 class StatusForm(forms.Form):
     statustype_url = forms.ChoiceField(label='Status', required=True)
     toelichting = forms.CharField()
@@ -664,10 +674,13 @@ def get_personen(config, client, bsn=None, url=None):
 
     if bsn:
         url = config.brp_base_url + f'ingeschrevenpersonen/{bsn}'
+    start = time.monotonic()
     try:
-        response = requests.get(url, headers={'X-API-KEY': config.brp_api_key})
+        response = get_session('brp').get(url, headers={'X-API-KEY': config.brp_api_key})
     except Exception:
+        record_upstream_request('brp', 'ingeschrevenpersonen_read', 'error', time.monotonic() - start)
         return personen
+    record_upstream_request('brp', 'ingeschrevenpersonen_read', response.status_code, time.monotonic() - start)
 
     # Add log entry
     client._log.add(
@@ -0,0 +1,46 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from zac.status.probes import probe_services, prune_probes
+
+
+class Command(BaseCommand):
+    """
+    Example:
+
+        $ ./manage.py probe_services --interval 30
+    """
+    help = 'Probe all APIs on an interval, for the status page.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=settings.STATUS_PROBE_INTERVAL,
+            help='Het aantal seconden tussen het controleren van de APIs.'
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Controleer de APIs een keer en stop dan.'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            while True:
+                start = time.monotonic()
+
+                probes = probe_services()
+                prune_probes()
+
+                if options['verbosity'] > 1 or options['once']:
+                    for service_probe in probes:
+                        self.stdout.write(f'{service_probe.service}: {service_probe.status}')
+
+                if options['once']:
+                    return
+                time.sleep(max(options['interval'] - (time.monotonic() - start), 0))
+        except KeyboardInterrupt:
+            return
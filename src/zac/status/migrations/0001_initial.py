@@ -0,0 +1,31 @@
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ServiceProbe',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('service', models.CharField(max_length=50)),
+                ('url', models.CharField(blank=True, max_length=255)),
+                ('status', models.CharField(choices=[('working', 'API beschikbaar'), ('unavailable', 'API niet beschikbaar'), ('unreachable', 'Server niet bereikbaar')], max_length=20)),
+                ('latency', models.FloatField(blank=True, null=True)),
+                ('probed', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'ordering': ('-probed',),
+            },
+        ),
+        migrations.AddIndex(
+            model_name='serviceprobe',
+            index=models.Index(fields=['service', '-probed'], name='status_serv_service_8061cd_idx'),
+        ),
+    ]
@@ -0,0 +1,44 @@
+from django.db import models
+from django.utils import timezone
+from django.utils.translation import ugettext_lazy as _
+
+from djchoices import ChoiceItem, DjangoChoices
+
+
+class StatusChoices(DjangoChoices):
+    working = ChoiceItem('working', _('API beschikbaar'))
+    unavailable = ChoiceItem('unavailable', _('API niet beschikbaar'))
+    unreachable = ChoiceItem('unreachable', _('Server niet bereikbaar'))
+
+
+class ServiceProbe(models.Model):
+    """
+    The result of probing an API, see `zac.status.probes`. The latest probe
+    per API makes up the status snapshot, older probes are the history.
+    """
+    service = models.CharField(max_length=50)
+    url = models.CharField(max_length=255, blank=True)
+    status = models.CharField(max_length=20, choices=StatusChoices.choices)
+    # In milliseconds, unknown if the server was unreachable.
+    latency = models.FloatField(null=True, blank=True)
+
+    probed = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ('-probed', )
+        indexes = [
+            models.Index(fields=['service', '-probed']),
+        ]
+
+    def __str__(self):
+        return '{} {}'.format(self.service, self.status)
+
+    def as_entry(self):
+        return {
+            'status': self.status,
+            'name': self.service,
+            'message': StatusChoices.labels[self.status],
+            'url': self.url,
+            'latency': self.latency,
+            'probed': self.probed,
+        }
@@ -0,0 +1,92 @@
+"""
+Probing the APIs, for the status page.
+
+The `probe_services` management command probes all APIs on an interval and
+stores the results as `ServiceProbe`s. The status page shows the latest probes
+(the snapshot) without probing the APIs itself, unless the snapshot is older
+than `STATUS_SNAPSHOT_MAX_AGE` seconds. That way, frequent health checks
+against the status page don't cause load on the APIs.
+"""
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from zac.demo.concurrency import run_concurrently
+from zac.demo.models import SiteConfiguration
+from zac.demo.sessions import get_session
+
+from .models import ServiceProbe, StatusChoices
+
+
+def probe(service, url):
+    """
+    Fetches the root URL of an API.
+
+    :return: An unsaved `ServiceProbe`.
+    """
+    start = time.monotonic()
+    try:
+        response = get_session(service).get(url, timeout=1)
+    except Exception:
+        return ServiceProbe(service=service, url=url, status=StatusChoices.unreachable)
+
+    latency = (time.monotonic() - start) * 1000
+    status = StatusChoices.working if response.status_code == 200 else StatusChoices.unavailable
+    return ServiceProbe(service=service, url=url, status=status, latency=latency)
+
+
+def probe_services():
+    """
+    Probes all APIs concurrently and stores the results.
+
+    :return: A `list` of `ServiceProbe`s.
+    """
+    services = SiteConfiguration.get_solo().get_services()
+
+    # Probe all APIs at once, so an API that is down only costs the time of
+    # its own timeout.
+    probes = run_concurrently(lambda item: probe(*item), services.items(), max_workers=len(services))
+
+    now = timezone.now()
+    for service_probe in probes:
+        service_probe.probed = now
+    return ServiceProbe.objects.bulk_create(probes)
+
+
+def get_snapshot(max_age=None):
+    """
+    Returns the latest probe of every API, or `None` if any API was not probed
+    in the last `max_age` seconds.
+
+    :param max_age: Defaults to the `STATUS_SNAPSHOT_MAX_AGE` setting.
+    :return: A `list` of `ServiceProbe`s, in the order of the services.
+    """
+    if max_age is None:
+        max_age = settings.STATUS_SNAPSHOT_MAX_AGE
+
+    services = SiteConfiguration.get_solo().get_services()
+    since = timezone.now() - timedelta(seconds=max_age)
+
+    latest = {}
+    for service_probe in ServiceProbe.objects.filter(service__in=services, probed__gte=since).order_by('-probed'):
+        latest.setdefault(service_probe.service, service_probe)
+
+    if any(service not in latest for service in services):
+        return None
+    return [latest[service] for service in services]
+
+
+def prune_probes(days=None):
+    """
+    Removes the probes that are older than `days`.
+
+    :param days: Defaults to the `STATUS_PROBE_HISTORY_DAYS` setting.
+    :return: The number of removed probes.
+    """
+    if days is None:
+        days = settings.STATUS_PROBE_HISTORY_DAYS
+
+    deleted, _ = ServiceProbe.objects.filter(probed__lt=timezone.now() - timedelta(days=days)).delete()
+    return deleted
@@ -0,0 +1,64 @@
+from datetime import timedelta
+from unittest.mock import Mock, patch
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from zac.demo.models import SiteConfiguration
+
+from ..models import ServiceProbe, StatusChoices
+from ..probes import get_snapshot, probe_services, prune_probes
+
+SERVICES = {'zrc': 'http://zrc.nl/api/v1/', 'ztc': 'http://ztc.nl/api/v1/'}
+
+
+@override_settings(STATUS_SNAPSHOT_MAX_AGE=60)
+@patch.object(SiteConfiguration, 'get_services', Mock(return_value=SERVICES))
+class ServiceProbeTests(TestCase):
+
+    @patch('zac.status.probes.get_session')
+    def test_probe_services(self, get_session):
+        get_session.return_value.get.side_effect = [Mock(status_code=200), IOError('Connection refused')]
+
+        probe_services()
+
+        probes = {service_probe.service: service_probe for service_probe in ServiceProbe.objects.all()}
+        self.assertEqual(probes['zrc'].status, StatusChoices.working)
+        self.assertIsNotNone(probes['zrc'].latency)
+        self.assertEqual(probes['ztc'].status, StatusChoices.unreachable)
+        self.assertIsNone(probes['ztc'].latency)
+
+    def test_snapshot(self):
+        ServiceProbe.objects.create(
+            service='zrc', status=StatusChoices.unavailable, probed=timezone.now() - timedelta(seconds=30))
+        latest = ServiceProbe.objects.create(service='zrc', status=StatusChoices.working)
+        self.assertIsNone(get_snapshot())
+
+        ServiceProbe.objects.create(service='ztc', status=StatusChoices.working)
+        self.assertEqual(get_snapshot()[0], latest)
+
+    def test_stale_snapshot(self):
+        for service in SERVICES:
+            ServiceProbe.objects.create(
+                service=service, status=StatusChoices.working, probed=timezone.now() - timedelta(seconds=90))
+
+        self.assertIsNone(get_snapshot())
+
+    def test_prune(self):
+        ServiceProbe.objects.create(service='zrc', status=StatusChoices.working, probed=timezone.now() - timedelta(days=8))
+        ServiceProbe.objects.create(service='zrc', status=StatusChoices.working)
+
+        self.assertEqual(prune_probes(days=7), 1)
+        self.assertEqual(ServiceProbe.objects.count(), 1)
+
+    @patch('zac.status.probes.get_session')
+    def test_json_from_snapshot(self, get_session):
+        for service in SERVICES:
+            ServiceProbe.objects.create(service=service, status=StatusChoices.working, latency=12.5)
+
+        response = self.client.get(reverse('status-json'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([service['name'] for service in response.json()['services']], ['zrc', 'ztc'])
+        get_session.assert_not_called()
@@ -4,4 +4,6 @@ from . import views
 
 urlpatterns = [
     path('', views.StatusView.as_view(), name='status-index'),
+    path('json/', views.StatusJSONView.as_view(), name='status-json'),
+    path('metrics/', views.MetricsView.as_view(), name='status-metrics'),
 ]
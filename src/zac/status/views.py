@@ -1,27 +1,22 @@
-from django.utils.translation import ugettext_lazy as _
-from django.views.generic import TemplateView
+from django.http import HttpResponse, JsonResponse
+from django.views.generic import TemplateView, View
 
-import requests
-from djchoices import ChoiceItem, DjangoChoices
+from zac.demo.auth import credentials_cache
+from zac.demo.metrics import render_metrics
+from zac.demo.sessions import get_pool_stats
 
-from zac.demo.models import SiteConfiguration
+from .probes import get_snapshot, probe_services
 
 
-class StatusChoices(DjangoChoices):
-    working = ChoiceItem('working', _('API beschikbaar'))
-    unavailable = ChoiceItem('unavailable', _('API niet beschikbaar'))
-    unreachable = ChoiceItem('unreachable', _('Server niet bereikbaar'))
-
-
-def get_status(url):
-    try:
-        response = requests.get(url, timeout=1)
-    except Exception:
-        return StatusChoices.unreachable
-
-    if response.status_code == 200:
-        return StatusChoices.working
-    return StatusChoices.unavailable
+def get_probes():
+    """
+    Returns the latest probes of all APIs. If the snapshot is stale, because
+    `probe_services` isn't running, the APIs are probed now.
+    """
+    probes = get_snapshot()
+    if probes is None:
+        probes = probe_services()
+    return probes
 
 
 class StatusView(TemplateView):
@@ -32,22 +27,43 @@ class StatusView(TemplateView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
 
-        config = SiteConfiguration.get_solo()
-        services = config.get_services()
-
-        entries = []
-        for service, url in services.items():
-            status = get_status(url)
-
-            entries.append({
-                'status': status,
-                'name': service,
-                'message': StatusChoices.labels[status],
-                'url': url,
-            })
+        probes = get_probes()
 
         context.update({
-            'entries': entries
+            'entries': [service_probe.as_entry() for service_probe in probes],
+            'probed': min(service_probe.probed for service_probe in probes),
+            'pools': get_pool_stats(),
+            'credentials': credentials_cache.stats(),
         })
 
         return context
+
+
+class StatusJSONView(View):
+    """
+    The status of all APIs, for monitoring.
+    """
+
+    def get(self, request, *args, **kwargs):
+        probes = get_probes()
+
+        return JsonResponse({
+            'services': [
+                {
+                    'name': service_probe.service,
+                    'url': service_probe.url,
+                    'status': service_probe.status,
+                    'latency': service_probe.latency,
+                    'probed': service_probe.probed,
+                } for service_probe in probes
+            ],
+        })
+
+
+class MetricsView(View):
+    """
+    The metrics of this process, in the Prometheus text format.
+    """
+
+    def get(self, request, *args, **kwargs):
+        return HttpResponse(render_metrics(), content_type='text/plain; version=0.0.4; charset=utf-8')